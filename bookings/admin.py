@@ -1,6 +1,79 @@
 from django.contrib import admin
-from .models import Booking , draftBooking , allUserBookings
+from movie_booking.paginator import EstimatedCountPaginator
+from .models import Booking , draftBooking , allUserBookings , ArchivedBooking , BookingRollup , WaitlistEntry , OutboxEvent , OutboxCursor
+
+
+class BookingAdmin(admin.ModelAdmin):
+    # Booking.__str__ reads the show and the user, list columns instead
+    list_display = ('reference', 'show_id', 'show', 'user', 'total_amount', 'admitted_at')
+    list_select_related = ('show', 'user')
+    # A select (or filter) listing every show, user and seat would load whole tables
+    raw_id_fields = ('show', 'user', 'seats')
+    search_fields = ('=reference',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class DraftBookingAdmin(admin.ModelAdmin):
+    list_display = ('reference', 'show_id', 'show', 'user', 'created_at')
+    list_select_related = ('show', 'user')
+    raw_id_fields = ('show', 'user', 'seats')
+    search_fields = ('=reference',)
+
+
+class AllUserBookingsAdmin(admin.ModelAdmin):
+    list_display = ('reference', 'user', 'movie_title', 'show_date', 'total_amount')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    search_fields = ('=reference',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ('reference', 'show_id', 'show', 'user', 'total_amount', 'admitted_at', 'archived_at')
+    list_select_related = ('show', 'user')
+    raw_id_fields = ('show', 'user')
+    search_fields = ('=reference',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class BookingRollupAdmin(admin.ModelAdmin):
+    list_display = ('period', 'period_start', 'movie', 'language', 'screen_number', 'bookings', 'seats', 'revenue', 'cancellations')
+    list_select_related = ('movie', 'language')
+    list_filter = ('period',)
+    raw_id_fields = ('movie',)
+
+
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('reference', 'show_id', 'user', 'seat_count', 'seat_type', 'status', 'created_at', 'offered_at')
+    list_select_related = ('user',)
+    list_filter = ('status',)
+    raw_id_fields = ('show', 'user', 'draft')
+    search_fields = ('=reference',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'txid', 'kind', 'show_id', 'created_at')
+    list_filter = ('kind',)
+    search_fields = ('=show_id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class OutboxCursorAdmin(admin.ModelAdmin):
+    list_display = ('subscriber', 'txid', 'position', 'updated_at')
+
+
 # Register your models here.
-admin.site.register(Booking)
-admin.site.register(draftBooking)
-admin.site.register(allUserBookings)
\ No newline at end of file
+admin.site.register(Booking, BookingAdmin)
+admin.site.register(draftBooking, DraftBookingAdmin)
+admin.site.register(allUserBookings, AllUserBookingsAdmin)
+admin.site.register(ArchivedBooking, ArchivedBookingAdmin)
+admin.site.register(BookingRollup, BookingRollupAdmin)
+admin.site.register(WaitlistEntry, WaitlistEntryAdmin)
+admin.site.register(OutboxEvent, OutboxEventAdmin)
+admin.site.register(OutboxCursor, OutboxCursorAdmin)
@@ -1,21 +1,36 @@
-from .serializers import BookingSerializer, draftBookingSerializer, allUserBookingSerializer
-from .models import Booking, draftBooking, allUserBookings
+from .serializers import BookingSerializer, draftBookingSerializer, allUserBookingSerializer, CartSerializer, WaitlistEntrySerializer
+from .models import generate_id, Booking, draftBooking, allUserBookings, Cart, BookingRollup, WaitlistEntry
+from . import cart as carts
+from . import tickets
+from . import rollups
+from . import exports
+from . import waitlist
+from . import outbox
+from . import seatlocks
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.authentication import TokenAuthentication
-from django.core.mail import send_mail
 from django.conf import settings
 from movies.models import Show, Seat
+from movies import pricing
+from movies.signals import bump_seat_map_version
 from movies.serializers import ShowSerializer, SeatSerializer, AddShowSerializer, ScreenSerializer
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.db import transaction
+from django.db.models import F, Sum
 from datetime import timedelta
-from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from bookings import utlis
 from django.views.decorators.csrf import csrf_exempt
 from movies.models import Movie
+from users.models import User
+from movie_booking.db_router import replica_read, pins_primary
+from movie_booking.idempotency import idempotent
+from movie_booking.ratelimit import UserThrottle, ScopedThrottle
+from movie_booking.streaming import export_response, FORMATS
 
 
 class BookingViewSet(viewsets.ModelViewSet):
@@ -25,9 +40,15 @@ class BookingViewSet(viewsets.ModelViewSet):
     """
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
+    # Detail URLs carry the public booking reference, the integer id stays internal
+    lookup_field = 'reference'
+    lookup_url_kwarg = 'pk'
     permission_classes = [IsAuthenticated]  # Only authenticated users can access these endpoints
+    throttle_classes = [UserThrottle, ScopedThrottle]
+    throttle_scope = None
 
     @action(detail=False, methods=['get'])
+    @replica_read
     def get_user_bookings(self, request):
         """
         Custom action to retrieve all bookings for the authenticated user.
@@ -42,7 +63,9 @@ class BookingViewSet(viewsets.ModelViewSet):
             # Handle any exceptions and return an error response
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_scope='booking')
+    @idempotent
+    @pins_primary
     def create_booking(self, request):
         """
         Custom action to create a draft booking for the authenticated user.
@@ -64,15 +87,24 @@ class BookingViewSet(viewsets.ModelViewSet):
             if draftBooking.objects.filter(user=request.user).exists():
                 return Response({"success": False, "message": "You already have a Pending Booking"}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Create a draft booking
-            draft_booking = draftBooking.objects.create(show=show, user=request.user)
-            draft_booking.seats.set(seats)
-
-            # Lock the seats
-            for seat in seats:
-                seat.state = 'locked'
-                seat.locked_at = timezone.now()
-                seat.save()
+            # Lock the seats through the seat-lock store, see bookings/seatlocks.py
+            reference = generate_id()
+            seat_pks = [seat.pk for seat in seats]
+            try:
+                with transaction.atomic():
+                    if not seatlocks.hold(show.id, seat_pks, reference):
+                        return Response({"success": False, "message": "Seat not available"}, status=status.HTTP_400_BAD_REQUEST)
+
+                    # Create a draft booking
+                    draft_booking = draftBooking.objects.create(reference=reference, show=show, user=request.user)
+                    draft_booking.seats.set(seats)
+                    outbox.record('seats.held', show.id, draft=reference, user=request.user.id,
+                                  seats=[seat.id for seat in seats])
+            except Exception:
+                seatlocks.forget(show.id, seat_pks, reference)
+                raise
+            bump_seat_map_version(show.id)
+            pricing.refresh_price_tables([show.id])
 
             # Serialize and return the draft booking
             serializer = draftBookingSerializer(draft_booking)
@@ -81,93 +113,113 @@ class BookingViewSet(viewsets.ModelViewSet):
             # Handle any exceptions and return an error response
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post'], throttle_scope='booking')
+    @idempotent
+    @pins_primary
     def confirm_booking(self, request, pk=None):
         """
         Custom action to confirm a draft booking and create a final booking.
         """
         try:
-            # Fetch the draft booking
-            draft_booking = draftBooking.objects.get(id=pk)
+            # Fetch the draft booking by its public reference
+            draft_booking = draftBooking.objects.select_related('show__price_table', 'show__movie').get(reference=pk)
             # Validate if the draft booking exists and belongs to the user
-            if not draft_booking or draft_booking.user != request.user:
+            if not draft_booking or draft_booking.user_id != request.user.pk:
                 return Response({"success": False, "message": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
 
-            # Fetch the show and seats from the draft booking
             show = draft_booking.show
-            seats = draft_booking.seats.all()
-            # Calculate the total price
-            total_price = sum(seat.price for seat in seats) * show.base_price
-
-            # Check if the user has sufficient balance
-            if request.user.balance < total_price:
-                return Response({"success": False, "message": "Insufficient Balance"}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Deduct the total price from the user's balance
-            request.user.balance -= total_price
-            request.user.save()
-
-            # Create the final booking
-            booking = Booking.objects.create(show=show, user=request.user, total_amount=total_price)
-            booking.seats.set(seats)
-
-            # Mark the seats as booked
-            for seat in seats:
-                seat.state = 'booked'
-                seat.locked_at = None
-                seat.save()
-
-            # Create a record in allUserBookings
-            allUserBookings.objects.create(
-                id=booking.id,
-                movie_title=show.movie.title,
-                show_date=show.date_time,
-                user=request.user,
-                total_amount=total_price,
-                seats=" ".join(seat.id for seat in seats)
-            )
+            with transaction.atomic():
+                # Lock the draft, expiry or a concurrent confirm may have released it since it was read
+                draft_booking = draftBooking.objects.select_for_update().filter(pk=draft_booking.pk).first()
+                if draft_booking is None:
+                    raise seatlocks.SeatsTaken
+                # Fetch the seats and price them from the show's compiled price table
+                seats = list(draft_booking.seats.all())
+                if not seats:
+                    # Nothing left to book, never a booking of no seats for nothing
+                    raise seatlocks.SeatsTaken
+                total_price = pricing.total_price(show, seats)
+
+                # The seat rows are the system of record, the seats must still be held
+                seat_pks = [seat.pk for seat in seats]
+                if Seat.objects.filter(pk__in=seat_pks, state='locked').update(state='booked', locked_at=None) != len(seat_pks):
+                    raise seatlocks.SeatsTaken
+
+                # Deduct the total price from the user's balance, a single conditional debit like the cart checkout
+                if not User.objects.filter(pk=request.user.pk, balance__gte=total_price).update(balance=F('balance') - total_price):
+                    transaction.set_rollback(True)
+                    return Response({"success": False, "message": "Insufficient Balance"}, status=status.HTTP_400_BAD_REQUEST)
+                request.user.refresh_from_db(fields=['balance'])
+
+                # Create the final booking
+                booking = Booking.objects.create(show=show, user=request.user, total_amount=total_price)
+                booking.seats.set(seats)
+
+                # Create a record in allUserBookings
+                allUserBookings.objects.create(
+                    id=booking.id,
+                    reference=booking.reference,
+                    movie_title=show.movie.title,
+                    show_date=show.date_time,
+                    user=request.user,
+                    total_amount=total_price,
+                    seats=" ".join(seat.id for seat in seats)
+                )
+
+                # The draft is fulfilled, remove it so the user can book again
+                waitlist.draft_confirmed(draft_booking)
+                draft_booking.delete()
+                rollups.booking_confirmed(booking, show, len(seats))
+                outbox.record('booking.confirmed', show.id, booking=booking.reference, draft=draft_booking.reference,
+                              user=request.user.id, seats=[seat.id for seat in seats], amount=total_price)
+            seatlocks.forget(show.id, seat_pks, draft_booking.reference)
+            bump_seat_map_version(show.id)
 
             # Serialize and return the final booking
             serializer = BookingSerializer(booking)
             return Response({"success": True, "message": serializer.data}, status=status.HTTP_201_CREATED)
+        except seatlocks.SeatsTaken:
+            return Response({"success": False, "message": "Seats are no longer held"}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             # Handle any exceptions and return an error response
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    @action(detail=True, methods=['delete'])
+    @action(detail=True, methods=['delete'], throttle_scope='booking')
+    @pins_primary
     def delete_draft_booking(self, request, pk=None):
         """
         Custom action to delete a draft booking and release the locked seats.
         """
         try:
-            # Fetch the draft booking
-            draft_booking = draftBooking.objects.get(id=pk)
+            # Fetch the draft booking by its public reference
+            draft_booking = draftBooking.objects.get(reference=pk)
             # Validate if the draft booking belongs to the user
             if draft_booking.user != request.user:
                 return Response({"success": False, "message": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
 
-            # Release the locked seats
-            seats = draft_booking.seats.all()
-            for seat in seats:
-                seat.state = 'available'
-                seat.locked_at = None
-                seat.save()
-
-            # Delete the draft booking
-            draft_booking.delete()
+            # Release the locked seats and delete the draft booking, unless a concurrent confirm got it first
+            with transaction.atomic():
+                if not waitlist.release_draft(draft_booking, 'deleted'):
+                    return Response({"success": False, "message": "Draft booking not found"}, status=status.HTTP_404_NOT_FOUND)
+            bump_seat_map_version(draft_booking.show_id)
+            pricing.refresh_price_tables([draft_booking.show_id])
+            # Offer the released seats to the show's waitlist
+            waitlist.seats_freed(draft_booking.show_id)
             return Response({"success": True, "message": "Successfully Deleted"}, status=status.HTTP_200_OK)
         except Exception as e:
             # Handle any exceptions and return an error response
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post'], throttle_scope='booking')
+    @idempotent
+    @pins_primary
     def cancel_booking(self, request, pk=None):
         """
         Custom action to cancel a confirmed booking and issue a partial refund.
         """
         try:
-            # Fetch the booking
-            booking = Booking.objects.get(id=pk)
+            # Fetch the booking by its public reference
+            booking = Booking.objects.get(reference=pk)
             # Validate if the booking belongs to the user
             if booking.user != request.user:
                 return Response({"success": False, "message": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
@@ -176,22 +228,33 @@ class BookingViewSet(viewsets.ModelViewSet):
             if booking.show.date_time < timezone.now() + timedelta(minutes=20):
                 return Response({"success": False, "message": "Too late to cancel"}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Release the booked seats
-            seats = booking.seats.all()
-            total_price = booking.total_amount
-            for seat in seats:
-                seat.state = 'available'
-                seat.locked_at = None
-                seat.save()
-
-            # Delete the booking and its record in allUserBookings
-            booking.delete()
-            allUserBookings.objects.filter(id=pk).delete()
-
-            # Issue a partial refund (80% of the total price)
-            refund_amount = total_price * 0.8
-            request.user.balance += refund_amount
-            request.user.save()
+            with transaction.atomic():
+                # Lock the booking, a concurrent cancel of the same booking finds it gone
+                booking = Booking.objects.select_for_update().filter(pk=booking.pk).first()
+                if booking is None:
+                    return Response({"success": False, "message": "Booking not found"}, status=status.HTTP_404_NOT_FOUND)
+
+                # Release the booked seats
+                seats = list(booking.seats.all())
+                total_price = booking.total_amount
+                Seat.objects.filter(pk__in=[seat.pk for seat in seats]).update(state='available', locked_at=None)
+
+                # Delete the booking and its record in allUserBookings
+                allUserBookings.objects.filter(id=booking.id).delete()
+                rollups.booking_cancelled(booking, booking.show, len(seats))
+                booking.delete()
+
+                # Issue a partial refund (80% of the total price), no read-modify-write on the balance
+                refund_amount = total_price * 0.8
+                User.objects.filter(pk=request.user.pk).update(balance=F('balance') + refund_amount)
+                outbox.record('booking.cancelled', booking.show_id, booking=booking.reference, user=request.user.id,
+                              seats=[seat.id for seat in seats], refund=refund_amount)
+                # After commit, a seat map rendered before it would be cached under the new version
+                transaction.on_commit(lambda: bump_seat_map_version(booking.show_id))
+            request.user.refresh_from_db(fields=['balance'])
+            pricing.refresh_price_tables([booking.show_id])
+            # Offer the freed seats to the show's waitlist
+            waitlist.seats_freed(booking.show_id)
 
             return Response({"success": True, "message": f"Refund: {refund_amount}"}, status=status.HTTP_200_OK)
         except Exception as e:
@@ -199,10 +262,10 @@ class BookingViewSet(viewsets.ModelViewSet):
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @csrf_exempt  
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post'], throttle_scope='booking')
     def send_tickets(self, request, pk=None):
         try:
-            booking = Booking.objects.get(id=pk, user=request.user)
+            booking = Booking.objects.get(reference=pk, user=request.user)
 
             
             movie = Movie.objects.get(title=booking.show.movie.title, language=booking.show.movie.language)
@@ -212,12 +275,13 @@ class BookingViewSet(viewsets.ModelViewSet):
             utlis.send_tickets(
                 username=booking.user.username,
                 email=booking.user.email,
-                booking_id=booking.id,
+                booking_id=booking.reference,
                 movie_title=booking.show.movie.title,
                 movie_language=booking.show.movie.language,
                 start_time=booking.show.date_time,
                 total_price=booking.total_amount,
                 seat_ids=seat_ids,
+                ticket_url=tickets.ticket_url(booking, booking.show),
             )
 
             return Response({"success": True, "message": "Email sent."}, status=200)
@@ -229,4 +293,289 @@ class BookingViewSet(viewsets.ModelViewSet):
             return Response({"success": False, "message": "Movie not found."}, status=404)
 
         except Exception as e:
-            return Response({"success": False, "message": str(e)}, status=500)
\ No newline at end of file
+            return Response({"success": False, "message": str(e)}, status=500)
+
+
+class CartViewSet(viewsets.ViewSet):
+    """
+    Cart holding seats across several shows, confirmed together by checkout.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserThrottle, ScopedThrottle]
+    throttle_scope = None
+
+    def list(self, request):
+        try:
+            cart = Cart.objects.filter(user=request.user).prefetch_related('items__seat').first()
+            data = CartSerializer(cart).data if cart else None
+            return Response({"success": True, "message": "Cart fetched successfully", "data": data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'], throttle_scope='booking')
+    @pins_primary
+    def add_seats(self, request):
+        """
+        Hold seats of any shows in the cart. Body: {"seat_uuids": [...]}
+        """
+        try:
+            cart = carts.hold_seats(request.user, request.data.get('seat_uuids', []))
+            cart = Cart.objects.prefetch_related('items__seat').get(pk=cart.pk)
+            return Response({"success": True, "message": "Seats added to cart", "data": CartSerializer(cart).data}, status=status.HTTP_200_OK)
+        except carts.CartError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'], throttle_scope='booking')
+    @pins_primary
+    def remove_seats(self, request):
+        """
+        Release seats from the cart, all of them when no seat_uuids are given.
+        """
+        try:
+            released = carts.release_seats(request.user, request.data.get('seat_uuids'))
+            return Response({"success": True, "message": f"Released {released} seats"}, status=status.HTTP_200_OK)
+        except carts.CartError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'], throttle_scope='booking')
+    @idempotent
+    @pins_primary
+    def checkout(self, request):
+        """
+        Confirm every seat in the cart in one transaction, one booking per show.
+        """
+        try:
+            bookings = carts.checkout(request.user)
+            serializer = BookingSerializer(bookings, many=True)
+            return Response({"success": True, "message": "Checkout complete", "data": serializer.data}, status=status.HTTP_201_CREATED)
+        except carts.CartError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class WaitlistViewSet(viewsets.ViewSet):
+    """
+    Waitlists of sold out shows. Freed seats are offered in arrival order
+    as a draft booking held for WAITLIST_OFFER_SECONDS.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserThrottle, ScopedThrottle]
+    throttle_scope = None
+
+    def list(self, request):
+        """
+        The user's pending entries, with their position in the queue and the draft of an offer.
+        """
+        try:
+            entries = list(WaitlistEntry.objects.filter(user=request.user, status__in=['waiting', 'offered'])
+                           .select_related('draft').order_by('pk'))
+            positions = {entry.pk: waitlist.position(entry) for entry in entries if entry.status == 'waiting'}
+            data = WaitlistEntrySerializer(entries, many=True, context={'positions': positions}).data
+            return Response({"success": True, "message": "Waitlist fetched successfully", "data": data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'], throttle_scope='booking')
+    @pins_primary
+    def join(self, request):
+        """
+        Body: {"show_id": 1, "seat_count": 2, "seat_type": "premium" (optional)}
+        """
+        try:
+            seat_count = int(request.data.get('seat_count', 1))
+            show = Show.objects.get(id=request.data.get('show_id'))
+            entry = waitlist.join(request.user, show, seat_count, request.data.get('seat_type') or '')
+            positions = {entry.pk: waitlist.position(entry)} if entry.status == 'waiting' else {}
+            data = WaitlistEntrySerializer(entry, context={'positions': positions}).data
+            return Response({"success": True, "message": "Joined the waitlist", "data": data}, status=status.HTTP_201_CREATED)
+        except (TypeError, ValueError):
+            return Response({"success": False, "message": "Invalid seat_count."}, status=status.HTTP_400_BAD_REQUEST)
+        except Show.DoesNotExist:
+            return Response({"success": False, "message": "Show not found."}, status=status.HTTP_404_NOT_FOUND)
+        except waitlist.WaitlistError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=True, methods=['post'], throttle_scope='booking')
+    @pins_primary
+    def leave(self, request, pk=None):
+        """
+        Leave the waitlist, releasing the seats of a pending offer.
+        """
+        try:
+            waitlist.leave(request.user, pk)
+            return Response({"success": True, "message": "Left the waitlist"}, status=status.HTTP_200_OK)
+        except waitlist.WaitlistError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TicketViewSet(viewsets.ViewSet):
+    """
+    Door scanner API. Tickets are verified offline from their signature,
+    admission is one conditional UPDATE per ticket.
+    """
+    permission_classes = [IsAdminUser]
+    # Scanners only count against the scan limit
+    throttle_classes = [ScopedThrottle]
+    throttle_scope = None
+
+    @action(detail=False, methods=['post'], throttle_scope='scan')
+    def scan(self, request):
+        """
+        Admit one ticket. Body: {"token": <QR content>, "show_id": <optional, the door's show>}
+        """
+        try:
+            booking_id, show_id, start = tickets.read_ticket(request.data.get('token', ''), request.data.get('show_id'))
+            admitted_at = tickets.admit(booking_id)
+            if admitted_at is not None:
+                return Response({"success": False, "message": f"Already admitted at {admitted_at.isoformat()}"}, status=status.HTTP_409_CONFLICT)
+            return Response({"success": True, "message": "Admitted", "data": {"show": show_id, "start": start}}, status=status.HTTP_200_OK)
+        except tickets.TicketError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'], throttle_scope='scan')
+    def scan_batch(self, request):
+        """
+        Sync scans queued while the scanner was offline.
+        Body: {"show_id": <optional>, "scans": [{"token": ..., "scanned_at": <ISO 8601, optional>}, ...]}
+        """
+        try:
+            scans = request.data.get('scans') or []
+            if not isinstance(scans, list) or len(scans) > 1000:
+                return Response({"success": False, "message": "Send a list of at most 1000 scans."}, status=status.HTTP_400_BAD_REQUEST)
+            for scan in scans:
+                scanned_at = scan.get('scanned_at')
+                scanned_at = parse_datetime(scanned_at) if scanned_at else None
+                if scanned_at is not None and timezone.is_naive(scanned_at):
+                    scanned_at = timezone.make_aware(scanned_at)
+                scan['scanned_at'] = scanned_at
+            results = tickets.admit_batch(scans, request.data.get('show_id'))
+            return Response({"success": True, "message": "Scans processed", "data": results}, status=status.HTTP_200_OK)
+        except (AttributeError, ValueError):
+            return Response({"success": False, "message": "Invalid scan entry."}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AnalyticsViewSet(viewsets.ViewSet):
+    """
+    Admin reports, read from the booking rollups only.
+    """
+    permission_classes = [IsAdminUser]
+    GROUPS = {
+        'movie': ('movie__imdb_id', 'movie__title'),
+        'language': ('language__name',),
+        'screen': ('screen_number',),
+    }
+
+    @action(detail=False, methods=['get'])
+    def revenue(self, request):
+        """
+        Bookings, seats, revenue and cancellations per period.
+        Query params: period (hour|day), from, to (ISO dates or datetimes), group_by (movie|language|screen, optional).
+        """
+        try:
+            params = request.query_params
+            period = params.get('period', 'day')
+            group_by = params.get('group_by')
+            if period not in ('hour', 'day') or (group_by and group_by not in self.GROUPS):
+                return Response({"success": False, "message": "period must be hour or day, group_by movie, language or screen."}, status=status.HTTP_400_BAD_REQUEST)
+
+            rows = BookingRollup.objects.filter(period=period)
+            for param, lookup in (('from', 'period_start__gte'), ('to', 'period_start__lt')):
+                if params.get(param):
+                    moment = parse_datetime(params[param]) or parse_datetime(f"{params[param]}T00:00:00")
+                    if moment is None:
+                        return Response({"success": False, "message": f"Invalid {param} date."}, status=status.HTTP_400_BAD_REQUEST)
+                    if timezone.is_naive(moment):
+                        moment = timezone.make_aware(moment)
+                    rows = rows.filter(**{lookup: moment})
+
+            columns = ('period_start',) + self.GROUPS.get(group_by, ())
+            data = list(rows.values(*columns).order_by(*columns).annotate(
+                bookings=Sum('bookings'), seats=Sum('seats'), revenue=Sum('revenue'), cancellations=Sum('cancellations')))
+            return Response({"success": True, "message": "Revenue fetched successfully", "data": data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """
+    Admin exports streamed as CSV or NDJSON with constant memory.
+    Query params: output (csv|ndjson, default csv) and an optional filter per export.
+    """
+    permission_classes = [IsAdminUser]
+
+    def export(self, request, name, columns, rows, filter_param):
+        output = request.query_params.get('output', 'csv')
+        if output not in FORMATS:
+            return Response({"success": False, "message": "output must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+        value = request.query_params.get(filter_param)
+        if value is not None and not value.isdigit():
+            return Response({"success": False, "message": f"Invalid {filter_param}."}, status=status.HTTP_400_BAD_REQUEST)
+        return export_response(name, output, columns, rows(int(value) if value else None), request.user)
+
+    @action(detail=False, methods=['get'])
+    def bookings(self, request):
+        """
+        Confirmed bookings with their seats, optionally of one show (show_id).
+        """
+        return self.export(request, 'bookings', exports.BOOKING_COLUMNS, exports.booking_rows, 'show_id')
+
+    @action(detail=False, methods=['get'])
+    def seats(self, request):
+        """
+        Seat maps, optionally of one show (show_id).
+        """
+        return self.export(request, 'seats', exports.SEAT_COLUMNS, exports.seat_rows, 'show_id')
+
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """
+        Booking history, optionally of one user (user_id).
+        """
+        return self.export(request, 'history', exports.HISTORY_COLUMNS, exports.history_rows, 'user_id')
+
+
+class EventViewSet(viewsets.ViewSet):
+    """
+    Change feed of booking state transitions read from the outbox, for
+    consumers outside this process. Clients keep their own cursor.
+    """
+    permission_classes = [IsAdminUser]
+    MAX_LIMIT = 1000
+
+    def list(self, request):
+        """
+        Events after a feed position in commit order. Query params: after (default 0, an event
+        id or a returned "next"), limit, kind, show_id. Pass the returned "next" as after to read on.
+        """
+        try:
+            params = request.query_params
+            txid, position = outbox.parse_position(params.get('after', 0))
+            limit = min(int(params.get('limit', 100)), self.MAX_LIMIT)
+            events = outbox.settled().filter(outbox.after(txid, position))
+            if params.get('kind'):
+                events = events.filter(kind=params['kind'])
+            if params.get('show_id'):
+                events = events.filter(show_id=int(params['show_id']))
+            rows = list(outbox.in_order(events).values('id', 'kind', 'show_id', 'payload', 'created_at', 'txid')[:limit])
+            if rows:
+                txid, position = rows[-1]['txid'], rows[-1]['id']
+            next_after = outbox.format_position(txid, position)
+            data = [{key: value for key, value in row.items() if key != 'txid'} for row in rows]
+            return Response({"success": True, "message": "Events fetched successfully", "data": data, "next": next_after}, status=status.HTTP_200_OK)
+        except ValueError:
+            return Response({"success": False, "message": "after must be an event id or a returned next, limit and show_id integers."}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,229 @@
+"""
+Multi-show cart: seats of several shows are held in one cart and confirmed
+together in a single transaction.
+
+Holds go through the seat-lock store (bookings/seatlocks.py). A cart holds at
+most MAX_SEATS seats for DRAFT_HOLD_SECONDS from its first seat, then
+release_expired_holds gives them back. Checkout locks the cart, so its items
+are the seats it still holds, then the seat rows with SELECT ... FOR UPDATE in primary key order, so two
+checkouts touching overlapping seats queue up instead of deadlocking.
+Checkout debits the balance once for the whole cart and writes bookings,
+their seat links and the history rows with bulk inserts.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from movies import pricing
+from movies.models import Seat
+from movies.signals import bump_seat_map_version
+from users.models import User
+from .models import Booking, Cart, CartItem, allUserBookings, OutboxEvent
+from . import waitlist
+from . import outbox
+from . import seatlocks
+from . import rollups
+
+
+MAX_SEATS = 10
+
+
+class CartError(Exception):
+    pass
+
+
+def expires_at(cart):
+    # updated_at is set when the first seat goes into an empty cart
+    return cart.updated_at + timedelta(seconds=seatlocks.hold_seconds())
+
+
+def locked_seats(seat_uuids):
+    # Deterministic lock order, see the module docstring
+    return list(Seat.objects.select_for_update().filter(uuid__in=seat_uuids).order_by('pk'))
+
+
+def record_seats(kind, cart, seats, **payload):
+    # One event per show
+    seats_by_show = defaultdict(list)
+    for seat in seats:
+        seats_by_show[seat.show_id].append(seat.id)
+    OutboxEvent.objects.bulk_create([
+        outbox.event(kind, show_id, cart=cart.reference, user=cart.user_id, seats=seat_ids, **payload)
+        for show_id, seat_ids in seats_by_show.items()
+    ])
+
+
+def hold_seats(user, seat_uuids):
+    """
+    Lock available seats (of any shows) into the user's cart.
+    """
+    seats = list(Seat.objects.filter(uuid__in=seat_uuids).order_by('pk'))
+    if not seats or len(seats) != len(set(seat_uuids)):
+        raise CartError("Couldn't find seats.")
+    if any(seat.state != 'available' for seat in seats):
+        raise CartError("Seat not available")
+    pks_by_show = defaultdict(list)
+    for seat in seats:
+        pks_by_show[seat.show_id].append(seat.pk)
+
+    cart, _ = Cart.objects.get_or_create(user=user)
+    if expires_at(cart) <= timezone.now() and cart.items.exists():
+        seats_released(expire_cart(cart))
+    held = []
+    try:
+        with transaction.atomic():
+            cart = Cart.objects.select_for_update().get(pk=cart.pk)
+            count = CartItem.objects.filter(cart=cart).count()
+            if count + len(seats) > MAX_SEATS:
+                raise CartError(f"A cart holds at most {MAX_SEATS} seats")
+            for show_id, seat_pks in pks_by_show.items():
+                if not seatlocks.hold(show_id, seat_pks, cart.reference):
+                    raise CartError("Seat not available")
+                held.append(show_id)
+            CartItem.objects.bulk_create([CartItem(cart=cart, show_id=seat.show_id, seat=seat) for seat in seats])
+            if not count:
+                # The hold runs from the first seat, adding seats doesn't extend it
+                cart.save(update_fields=['updated_at'])
+            record_seats('seats.held', cart, seats)
+    except Exception:
+        # The rows rolled back, drop the store's holds too
+        for show_id in held:
+            seatlocks.forget(show_id, pks_by_show[show_id], cart.reference)
+        raise
+    show_ids = set(pks_by_show)
+    for show_id in show_ids:
+        bump_seat_map_version(show_id)
+    pricing.refresh_price_tables(show_ids)
+    return cart
+
+
+def release_items(cart, items, reason):
+    """
+    Make the seats of some cart items available, in the caller's transaction
+    with the cart locked. Returns the ids of their shows.
+    """
+    held = dict(items.values_list('seat_id', 'show_id'))
+    seats = list(Seat.objects.filter(pk__in=held))
+    pks_by_show = defaultdict(list)
+    for seat_pk, show_id in held.items():
+        pks_by_show[show_id].append(seat_pk)
+    for show_id, seat_pks in pks_by_show.items():
+        seatlocks.release(show_id, seat_pks, cart.reference)
+    items.delete()
+    record_seats('seats.released', cart, seats, reason=reason)
+    return set(pks_by_show)
+
+
+def seats_released(show_ids):
+    # After the commit: new seat maps and prices, then the waitlists
+    for show_id in show_ids:
+        bump_seat_map_version(show_id)
+    pricing.refresh_price_tables(show_ids)
+    for show_id in show_ids:
+        waitlist.seats_freed(show_id)
+
+
+def release_seats(user, seat_uuids=None):
+    """
+    Release some (or all) seats held in the user's cart.
+    """
+    with transaction.atomic():
+        cart = Cart.objects.select_for_update().filter(user=user).first()
+        if cart is None:
+            raise CartError("Cart is empty")
+        items = CartItem.objects.filter(cart=cart)
+        if seat_uuids is not None:
+            items = items.filter(seat_id__in=seat_uuids)
+        released = items.count()
+        show_ids = release_items(cart, items, 'released')
+    seats_released(show_ids)
+    return released
+
+
+def expire_cart(cart, now=None):
+    """
+    Release every seat of a cart held longer than DRAFT_HOLD_SECONDS.
+    Returns the ids of the shows with freed seats, call seats_released()
+    with them.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        cart = Cart.objects.select_for_update().filter(pk=cart.pk).first()
+        if cart is None or expires_at(cart) > now:
+            return set()
+        return release_items(cart, CartItem.objects.filter(cart=cart), 'expired')
+
+
+def checkout(user):
+    """
+    Confirm every seat in the cart: one booking per show, one balance debit.
+    Returns the created bookings.
+    """
+    with transaction.atomic():
+        # Locked like release_seats and expire_cart lock it, the items are the seats it holds
+        cart = Cart.objects.select_for_update().filter(user=user).first()
+        items = list(CartItem.objects.filter(cart=cart).select_related('show__movie', 'show__price_table')) if cart else []
+        if not items:
+            raise CartError("Cart is empty")
+        if expires_at(cart) <= timezone.now():
+            raise CartError("Cart hold has expired")
+
+        seats = locked_seats([item.seat_id for item in items])
+        if len(seats) != len(items) or any(seat.state != 'locked' for seat in seats):
+            raise CartError("Some seats are no longer held")
+
+        shows = {item.show_id: item.show for item in items}
+        seats_by_show = defaultdict(list)
+        for seat in seats:
+            seats_by_show[seat.show_id].append(seat)
+        totals = {
+            show_id: pricing.total_price(shows[show_id], show_seats)
+            for show_id, show_seats in seats_by_show.items()
+        }
+
+        # Single conditional debit, no read-modify-write on the balance
+        total_price = sum(totals.values())
+        if not User.objects.filter(pk=user.pk, balance__gte=total_price).update(balance=F('balance') - total_price):
+            raise CartError("Insufficient Balance")
+        user.refresh_from_db(fields=['balance'])
+
+        bookings = Booking.objects.bulk_create([
+            Booking(show_id=show_id, user=user, total_amount=totals[show_id]) for show_id in seats_by_show
+        ])
+        if any(booking.pk is None for booking in bookings):
+            # Backends that can't return ids from bulk inserts
+            references = [booking.reference for booking in bookings]
+            bookings = list(Booking.objects.filter(reference__in=references))
+        Booking.seats.through.objects.bulk_create([
+            Booking.seats.through(booking_id=booking.pk, seat_id=seat.pk)
+            for booking in bookings for seat in seats_by_show[booking.show_id]
+        ])
+        Seat.objects.filter(pk__in=[seat.pk for seat in seats]).update(state='booked', locked_at=None)
+        allUserBookings.objects.bulk_create([
+            allUserBookings(
+                id=booking.pk,
+                reference=booking.reference,
+                movie_title=shows[booking.show_id].movie.title,
+                show_date=shows[booking.show_id].date_time,
+                user=user,
+                total_amount=booking.total_amount,
+                seats=" ".join(seat.id for seat in seats_by_show[booking.show_id]),
+            )
+            for booking in bookings
+        ])
+        for booking in bookings:
+            rollups.booking_confirmed(booking, shows[booking.show_id], len(seats_by_show[booking.show_id]))
+        cart.delete()
+        OutboxEvent.objects.bulk_create([
+            outbox.event('booking.confirmed', booking.show_id, booking=booking.reference, cart=cart.reference, user=user.pk,
+                         seats=[seat.id for seat in seats_by_show[booking.show_id]], amount=booking.total_amount)
+            for booking in bookings
+        ])
+    # Held seats already count towards occupancy, the price tables stay valid
+    for show_id, show_seats in seats_by_show.items():
+        seatlocks.forget(show_id, [seat.pk for seat in show_seats], cart.reference)
+        bump_seat_map_version(show_id)
+    return bookings
@@ -0,0 +1,54 @@
+"""
+Row generators for the admin exports (see movie_booking/streaming.py).
+
+Every generator reads values_list() querysets with .iterator(), so rows are
+fetched from a server-side cursor a chunk at a time and never materialized
+as model instances.
+"""
+from movie_booking.streaming import CHUNK_SIZE
+from movies.models import Seat
+from .models import Booking, allUserBookings
+
+
+BOOKING_COLUMNS = ('reference', 'show_id', 'movie', 'show_time', 'user', 'total_amount', 'admitted_at', 'seats')
+SEAT_COLUMNS = ('show_id', 'seat', 'row', 'col', 'type', 'state', 'price')
+HISTORY_COLUMNS = ('reference', 'user', 'movie', 'show_time', 'seats', 'total_amount')
+
+
+def booking_rows(show_id=None):
+    """
+    Bookings with their seat ids. Bookings and seat links are both read in
+    booking id order and merged, instead of one seat query per booking.
+    """
+    bookings = Booking.objects.order_by('pk')
+    links = Booking.seats.through.objects.order_by('booking_id')
+    if show_id is not None:
+        bookings = bookings.filter(show_id=show_id)
+        links = links.filter(booking__show_id=show_id)
+
+    links = links.values_list('booking_id', 'seat__id').iterator(chunk_size=CHUNK_SIZE)
+    link = next(links, None)
+    rows = bookings.values_list('pk', 'reference', 'show_id', 'show__movie__title', 'show__date_time',
+                                'user__username', 'total_amount', 'admitted_at')
+    for pk, *fields in rows.iterator(chunk_size=CHUNK_SIZE):
+        seat_ids = []
+        while link is not None and link[0] <= pk:
+            if link[0] == pk:
+                seat_ids.append(link[1])
+            link = next(links, None)
+        yield (*fields, " ".join(seat_ids))
+
+
+def seat_rows(show_id=None):
+    seats = Seat.objects.order_by('show_id', 'row', 'col')
+    if show_id is not None:
+        seats = seats.filter(show_id=show_id)
+    yield from seats.values_list('show_id', 'id', 'row', 'col', 'type', 'state', 'price').iterator(chunk_size=CHUNK_SIZE)
+
+
+def history_rows(user_id=None):
+    history = allUserBookings.objects.order_by('pk')
+    if user_id is not None:
+        history = history.filter(user_id=user_id)
+    yield from history.values_list('reference', 'user__username', 'movie_title', 'show_date', 'seats',
+                                   'total_amount').iterator(chunk_size=CHUNK_SIZE)
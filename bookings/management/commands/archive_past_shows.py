@@ -0,0 +1,87 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.models import Booking, draftBooking, ArchivedBooking
+from movies.models import Show, Seat, ArchivedSeatMap
+from movies.signals import bump_seat_map_version
+
+
+class Command(BaseCommand):
+    help = "Move seats and bookings of past shows into the archive tables, one batch of shows per transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=1, help="Archive shows that started more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=50, help="Shows archived per transaction.")
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches (default: until done).")
+        parser.add_argument('--dry-run', action='store_true', help="Only count what would be archived.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        # Shows are archived once, the seat map row marks them as done
+        pending = Show.objects.filter(date_time__lt=cutoff, archived_seats__isnull=True).order_by('id')
+
+        if options['dry_run']:
+            show_ids = pending.values('id')
+            self.stdout.write(
+                f"{pending.count()} shows, {Seat.objects.filter(show_id__in=show_ids).count()} seats, "
+                f"{Booking.objects.filter(show_id__in=show_ids).count()} bookings to archive")
+            return
+
+        totals = defaultdict(int)
+        batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            show_ids = list(pending.values_list('id', flat=True)[:options['batch_size']])
+            if not show_ids:
+                break
+            counts = self.archive(show_ids)
+            for key, value in counts.items():
+                totals[key] += value
+            batches += 1
+            self.stdout.write(f"Batch {batches}: {counts['shows']} shows, {counts['seats']} seats, {counts['bookings']} bookings")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {totals['shows']} shows, {totals['seats']} seats and {totals['bookings']} bookings in {batches} batches"))
+
+    @transaction.atomic
+    def archive(self, show_ids):
+        seat_maps = {show_id: [] for show_id in show_ids}
+        seats = Seat.objects.filter(show_id__in=show_ids).order_by('show_id', 'row', 'col')
+        for show_id, id, type, state, price in seats.values_list('show_id', 'id', 'type', 'state', 'price').iterator(chunk_size=5000):
+            seat_maps[show_id].append([id, type, state, price])
+        ArchivedSeatMap.objects.bulk_create([
+            ArchivedSeatMap(show_id=show_id, seats=seat_list) for show_id, seat_list in seat_maps.items()
+        ])
+
+        Through = Booking.seats.through
+        booking_seats = defaultdict(list)
+        for booking_id, seat_id in Through.objects.filter(booking__show_id__in=show_ids).values_list('booking_id', 'seat__id'):
+            booking_seats[booking_id].append(seat_id)
+        bookings = Booking.objects.filter(show_id__in=show_ids)
+        archived = ArchivedBooking.objects.bulk_create([
+            ArchivedBooking(
+                id=booking_id,
+                reference=reference,
+                show_id=show_id,
+                user_id=user_id,
+                seats=' '.join(booking_seats[booking_id]),
+                total_amount=total_amount,
+                admitted_at=admitted_at,
+            )
+            for booking_id, reference, show_id, user_id, total_amount, admitted_at
+            in bookings.values_list('id', 'reference', 'show_id', 'user_id', 'total_amount', 'admitted_at')
+        ], batch_size=1000)
+
+        # Join rows first so the seat and booking deletes don't have to collect them
+        Through.objects.filter(booking__show_id__in=show_ids).delete()
+        draftBooking.seats.through.objects.filter(draftbooking__show_id__in=show_ids).delete()
+        draftBooking.objects.filter(show_id__in=show_ids).delete()
+        bookings.delete()
+        _, deleted = Seat.objects.filter(show_id__in=show_ids).delete()
+
+        for show_id in show_ids:
+            bump_seat_map_version(show_id)
+        return {'shows': len(show_ids), 'seats': deleted.get(Seat._meta.label, 0), 'bookings': len(archived)}
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from bookings import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the hourly and daily booking rollups from the booking history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Shows read per chunk.")
+
+    def handle(self, *args, **options):
+        def progress(last_show_id):
+            self.stdout.write(f"Read bookings up to show {last_show_id}")
+
+        rows = rollups.backfill(options['chunk_size'], progress)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} rollup rows"))
@@ -0,0 +1,171 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+
+from bookings.models import draftBooking
+from movie_booking.bench import summarize, write_results
+from movies.models import Show, Seat
+from movies.signals import bump_seat_map_version
+from users.models import User
+from .seed_benchmark import BENCH_PREFIX
+
+
+STEPS = ['list_movies', 'movie_shows', 'show_seats', 'create_booking', 'confirm_booking', 'cancel_booking']
+
+
+class FlowRecorder:
+    """
+    Collects per-step latencies and status codes from all worker threads.
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.flow_latencies = []
+        self.failed_flows = 0
+        self.lock = threading.Lock()
+
+    def record(self, step, elapsed, status_code):
+        with self.lock:
+            self.latencies[step].append(elapsed)
+            self.statuses[step][status_code] += 1
+
+    def finish_flow(self, elapsed, ok):
+        with self.lock:
+            self.flow_latencies.append(elapsed)
+            if not ok:
+                self.failed_flows += 1
+
+
+class Command(BaseCommand):
+    help = "Drive the list -> seats -> create_booking -> confirm_booking -> cancel_booking flow concurrently."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--flows', type=int, default=200, help="Total number of booking flows to run.")
+        parser.add_argument('--warmup', type=int, default=5, help="Flows per worker run before measuring.")
+        parser.add_argument('--seats', type=int, default=2, help="Seats per booking.")
+        parser.add_argument('--hot-shows', type=int, default=50, help="Number of shows the flows pick from.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help="Result file, defaults to BENCH_RESULTS_DIR/booking_flow-<commit>-<time>.json")
+
+    def handle(self, *args, **options):
+        # Query logging under DEBUG adds per-query overhead that production doesn't have.
+        settings.DEBUG = False
+        # Measure the endpoints, not the rate limits
+        settings.RATE_LIMITS = {}
+
+        users = list(User.objects.filter(username__startswith=f"{BENCH_PREFIX}_user_").order_by('username')[:options['concurrency']])
+        if len(users) < options['concurrency']:
+            raise CommandError("Not enough benchmark users, run seed_benchmark with a larger --users first.")
+        rng = random.Random(options['seed'])
+        show_ids = list(Show.objects.filter(movie__imdb_id__startswith=BENCH_PREFIX).values_list('id', flat=True))
+        if not show_ids:
+            raise CommandError("No benchmark shows found, run seed_benchmark first.")
+        show_ids = rng.sample(show_ids, min(options['hot_shows'], len(show_ids)))
+        connection.close()
+
+        per_worker = max(1, options['flows'] // options['concurrency'])
+        recorder = FlowRecorder()
+
+        def worker(index):
+            client = APIClient()
+            client.force_authenticate(users[index])
+            worker_rng = random.Random(options['seed'] + index)
+            try:
+                for iteration in range(options['warmup'] + per_worker):
+                    measured = recorder if iteration >= options['warmup'] else None
+                    if not self.run_flow(client, worker_rng, show_ids, options['seats'], measured):
+                        self.reset_user(users[index])
+            finally:
+                connection.close()
+
+        self.stdout.write(f"Running {per_worker * options['concurrency']} flows on {options['concurrency']} workers ({connection.vendor})")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(worker, range(options['concurrency'])))
+        elapsed = time.perf_counter() - started
+
+        requests_made = sum(len(samples) for samples in recorder.latencies.values())
+        results = {
+            "parameters": {key: options[key] for key in ('concurrency', 'flows', 'warmup', 'seats', 'hot_shows', 'seed')},
+            "elapsed_s": round(elapsed, 3),
+            "flows_per_s": round(len(recorder.flow_latencies) / elapsed, 2),
+            "requests_per_s": round(requests_made / elapsed, 2),
+            "failed_flows": recorder.failed_flows,
+            "flow": summarize(recorder.flow_latencies),
+            "steps": {
+                step: dict(summarize(recorder.latencies[step]), statuses=dict(recorder.statuses[step]))
+                for step in STEPS
+            },
+        }
+        path = write_results('booking_flow', results, options['output'])
+
+        for step in STEPS:
+            summary = results['steps'][step]
+            if summary['count']:
+                self.stdout.write(f"{step:16} p50={summary['p50_ms']:>9}ms p95={summary['p95_ms']:>9}ms p99={summary['p99_ms']:>9}ms {summary['statuses']}")
+        self.stdout.write(f"{results['flows_per_s']} flows/s, {results['requests_per_s']} requests/s, {recorder.failed_flows} failed flows")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    def reset_user(self, user):
+        """
+        Release a draft left behind by a failed flow, otherwise every later
+        create_booking of this worker fails with "You already have a Pending Booking".
+        """
+        for draft in draftBooking.objects.filter(user=user):
+            Seat.objects.filter(draftbooking=draft, state='locked').update(state='available', locked_at=None)
+            bump_seat_map_version(draft.show_id)
+            draft.delete()
+
+    def run_flow(self, client, rng, show_ids, seat_count, recorder):
+        """
+        One user journey. Returns early (and counts the flow as failed) when a step doesn't succeed.
+        """
+        flow_started = time.perf_counter()
+
+        def call(step, method, url, data=None):
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data, format='json')
+            if recorder is not None:
+                recorder.record(step, time.perf_counter() - started, response.status_code)
+            return response
+
+        def finish(ok):
+            if recorder is not None:
+                recorder.finish_flow(time.perf_counter() - flow_started, ok)
+            return ok
+
+        show = Show.objects.select_related('movie').only('id', 'movie__imdb_id').get(id=rng.choice(show_ids))
+        if call('list_movies', 'get', '/movie/list_movies/').status_code != 200:
+            return finish(False)
+        if call('movie_shows', 'get', f'/movie/{show.movie.imdb_id}/shows/').status_code != 200:
+            return finish(False)
+        response = call('show_seats', 'get', f'/show/{show.id}/seats/')
+        if response.status_code != 200:
+            return finish(False)
+
+        available = [seat['uuid'] for seat in response.json()['message'] if seat['state'] == 'available']
+        if len(available) < seat_count:
+            return finish(False)
+        response = call('create_booking', 'post', '/bookings/create_booking/', {
+            "show_id": show.id, "seat_uuids": rng.sample(available, seat_count),
+        })
+        if response.status_code != 201:
+            return finish(False)
+
+        draft_id = response.json()['message']['id']
+        response = call('confirm_booking', 'post', f'/bookings/{draft_id}/confirm_booking/')
+        if response.status_code != 201:
+            return finish(False)
+
+        booking_id = response.json()['message']['id']
+        response = call('cancel_booking', 'post', f'/bookings/{booking_id}/cancel_booking/')
+        return finish(response.status_code == 200)
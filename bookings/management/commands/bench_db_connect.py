@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+
+from movie_booking.bench import summarize, time_call, write_results
+
+
+# Connection lifecycle settings compared on the booking flow
+MODES = {
+    'per_request': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'pool': False},
+    'persistent': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True, 'pool': False},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'pool': True},
+}
+
+
+class ConnectionCounter:
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, sender, connection, **kwargs):
+        with self.lock:
+            self.count += 1
+
+
+def end_of_request(**kwargs):
+    # The test client disconnects Django's own close_old_connections receivers,
+    # reinstate the lifecycle a real server applies around every request.
+    close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Run the booking flow benchmark with per-request connections, persistent connections and the pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--flows', type=int, default=200)
+        parser.add_argument('--connects', type=int, default=50, help="Bare connect/close cycles timed per run.")
+        parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=sorted(MODES))
+        parser.add_argument('--output')
+
+    def handle(self, *args, **options):
+        settings.DEBUG = False
+        pool_options = connections.settings['default'].get('OPTIONS', {}).get('pool')
+        results = {"vendor": connection.vendor, "modes": {}}
+
+        for mode in options['modes']:
+            if MODES[mode]['pool'] and not (connection.vendor == 'postgresql' and pool_options):
+                self.stdout.write(f"Skipping {mode}: run with DB_POOL=1 on PostgreSQL to include it")
+                continue
+            with self.lifecycle(mode, pool_options):
+                results["modes"][mode] = self.run_mode(options)
+
+        results['parameters'] = {key: options[key] for key in ('concurrency', 'flows', 'connects')}
+        path = write_results('db_connect', results, options['output'])
+        for mode, measured in results["modes"].items():
+            self.stdout.write(
+                f"{mode:12} {measured['flows_per_s']:>8} flows/s flow p50={measured['flow']['p50_ms']}ms "
+                f"connections opened={measured['connections_opened']} connect p50={measured['connect']['p50_ms']}ms")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    @contextmanager
+    def lifecycle(self, mode, pool_options):
+        """
+        Apply a mode to every alias. The per-thread connection objects share
+        these settings dicts, connections opened afterwards follow the mode.
+        """
+        connections.close_all()
+        saved = {}
+        for alias in connections:
+            settings_dict = connections.settings[alias]
+            saved[alias] = {key: settings_dict.get(key) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+            settings_dict['CONN_MAX_AGE'] = MODES[mode]['CONN_MAX_AGE']
+            settings_dict['CONN_HEALTH_CHECKS'] = MODES[mode]['CONN_HEALTH_CHECKS']
+            if pool_options and not MODES[mode]['pool']:
+                settings_dict['OPTIONS'].pop('pool', None)
+        self.stdout.write(f"Mode {mode}")
+        try:
+            yield
+        finally:
+            connections.close_all()
+            for alias, values in saved.items():
+                connections.settings[alias].update(values)
+                if pool_options:
+                    connections.settings[alias]['OPTIONS']['pool'] = pool_options
+
+    def run_mode(self, options):
+        counter = ConnectionCounter()
+        connection_created.connect(counter, weak=False)
+        request_started.connect(end_of_request)
+        request_finished.connect(end_of_request)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                output = os.path.join(directory, 'flow.json')
+                call_command('bench_booking_flow', concurrency=options['concurrency'], flows=options['flows'],
+                             output=output, stdout=StringIO())
+                with open(output) as flow_file:
+                    flow = json.load(flow_file)["results"]
+        finally:
+            connection_created.disconnect(counter)
+            request_started.disconnect(end_of_request)
+            request_finished.disconnect(end_of_request)
+
+        def connect():
+            connection.ensure_connection()
+            connection.close()
+
+        return {
+            "flows_per_s": flow["flows_per_s"],
+            "requests_per_s": flow["requests_per_s"],
+            "failed_flows": flow["failed_flows"],
+            "flow": flow["flow"],
+            "connections_opened": counter.count,
+            "connect": summarize(time_call(connect, options['connects'])),
+        }
@@ -0,0 +1,127 @@
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from bookings.models import Booking
+from movie_booking.bench import summarize, time_call, write_results
+from movies.models import Seat, Show
+from users.models import User
+from .seed_benchmark import BENCH_PREFIX
+
+
+class Rollback(Exception):
+    pass
+
+
+def key_tables():
+    through = Booking.seats.through._meta.db_table
+    return [Seat._meta.db_table, Booking._meta.db_table, through]
+
+
+def index_sizes(tables):
+    """
+    Size in bytes of every index on the given tables, None where the backend can't tell.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT relname, indexrelname, pg_relation_size(indexrelid) FROM pg_stat_user_indexes WHERE relname = ANY(%s)",
+                [tables])
+            return {f"{table}.{index}": size for table, index, size in cursor.fetchall()}
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    "SELECT m.tbl_name, m.name, SUM(s.pgsize) FROM sqlite_master m JOIN dbstat s ON s.name = m.name "
+                    f"WHERE m.type = 'index' AND m.tbl_name IN ({', '.join(['%s'] * len(tables))}) GROUP BY m.name",
+                    tables)
+                return {f"{table}.{index}": size for table, index, size in cursor.fetchall()}
+            except Exception:
+                # SQLite built without the dbstat virtual table
+                return None
+    return None
+
+
+class Command(BaseCommand):
+    help = "Measure index sizes and seat join latency of the booking/seat keys (run on two commits to compare)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=5000, help="Temporary bookings created for the measurement.")
+        parser.add_argument('--seats-per-booking', type=int, default=4)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output')
+
+    def handle(self, *args, **options):
+        settings.DEBUG = False
+        rng = random.Random(options['seed'])
+        user = User.objects.filter(username__startswith=f"{BENCH_PREFIX}_user_").first()
+        show_ids = list(Show.objects.filter(movie__imdb_id__startswith=BENCH_PREFIX).values_list('id', flat=True))
+        if user is None or not show_ids:
+            raise CommandError("Run seed_benchmark first.")
+
+        results = {}
+        try:
+            # Everything created here is rolled back, the dataset stays untouched.
+            with transaction.atomic():
+                booking_ids = self.create_bookings(rng, user, show_ids, options)
+                results = self.measure(rng, booking_ids, show_ids, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        results['parameters'] = {key: options[key] for key in ('bookings', 'seats_per_booking', 'repeat', 'seed')}
+        path = write_results('keys', results, options['output'])
+        for name, summary in results['joins'].items():
+            self.stdout.write(f"{name:24} p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms")
+        if results['index_bytes'] is not None:
+            self.stdout.write(f"index bytes: {sum(results['index_bytes'].values())}")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    def create_bookings(self, rng, user, show_ids, options):
+        Through = Booking.seats.through
+        created = []
+        shows = rng.sample(show_ids, min(len(show_ids), max(1, options['bookings'] // 20)))
+        seats_by_show = {
+            show_id: list(Seat.objects.filter(show_id=show_id).values_list('pk', flat=True))
+            for show_id in shows
+        }
+        bookings = Booking.objects.bulk_create([
+            Booking(show_id=rng.choice(shows), user=user, total_amount=10)
+            for _ in range(options['bookings'])
+        ], batch_size=1000)
+        if any(booking.pk is None for booking in bookings):
+            bookings = list(Booking.objects.filter(user=user).order_by('-pk')[:options['bookings']])
+        rows = []
+        for booking in bookings:
+            for seat_pk in rng.sample(seats_by_show[booking.show_id], options['seats_per_booking']):
+                rows.append(Through(booking_id=booking.pk, seat_id=seat_pk))
+            created.append(booking.pk)
+        Through.objects.bulk_create(rows, batch_size=5000)
+        return created
+
+    def measure(self, rng, booking_ids, show_ids, repeat):
+        seat_pks = list(Seat.objects.filter(show_id__in=show_ids[:50]).values_list('pk', flat=True)[:5000])
+
+        def seats_of_booking():
+            list(Seat.objects.filter(booking__pk=rng.choice(booking_ids)).values_list('id', 'state'))
+
+        def bookings_of_show():
+            list(Booking.objects.filter(seats__show_id=rng.choice(show_ids)).values_list('pk', flat=True))
+
+        def seat_lookup():
+            list(Seat.objects.filter(pk__in=rng.sample(seat_pks, 4)).values_list('id', 'state'))
+
+        return {
+            "key_types": {
+                "seat": Seat._meta.pk.get_internal_type(),
+                "booking": Booking._meta.pk.get_internal_type(),
+            },
+            "index_bytes": index_sizes(key_tables()),
+            "joins": {
+                "seats_of_booking": summarize(time_call(seats_of_booking, repeat)),
+                "bookings_of_show": summarize(time_call(bookings_of_show, repeat)),
+                "seat_lookup_by_key": summarize(time_call(seat_lookup, repeat)),
+            },
+        }
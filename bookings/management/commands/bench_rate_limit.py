@@ -0,0 +1,68 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from rest_framework.throttling import SimpleRateThrottle
+
+from movie_booking.bench import summarize, write_results
+from movie_booking.ratelimit import SlidingWindowLimiter, parse_rate
+
+
+def drf_throttle(rate, key):
+    """
+    DRF's timestamp-list throttle on the same cache, for a fixed key.
+    """
+    throttle = type('BenchThrottle', (SimpleRateThrottle,), {
+        'rate': rate,
+        'cache': cache,
+        'get_cache_key': lambda self, request, view: key,
+    })()
+    return lambda: throttle.allow_request(None, None)
+
+
+class Command(BaseCommand):
+    help = "Measure the per-check overhead of the sliding-window limiter against DRF's throttle."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rates', default='30/min,600/min,6000/min')
+        parser.add_argument('--keys', type=int, default=100, help="Distinct clients checked in turn.")
+        parser.add_argument('--checks', type=int, default=20000)
+        parser.add_argument('--output')
+
+    def handle(self, *args, **options):
+        results = {"cache": cache.__class__.__name__, "rates": {}}
+        for rate in options['rates'].split(','):
+            limit, period = parse_rate(rate)
+            limiter = SlidingWindowLimiter(limit, period)
+            checks = {
+                'sliding_window': [
+                    (lambda key=f"bench:{rate}:{index}": limiter.hit(key)[0]) for index in range(options['keys'])],
+                'drf': [drf_throttle(rate, f"bench-drf:{rate}:{index}") for index in range(options['keys'])],
+            }
+            results['rates'][rate] = {name: self.measure(calls, limit, options['checks']) for name, calls in checks.items()}
+
+        results['parameters'] = {key: options[key] for key in ('rates', 'keys', 'checks')}
+        path = write_results('rate_limit', results, options['output'])
+        for rate, measured in results['rates'].items():
+            for name, summary in measured.items():
+                self.stdout.write(
+                    f"{rate:10} {name:15} {summary['checks_per_s']:>9} checks/s "
+                    f"p50={summary['latency']['p50_ms']}ms p99={summary['latency']['p99_ms']}ms")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    def measure(self, calls, limit, checks):
+        cache.clear()
+        # Fill every client up to its limit: the steady state of a busy client, where DRF's list is longest
+        for call in calls:
+            for _ in range(limit):
+                call()
+
+        latencies = []
+        started = time.perf_counter()
+        for index in range(checks):
+            call = calls[index % len(calls)]
+            check_started = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - check_started)
+        elapsed = time.perf_counter() - started
+        return {"checks_per_s": round(checks / elapsed), "latency": summarize(latencies)}
@@ -0,0 +1,82 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from bookings import seatlocks
+from bookings.models import generate_id
+from movie_booking.bench import summarize, write_results
+from movies.models import Show, Seat
+from .seed_benchmark import BENCH_PREFIX
+
+
+class Command(BaseCommand):
+    help = "Hammer the seats of one hot show with holds and releases through each seat-lock store."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', default='db,memory,cache')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--holds', type=int, default=5000, help="Hold attempts per store.")
+        parser.add_argument('--seats', type=int, default=2, help="Seats per hold.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output')
+
+    def handle(self, *args, **options):
+        show = Show.objects.filter(movie__imdb_id__startswith=BENCH_PREFIX).first()
+        if show is None:
+            raise CommandError("No benchmark shows found, run seed_benchmark first.")
+        seat_pks = list(Seat.objects.filter(show=show, state='available').values_list('pk', flat=True))
+        if len(seat_pks) < options['seats']:
+            raise CommandError("Not enough available seats on the benchmark show.")
+
+        results = {"show_id": show.id, "seats": len(seat_pks), "stores": {}}
+        for name in options['stores'].split(','):
+            if name not in seatlocks.STORES:
+                raise CommandError(f"Unknown store {name}")
+            results['stores'][name] = self.measure(seatlocks.STORES[name](), show.id, seat_pks, options)
+            # Leave the show as it was for the next store
+            Seat.objects.filter(pk__in=seat_pks).update(state='available', locked_at=None)
+
+        results['parameters'] = {key: options[key] for key in ('stores', 'concurrency', 'holds', 'seats', 'seed')}
+        path = write_results('seat_locks', results, options['output'])
+        for name, summary in results['stores'].items():
+            self.stdout.write(
+                f"{name:7} {summary['holds_per_s']:>8} holds/s conflicts={summary['conflicts']} "
+                f"p50={summary['latency']['p50_ms']}ms p99={summary['latency']['p99_ms']}ms")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    def measure(self, store, show_id, seat_pks, options):
+        latencies = []
+        conflicts = [0]
+        lock = threading.Lock()
+        per_worker = options['holds'] // options['concurrency']
+
+        def worker(index):
+            rng = random.Random(options['seed'] + index)
+            owner = generate_id()
+            try:
+                for _ in range(per_worker):
+                    seats = rng.sample(seat_pks, options['seats'])
+                    started = time.perf_counter()
+                    acquired = store.acquire(show_id, seats, owner, 60)
+                    elapsed = time.perf_counter() - started
+                    if acquired:
+                        store.release(show_id, seats, owner)
+                    with lock:
+                        latencies.append(elapsed)
+                        conflicts[0] += not acquired
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            list(pool.map(worker, range(options['concurrency'])))
+        elapsed = time.perf_counter() - started
+        return {
+            "holds_per_s": round(len(latencies) / elapsed),
+            "conflicts": conflicts[0],
+            "latency": summarize(latencies),
+        }
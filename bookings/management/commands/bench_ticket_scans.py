@@ -0,0 +1,96 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings import tickets
+from bookings.models import Booking
+from movie_booking.bench import summarize, write_results
+from movies.models import Show
+from users.models import User
+from .seed_benchmark import BENCH_PREFIX
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure door scan throughput (single scans and offline batches) on a full house."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=2000, help="Bookings in the simulated full house.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--output')
+
+    def handle(self, *args, **options):
+        settings.DEBUG = False
+        # Measure the endpoints, not the rate limits
+        settings.RATE_LIMITS = {}
+        user = User.objects.filter(username__startswith=f"{BENCH_PREFIX}_user_").first()
+        show = Show.objects.filter(movie__imdb_id__startswith=BENCH_PREFIX).first()
+        if user is None or show is None:
+            raise CommandError("Run seed_benchmark first.")
+
+        results = {}
+        try:
+            # Bookings, admissions and the staff flag are rolled back afterwards
+            with transaction.atomic():
+                user.is_staff = True
+                user.save(update_fields=['is_staff'])
+                show.date_time = timezone.now()
+                show.save(update_fields=['date_time'])
+                bookings = Booking.objects.bulk_create(
+                    [Booking(show=show, user=user, total_amount=1) for _ in range(options['tickets'])], batch_size=1000)
+                if any(booking.pk is None for booking in bookings):
+                    bookings = list(Booking.objects.filter(user=user, show=show).order_by('-pk')[:options['tickets']])
+                tokens = [tickets.ticket_token(booking, show) for booking in bookings]
+                half = len(tokens) // 2
+                results = {
+                    "single": self.single_scans(user, show, tokens[:half]),
+                    "batch": self.batch_scans(user, show, tokens[half:], options['batch_size']),
+                }
+                raise Rollback
+        except Rollback:
+            pass
+
+        results['parameters'] = {key: options[key] for key in ('tickets', 'batch_size')}
+        path = write_results('ticket_scans', results, options['output'])
+        for mode in ('single', 'batch'):
+            self.stdout.write(f"{mode:7} {results[mode]['scans_per_minute']:>10} scans/min p50={results[mode]['latency']['p50_ms']}ms")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    def client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def single_scans(self, user, show, tokens):
+        client = self.client(user)
+        latencies = []
+        started = time.perf_counter()
+        for token in tokens:
+            scan_started = time.perf_counter()
+            response = client.post('/tickets/scan/', {"token": token, "show_id": show.pk}, format='json')
+            latencies.append(time.perf_counter() - scan_started)
+            if response.status_code != 200:
+                raise CommandError(f"Scan failed: {response.content[:200]}")
+        elapsed = time.perf_counter() - started
+        return {"scans_per_minute": round(len(tokens) / elapsed * 60), "latency": summarize(latencies)}
+
+    def batch_scans(self, user, show, tokens, batch_size):
+        client = self.client(user)
+        latencies = []
+        started = time.perf_counter()
+        for offset in range(0, len(tokens), batch_size):
+            scans = [{"token": token} for token in tokens[offset:offset + batch_size]]
+            batch_started = time.perf_counter()
+            response = client.post('/tickets/scan_batch/', {"show_id": show.pk, "scans": scans}, format='json')
+            latencies.append(time.perf_counter() - batch_started)
+            if response.status_code != 200:
+                raise CommandError(f"Batch failed: {response.content[:200]}")
+        elapsed = time.perf_counter() - started
+        return {"scans_per_minute": round(len(tokens) / elapsed * 60), "latency": summarize(latencies)}
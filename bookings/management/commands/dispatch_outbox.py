@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver outbox events to the in-process subscribers. Run from cron or as a long-running worker with --follow."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscriber', action='append', help="Only these subscribers (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=outbox.BATCH_SIZE)
+        parser.add_argument('--follow', action='store_true', help="Keep polling for new events.")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds between polls when idle.")
+        parser.add_argument('--replay-from', type=int, help="Move the subscribers' cursors back to deliver events after this id again.")
+        parser.add_argument('--prune', action='store_true', help="Delete delivered events past OUTBOX_RETENTION_DAYS.")
+
+    def handle(self, *args, **options):
+        names = options['subscriber'] or outbox.subscribers()
+        unknown = set(names) - set(outbox.subscribers())
+        if unknown:
+            raise CommandError(f"Unknown subscribers: {', '.join(sorted(unknown))}")
+
+        if options['replay_from'] is not None:
+            if not options['subscriber']:
+                raise CommandError("--replay-from needs --subscriber.")
+            for name in names:
+                outbox.replay(name, options['replay_from'])
+                self.stdout.write(f"{name} will replay events after {options['replay_from']}")
+
+        if options['prune']:
+            self.stdout.write(f"Pruned {outbox.prune()} events")
+
+        delivered = self.drain(names, options['batch_size'])
+        while options['follow']:
+            if not delivered:
+                time.sleep(options['interval'])
+            delivered = self.drain(names, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Delivered {delivered} events"))
+
+    def drain(self, names, batch_size):
+        """
+        Deliver batches until every subscriber is caught up or failing.
+        """
+        delivered = 0
+        pending = list(names)
+        while pending:
+            for name in list(pending):
+                try:
+                    count = outbox.dispatch(name, batch_size)
+                except Exception as e:
+                    # The cursor didn't move, the batch is retried on the next run
+                    self.stderr.write(f"{name} failed: {e}")
+                    count = None
+                if not count:
+                    pending.remove(name)
+                else:
+                    delivered += count
+        return delivered
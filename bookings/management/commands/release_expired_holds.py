@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bookings import waitlist
+
+
+class Command(BaseCommand):
+    help = "Release draft bookings, carts and waitlist offers held too long and offer their seats to the waitlists. Run every minute."
+
+    def handle(self, *args, **options):
+        released = waitlist.expire_holds()
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired holds"))
@@ -0,0 +1,159 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from movies.models import Movie, Language, Genre, Show, Screen, Seat
+from movies.signals import bump_catalog_version
+from movies import layouts
+from users.models import User
+
+
+LANGUAGES = ['English', 'Hindi', 'Nepali', 'Spanish', 'French', 'Korean', 'Japanese']
+GENRES = ['Action', 'Comedy', 'Drama', 'Horror', 'Romance', 'Thriller', 'Animation', 'Sci-Fi', 'Documentary']
+BENCH_PREFIX = 'bench'
+
+
+def build_layout(rows, cols):
+    """
+    Screen layout as one string per row: S standard, V vip, P premium,
+    D disabled and _ for an aisle. Back rows are premium, the middle band VIP.
+    """
+    grid = []
+    aisles = {cols // 4, cols - cols // 4}
+    for row in range(rows):
+        if row >= rows - 2:
+            code = 'P'
+        elif rows // 3 <= row < rows // 3 + 3:
+            code = 'V'
+        else:
+            code = 'S'
+        line = []
+        for col in range(cols):
+            if col in aisles:
+                line.append('_')
+            elif row == 0 and col in (0, cols - 1):
+                line.append('D')
+            else:
+                line.append(code)
+        grid.append(''.join(line))
+    return {"rows": grid}
+
+
+def seats_for_layout(show, layout):
+    return layouts.seats_for_show(show, layouts.compile_layout(layout))
+
+
+class Command(BaseCommand):
+    help = "Seed a reproducible benchmark dataset (movies, screens, future shows with seats, users)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movies', type=int, default=300)
+        parser.add_argument('--shows', type=int, default=2000)
+        parser.add_argument('--screens', type=int, default=12)
+        parser.add_argument('--rows', type=int, default=15)
+        parser.add_argument('--cols', type=int, default=22, help="Columns including the two aisles (22 -> 300 seats with 15 rows).")
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42, help="Random seed, the same seed gives the same dataset.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--flush', action='store_true', help="Delete a previously seeded benchmark dataset first.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        if options['flush']:
+            self.flush()
+        elif Movie.objects.filter(imdb_id__startswith=BENCH_PREFIX).exists():
+            self.stdout.write(self.style.WARNING("Benchmark data already present, use --flush to reseed."))
+            return
+
+        with transaction.atomic():
+            languages = [Language.objects.get_or_create(name=name)[0] for name in LANGUAGES]
+            genres = [Genre.objects.get_or_create(name=name)[0] for name in GENRES]
+
+            Movie.objects.bulk_create([
+                Movie(
+                    imdb_id=f"{BENCH_PREFIX}{index:07d}",
+                    title=f"Benchmark Movie {index}",
+                    description=" ".join(rng.choice(GENRES).lower() for _ in range(30)),
+                    duration=rng.randint(80, 180),
+                    poster=f"https://img.example.com/p/{index}.jpg",
+                    backdrop=f"https://img.example.com/b/{index}.jpg",
+                    release_datetime=f"{rng.randint(1990, 2025)}-01-01",
+                    language=rng.choice(languages),
+                    imdb_page=f"https://www.imdb.com/title/{BENCH_PREFIX}{index:07d}/",
+                )
+                for index in range(options['movies'])
+            ], batch_size=batch_size)
+            movies = list(Movie.objects.filter(imdb_id__startswith=BENCH_PREFIX).order_by('imdb_id'))
+            Through = Movie.genre.through
+            Through.objects.bulk_create([
+                Through(movie_id=movie.id, genre_id=genre.id)
+                for movie in movies
+                for genre in rng.sample(genres, rng.randint(1, 3))
+            ], batch_size=batch_size)
+            self.stdout.write(f"Created {len(movies)} movies")
+
+            first_screen = (Screen.objects.order_by('-number').values_list('number', flat=True).first() or 0) + 1
+            layout = build_layout(options['rows'], options['cols'])
+            compiled = layouts.compile_layout(layout)
+            screens = Screen.objects.bulk_create([
+                Screen(number=first_screen + index, layout=layout, layout_version=compiled['version'])
+                for index in range(options['screens'])
+            ])
+
+            # Spread shows over the next 30 days, starting tomorrow so every booking stays cancellable.
+            start = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+            Show.objects.bulk_create([
+                Show(
+                    date_time=start + timedelta(hours=rng.randint(0, 30 * 24)),
+                    movie=movie,
+                    language=movie.language,
+                    screen=rng.choice(screens),
+                    base_price=rng.choice([8, 10, 12, 15]),
+                )
+                for movie in (rng.choice(movies) for _ in range(options['shows']))
+            ], batch_size=batch_size)
+            shows = Show.objects.filter(movie__imdb_id__startswith=BENCH_PREFIX).only('id')
+
+            pending = []
+            created = 0
+            for show in shows.iterator(chunk_size=batch_size):
+                pending.extend(layouts.seats_for_show(show, compiled))
+                if len(pending) >= batch_size:
+                    Seat.objects.bulk_create(pending, batch_size=batch_size)
+                    created += len(pending)
+                    pending = []
+            Seat.objects.bulk_create(pending, batch_size=batch_size)
+            created += len(pending)
+            self.stdout.write(f"Created {len(screens)} screens, {options['shows']} shows, {created} seats")
+
+            users = []
+            for index in range(options['users']):
+                user = User(
+                    username=f"{BENCH_PREFIX}_user_{index}",
+                    email=f"{BENCH_PREFIX}_user_{index}@example.com",
+                    fullname=f"Benchmark User {index}",
+                    balance=10 ** 9,
+                )
+                # Hashing a real password per user would dominate the seeding time.
+                user.set_unusable_password()
+                users.append(user)
+            User.objects.bulk_create(users, batch_size=batch_size)
+            self.stdout.write(f"Created {len(users)} users")
+
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS("Benchmark dataset ready."))
+
+    def flush(self):
+        with transaction.atomic():
+            shows = Show.objects.filter(movie__imdb_id__startswith=BENCH_PREFIX)
+            screen_numbers = set(shows.values_list('screen_id', flat=True))
+            shows.delete()
+            Movie.objects.filter(imdb_id__startswith=BENCH_PREFIX).delete()
+            User.objects.filter(username__startswith=f"{BENCH_PREFIX}_user_").delete()
+            Screen.objects.filter(number__in=screen_numbers, show__isnull=True).delete()
+        self.stdout.write("Removed previous benchmark data.")
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_initial'),
+        ('movies', '0002_show_screen_seat_locked_at'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='alluserbookings',
+            name='seat',
+        ),
+        migrations.RemoveField(
+            model_name='draftbooking',
+            name='seat',
+        ),
+        migrations.AddField(
+            model_name='alluserbookings',
+            name='seats',
+            field=models.TextField(default=''),
+        ),
+        migrations.AddField(
+            model_name='draftbooking',
+            name='seats',
+            field=models.ManyToManyField(to='movies.seat'),
+        ),
+    ]
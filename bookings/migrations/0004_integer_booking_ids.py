@@ -0,0 +1,114 @@
+import bookings.models
+from django.db import migrations, models
+from django.db.models import Case, F, Value, When
+
+
+BATCH_SIZE = 500
+
+
+def sequential_numbers(start=1):
+    counter = iter(range(start, 2 ** 63))
+
+    def numbers(old_ids):
+        return {old_id: str(next(counter)) for old_id in old_ids}
+    return numbers
+
+
+def renumber(model, numbers, through_column=None):
+    """
+    Give every row of `model` a numeric id while the column is still text, so
+    the following AlterField can cast it to bigint. The old id is kept in
+    `reference` and rows are walked in batches over the reference index.
+    `numbers(old_ids)` returns the new id for each old id.
+    """
+    model.objects.update(reference=F('id'))
+    through = model._meta.get_field('seats').remote_field.through if through_column else None
+
+    last = None
+    while True:
+        rows = model.objects.order_by('reference')
+        if last is not None:
+            rows = rows.filter(reference__gt=last)
+        old_ids = list(rows.values_list('reference', flat=True)[:BATCH_SIZE])
+        if not old_ids:
+            return
+        last = old_ids[-1]
+        mapping = numbers(old_ids)
+
+        if through is not None:
+            through.objects.filter(**{f'{through_column}__in': old_ids}).update(**{through_column: Case(
+                *[When(**{through_column: old}, then=Value(new)) for old, new in mapping.items()],
+                output_field=models.CharField(),
+            )})
+        model.objects.filter(id__in=old_ids).update(id=Case(
+            *[When(id=old, then=Value(new)) for old, new in mapping.items()],
+            output_field=models.CharField(),
+        ))
+
+
+def renumber_bookings(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    draftBooking = apps.get_model('bookings', 'draftBooking')
+    allUserBookings = apps.get_model('bookings', 'allUserBookings')
+
+    renumber(Booking, sequential_numbers(), through_column='booking_id')
+    renumber(draftBooking, sequential_numbers(), through_column='draftbooking_id')
+
+    # History rows share their id with the booking they record, orphaned
+    # history rows are numbered after the last booking.
+    orphans = sequential_numbers(Booking.objects.count() + 1)
+
+    def history_numbers(old_ids):
+        mapping = dict(Booking.objects.filter(reference__in=old_ids).values_list('reference', 'id'))
+        missing = [old_id for old_id in old_ids if old_id not in mapping]
+        mapping.update(orphans(missing))
+        return mapping
+
+    renumber(allUserBookings, history_numbers)
+
+    if schema_editor.connection.vendor == 'postgresql':
+        # Check the deferred foreign keys now, ALTER TABLE refuses to run with pending trigger events.
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+def reset_sequences(apps, schema_editor):
+    """
+    The new identity columns start at 1 on PostgreSQL, move them past the renumbered rows.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in ('Booking', 'draftBooking', 'allUserBookings'):
+        table = apps.get_model('bookings', name)._meta.db_table
+        schema_editor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+        )
+
+
+def auto_id():
+    return models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')
+
+
+def reference_field(**kwargs):
+    return models.CharField(max_length=16, **kwargs)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_draftbooking_seats_alluserbookings_seats'),
+        ('movies', '0005_seat_native_uuid'),
+    ]
+
+    operations = [
+        migrations.AddField('booking', 'reference', reference_field(null=True, db_index=True)),
+        migrations.AddField('draftbooking', 'reference', reference_field(null=True, db_index=True)),
+        migrations.AddField('alluserbookings', 'reference', reference_field(null=True, db_index=True)),
+        migrations.RunPython(renumber_bookings, migrations.RunPython.noop),
+        migrations.AlterField('booking', 'id', auto_id()),
+        migrations.AlterField('draftbooking', 'id', auto_id()),
+        migrations.AlterField('alluserbookings', 'id', auto_id()),
+        migrations.RunPython(reset_sequences, migrations.RunPython.noop),
+        migrations.AlterField('booking', 'reference', reference_field(default=bookings.models.generate_id, editable=False, unique=True)),
+        migrations.AlterField('draftbooking', 'reference', reference_field(default=bookings.models.generate_id, editable=False, unique=True)),
+        migrations.AlterField('alluserbookings', 'reference', reference_field(default=bookings.models.generate_id, editable=False, unique=True)),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_integer_booking_ids'),
+        ('movies', '0006_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('reference', models.CharField(editable=False, max_length=16, unique=True)),
+                ('seats', models.TextField(default='')),
+                ('total_amount', models.FloatField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('show', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='movies.show')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_cart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='admitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_booking_admitted_at'),
+        ('movies', '0007_pricing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('period_start', models.DateTimeField()),
+                ('screen_number', models.IntegerField(default=0)),
+                ('bookings', models.IntegerField(default=0)),
+                ('seats', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('cancellations', models.IntegerField(default=0)),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='movies.language')),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='movies.movie')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start', 'movie', 'language', 'screen_number'), name='bookings_rollup_bucket_uniq')],
+            },
+        ),
+    ]
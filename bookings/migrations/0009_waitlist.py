@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:21
+
+import bookings.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_booking_rollup'),
+        ('movies', '0009_screen_layout_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(default=bookings.models.generate_id, editable=False, max_length=16, unique=True)),
+                ('seat_count', models.PositiveSmallIntegerField()),
+                ('seat_type', models.CharField(blank=True, choices=[('standard', 'Standard'), ('vip', 'VIP'), ('premium', 'Premium'), ('disabled', 'Disabled')], default='', max_length=10)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('offered', 'Offered'), ('fulfilled', 'Fulfilled'), ('expired', 'Expired'), ('cancelled', 'Cancelled')], default='waiting', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('offered_at', models.DateTimeField(blank=True, null=True)),
+                ('draft', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='bookings.draftbooking')),
+                ('show', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='movies.show')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['show', 'status', 'id'], name='bookings_waitlist_queue_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['waiting', 'offered'])), fields=('show', 'user'), name='bookings_waitlist_one_per_user')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+def order_existing_events(apps, schema_editor):
+    # Events written before the upgrade sort first, in id order
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    apps.get_model('bookings', 'OutboxEvent').objects.filter(txid__isnull=True).update(txid=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxcursor',
+            name='txid',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='txid',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(fields=['txid', 'id'], name='bookings_outbox_order_idx'),
+        ),
+        migrations.RunPython(order_existing_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_outbox_commit_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='admitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
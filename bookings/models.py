@@ -1,8 +1,8 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
-import uuid
 import string
 import secrets
-from movies.models import Show , Seat
+from movies.models import Show , Seat , Movie , Language
 from users.models import User
 
 # Create your models here.
@@ -12,35 +12,190 @@ def generate_id(length = 16):
 
 
 class Booking(models.Model):
-    id  = models.CharField(max_length=16 , primary_key=True ,unique=True , editable=False,  default=generate_id)
+    # Integer primary key for joins, the random reference is the public id used in URLs and tickets
+    reference = models.CharField(max_length=16 , unique=True , editable=False , default=generate_id)
     show = models.ForeignKey(Show , on_delete=models.CASCADE)
     user  = models.ForeignKey(User , on_delete=models.CASCADE)
     seats =  models.ManyToManyField(Seat)
     total_amount = models.FloatField()
+    # Set once by the door scanner, see bookings/tickets.py
+    admitted_at = models.DateTimeField(null=True , blank=True)
 
     def __str__(self):
-        return f"{self.id} - {self.show} - {self.user}"
+        return f"{self.reference} - {self.show} - {self.user}"
 
 class draftBooking(models.Model):
-    id = models.CharField(max_length=16 , primary_key=True ,unique=True , editable=False,  default=generate_id)
+    reference = models.CharField(max_length=16 , unique=True , editable=False , default=generate_id)
     created_at = models.DateTimeField(auto_now_add=True)
     show  = models.ForeignKey(Show , on_delete=models.CASCADE)
     user = models.ForeignKey(User , on_delete=models.CASCADE)
-    seat = models.ForeignKey(Seat , on_delete=models.CASCADE)
+    seats = models.ManyToManyField(Seat)
 
     def __str__(self):
-        return  f"{self.id} - {self.show} - {self.user}"
+        return  f"{self.reference} - {self.show} - {self.user}"
 
 
 class allUserBookings(models.Model):
-    id = models.CharField(max_length=16 , primary_key=True ,unique=True , editable=False,  default=generate_id)
+    # Shares id and reference with the Booking it records
+    reference = models.CharField(max_length=16 , unique=True , editable=False , default=generate_id)
     movie_title = models.CharField(max_length=100)
     show_date = models.DateTimeField()
     user = models.ForeignKey(User , on_delete=models.CASCADE)
-    seat = models.ForeignKey(Seat , on_delete=models.CASCADE)
+    # Space separated seat ids, kept as text so the history survives seat cleanup
+    seats = models.TextField(default='')
     total_amount = models.FloatField()  
 
     def __str__(self):
-        return f"{self.id} - {self.user.username} - {self.movie_title}"
-    
+        return f"{self.reference} - {self.user.username} - {self.movie_title}"
 
+
+class ArchivedBooking(models.Model):
+    """
+    Confirmed booking of a past show, moved out of the hot booking tables by
+    archive_past_shows. Keeps the booking's id and reference.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    reference = models.CharField(max_length=16 , unique=True , editable=False)
+    show = models.ForeignKey(Show , on_delete=models.CASCADE)
+    user = models.ForeignKey(User , on_delete=models.CASCADE)
+    # Space separated seat ids, the seats themselves are in the show's ArchivedSeatMap
+    seats = models.TextField(default='')
+    total_amount = models.FloatField()
+    # When the ticket was scanned at the door, None for no-shows
+    admitted_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.reference} - {self.show} - {self.user}"
+
+
+class Cart(models.Model):
+    """
+    Seats held by a user across several shows, confirmed together by checkout.
+    """
+    reference = models.CharField(max_length=16 , unique=True , editable=False , default=generate_id)
+    user = models.OneToOneField(User , on_delete=models.CASCADE , related_name='cart')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.reference} - {self.user}"
+
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart , on_delete=models.CASCADE , related_name='items')
+    show = models.ForeignKey(Show , on_delete=models.CASCADE)
+    # A seat is held by at most one cart
+    seat = models.OneToOneField(Seat , on_delete=models.CASCADE , related_name='cart_item')
+
+    def __str__(self):
+        return f"{self.cart.reference} - {self.seat_id}"
+
+
+class BookingRollup(models.Model):
+    """
+    Bookings, seats and revenue per show hour or show day, movie, screen and
+    language. Maintained incrementally on confirm and cancel (bookings/rollups.py),
+    rebuilt by the backfill_rollups command.
+    """
+    PERIOD_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    period = models.CharField(max_length=4 , choices=PERIOD_CHOICES)
+    period_start = models.DateTimeField()
+    movie = models.ForeignKey(Movie , on_delete=models.CASCADE)
+    language = models.ForeignKey(Language , on_delete=models.CASCADE)
+    # 0 for shows without a screen
+    screen_number = models.IntegerField(default=0)
+    bookings = models.IntegerField(default=0)
+    seats = models.IntegerField(default=0)
+    # Totals of the live bookings: a cancellation takes its whole total off, the
+    # part it doesn't refund isn't counted, like in backfill_rollups
+    revenue = models.FloatField(default=0)
+    cancellations = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'period_start', 'movie', 'language', 'screen_number'], name='bookings_rollup_bucket_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.period_start} - {self.movie_id}"
+
+
+class WaitlistEntry(models.Model):
+    """
+    A user waiting for seats of a show. Freed seats are offered in FIFO
+    order as a time-limited draft booking, see bookings/waitlist.py.
+    """
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('offered', 'Offered'),
+        ('fulfilled', 'Fulfilled'),
+        ('expired', 'Expired'),
+        ('cancelled', 'Cancelled'),
+    ]
+    reference = models.CharField(max_length=16 , unique=True , editable=False , default=generate_id)
+    show = models.ForeignKey(Show , on_delete=models.CASCADE)
+    user = models.ForeignKey(User , on_delete=models.CASCADE)
+    seat_count = models.PositiveSmallIntegerField()
+    # Blank for any seat type
+    seat_type = models.CharField(max_length=10 , choices=Seat.SEAT_TYPE_CHOICES , blank=True , default='')
+    status = models.CharField(max_length=10 , choices=STATUS_CHOICES , default='waiting')
+    created_at = models.DateTimeField(auto_now_add=True)
+    offered_at = models.DateTimeField(null=True , blank=True)
+    # The hold placed for the current offer
+    draft = models.OneToOneField(draftBooking , on_delete=models.SET_NULL , null=True , blank=True , related_name='waitlist_entry')
+
+    class Meta:
+        indexes = [
+            # The queue of a show: waiting entries in arrival order
+            models.Index(fields=['show', 'status', 'id'], name='bookings_waitlist_queue_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['show', 'user'], condition=models.Q(status__in=['waiting', 'offered']), name='bookings_waitlist_one_per_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.reference} - {self.show_id} - {self.user_id} - {self.status}"
+
+
+class OutboxEvent(models.Model):
+    """
+    A booking state transition, written in the transaction of the change.
+    (txid, id) is the position in the feed, see bookings/outbox.py.
+    """
+    KIND_CHOICES = [
+        ('seats.held', 'Seats held'),
+        ('seats.released', 'Seats released'),
+        ('booking.confirmed', 'Booking confirmed'),
+        ('booking.cancelled', 'Booking cancelled'),
+        ('waitlist.offered', 'Waitlist offer'),
+    ]
+    kind = models.CharField(max_length=32 , choices=KIND_CHOICES)
+    # No foreign key, events outlive archived shows
+    show_id = models.BigIntegerField()
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Id of the writing transaction, PostgreSQL only
+    txid = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['txid', 'id'], name='bookings_outbox_order_idx')]
+
+    def __str__(self):
+        return f"{self.pk} - {self.kind} - {self.show_id}"
+
+
+class OutboxCursor(models.Model):
+    """
+    Feed position (txid, id) of the last event delivered to a subscriber.
+    """
+    subscriber = models.CharField(max_length=64 , unique=True)
+    txid = models.BigIntegerField(default=0)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.subscriber} - {self.position}"
@@ -0,0 +1,198 @@
+"""
+Transactional outbox of booking state transitions.
+
+Every hold, release, confirmation, cancellation and waitlist offer writes a
+compact OutboxEvent row with record(), inside the transaction that makes the
+change: the event exists if and only if the change committed. Consumers
+read the feed instead of polling the booking tables.
+
+In-process subscribers register with @subscriber and get their events in
+id order, in batches, from dispatch() (dispatch_outbox). Each subscriber
+has its own cursor, moved past a batch in the same transaction once its
+handler returned. A handler that raises leaves the cursor where it was and
+gets the batch again on the next run: delivery is at least once, handlers
+must be idempotent. replay() moves a cursor back to deliver events again.
+
+Ids are handed out at insert time but transactions commit in any order, so
+a reader going by id could move past an event that is not committed yet and
+never see it. On PostgreSQL events carry the id of their transaction
+(pg_current_xact_id) and the feed is ordered by (transaction id, event id).
+Readers only look at events of transactions older than the xmin of their
+snapshot, every one of which has finished: an event committed later always
+sorts after them. A long running transaction holds the feed back until it
+ends. Other backends order by id and only read events older than
+OUTBOX_SETTLE_SECONDS, longer than any booking transaction but no guarantee.
+
+record() events last in their transaction, after every other write, to keep
+the time between the insert and the commit short.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Func, Min, Q
+from django.utils import timezone
+
+from .models import OutboxEvent, OutboxCursor
+
+
+BATCH_SIZE = 500
+
+
+class TransactionId(Func):
+    """
+    Id of the current transaction, PostgreSQL 13+.
+    """
+    template = 'pg_current_xact_id()::text::bigint'
+    output_field = BigIntegerField()
+
+
+class SnapshotXmin(Func):
+    """
+    Oldest transaction still running when the statement's snapshot was taken.
+    """
+    template = 'pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+    output_field = BigIntegerField()
+
+
+def commit_ordered():
+    return connection.vendor == 'postgresql'
+
+_subscribers = {}
+
+
+def subscriber(name, kinds=None):
+    """
+    Register handler(events) as subscriber `name`, for all event kinds or
+    the given ones. Handlers live in bookings/subscribers.py.
+    """
+    def register(handler):
+        _subscribers[name] = (handler, tuple(kinds) if kinds else None)
+        return handler
+    return register
+
+
+def subscribers():
+    return sorted(_subscribers)
+
+
+def event(kind, show_id, **payload):
+    """
+    Unsaved event, for bulk_create() of several.
+    """
+    return OutboxEvent(kind=kind, show_id=show_id, payload=payload, txid=TransactionId() if commit_ordered() else None)
+
+
+def record(kind, show_id, **payload):
+    """
+    Write an event. Call it last inside the transaction of the change.
+    """
+    recorded = event(kind, show_id, **payload)
+    recorded.save()
+    return recorded
+
+
+def settled(now=None):
+    """
+    Events visible to readers, see the module docstring.
+    """
+    if commit_ordered():
+        return OutboxEvent.objects.filter(txid__lt=SnapshotXmin())
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, 'OUTBOX_SETTLE_SECONDS', 2))
+    return OutboxEvent.objects.filter(created_at__lt=cutoff)
+
+
+def after(txid, position):
+    """
+    Events after the feed position (txid, position), see in_order().
+    """
+    if commit_ordered():
+        return Q(txid__gt=txid) | Q(txid=txid, pk__gt=position)
+    return Q(pk__gt=position)
+
+
+def in_order(events):
+    return events.order_by('txid', 'pk') if commit_ordered() else events.order_by('pk')
+
+
+def position_of(event_id):
+    """
+    A feed position delivering every event after `event_id`, and maybe a few
+    before it: ids and transaction ids don't sort alike.
+    """
+    if not commit_ordered() or not event_id:
+        return 0, event_id
+    oldest = OutboxEvent.objects.filter(pk__gt=event_id).aggregate(oldest=Min('txid'))['oldest']
+    if oldest is None:
+        # Nothing after it yet, start from the event itself
+        oldest = OutboxEvent.objects.filter(pk__lte=event_id).order_by('-pk').values_list('txid', flat=True).first() or 1
+    return oldest - 1, 0
+
+
+def parse_position(value):
+    """
+    Feed position from format_position() or a plain event id.
+    """
+    txid, _, position = str(value).rpartition(':')
+    if txid:
+        return int(txid), int(position)
+    return position_of(int(position))
+
+
+def format_position(txid, position):
+    return f"{txid}:{position}" if txid else position
+
+
+def dispatch(name, batch_size=BATCH_SIZE, now=None):
+    """
+    Deliver the next batch of events to subscriber `name`. Returns the
+    number delivered, None when another dispatcher holds the cursor.
+    """
+    handler, kinds = _subscribers[name]
+    OutboxCursor.objects.get_or_create(subscriber=name)
+    with transaction.atomic():
+        cursor = OutboxCursor.objects.select_for_update(skip_locked=True).filter(subscriber=name).first()
+        if cursor is None:
+            return None
+        events = settled(now).filter(after(cursor.txid, cursor.position))
+        if kinds:
+            events = events.filter(kind__in=kinds)
+        batch = list(in_order(events)[:batch_size])
+        if not batch:
+            return 0
+        # Raising rolls the cursor back with everything else, the batch comes again
+        handler(batch)
+        cursor.txid = batch[-1].txid or 0
+        cursor.position = batch[-1].pk
+        cursor.save(update_fields=['txid', 'position', 'updated_at'])
+    return len(batch)
+
+
+def replay(name, after_id=0):
+    """
+    Deliver the events after `after_id` to subscriber `name` again.
+    """
+    if name not in _subscribers:
+        raise KeyError(name)
+    txid, position = position_of(after_id)
+    OutboxCursor.objects.update_or_create(subscriber=name, defaults={'txid': txid, 'position': position})
+
+
+def prune(now=None):
+    """
+    Delete events every subscriber has seen and older than
+    OUTBOX_RETENTION_DAYS, which is how far back replays and feed readers
+    can go. Returns the number deleted.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=getattr(settings, 'OUTBOX_RETENTION_DAYS', 7))
+    events = OutboxEvent.objects.filter(created_at__lt=cutoff)
+    names = subscribers()
+    if names:
+        # A subscriber without a cursor hasn't seen anything yet
+        positions = {name: (txid, position) for name, txid, position
+                     in OutboxCursor.objects.filter(subscriber__in=names).values_list('subscriber', 'txid', 'position')}
+        events = events.exclude(after(*min(positions.get(name, (0, 0)) for name in names)))
+    deleted, _ = events.delete()
+    return deleted
@@ -0,0 +1,118 @@
+"""
+Analytics rollups.
+
+Every confirmed or cancelled booking adds its deltas to two BookingRollup
+rows, the hour and the day of its show, for the show's movie, language and
+screen. Reports read only these rows. backfill() rebuilds them from the
+booking tables (including archived bookings) in chunks of shows, in one
+transaction that keeps confirms and cancels waiting. Cancelled bookings are
+deleted, so a backfill resets the cancellation counts.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from movies.models import Show
+from .models import Booking, ArchivedBooking, BookingRollup
+
+
+PERIODS = ('hour', 'day')
+COUNTERS = ('bookings', 'seats', 'revenue', 'cancellations')
+
+
+def period_start(moment, period):
+    moment = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    if period == 'day':
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def bucket_keys(show):
+    for period in PERIODS:
+        yield {
+            'period': period,
+            'period_start': period_start(show.date_time, period),
+            'movie_id': show.movie_id,
+            'language_id': show.language_id,
+            'screen_number': show.screen_id or 0,
+        }
+
+
+def add(show, **deltas):
+    """
+    Add deltas (bookings, seats, revenue, cancellations) to the show's rollups.
+    """
+    increments = {name: F(name) + value for name, value in deltas.items()}
+    for key in bucket_keys(show):
+        if BookingRollup.objects.filter(**key).update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                BookingRollup.objects.create(**key, **deltas)
+        except IntegrityError:
+            # Created concurrently, add to that row instead
+            BookingRollup.objects.filter(**key).update(**increments)
+
+
+def booking_confirmed(booking, show, seat_count):
+    add(show, bookings=1, seats=seat_count, revenue=booking.total_amount)
+
+
+def booking_cancelled(booking, show, seat_count):
+    # Revenue counts live bookings only, so that backfill() gives the same figures
+    add(show, bookings=-1, seats=-seat_count, revenue=-booking.total_amount, cancellations=1)
+
+
+def backfill(chunk_size=500, progress=None):
+    """
+    Rebuild every rollup from the bookings. Reads shows in chunks of
+    `chunk_size`, with one grouped query per table and chunk. The rollup
+    table is locked against writes for the whole rebuild: a confirm or
+    cancel either committed before it and is read from the bookings, or
+    waits and adds to the rebuilt rows. Returns the number of rollup rows.
+    """
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    Through = Booking.seats.through
+    shows = Show.objects.order_by('id').only('id', 'date_time', 'movie_id', 'language_id', 'screen_id')
+    fields = ('period', 'period_start', 'movie_id', 'language_id', 'screen_number')
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Blocks add() on new buckets too, reads go on
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {BookingRollup._meta.db_table} IN EXCLUSIVE MODE')
+        # Before reading, on SQLite this takes the write lock
+        BookingRollup.objects.all().delete()
+
+        last_id = 0
+        while True:
+            chunk = {show.id: show for show in shows.filter(id__gt=last_id)[:chunk_size]}
+            if not chunk:
+                break
+            last_id = max(chunk)
+
+            live = Booking.objects.filter(show_id__in=chunk).values('show_id').annotate(count=Count('id'), amount=Sum('total_amount'))
+            seats = dict(Through.objects.filter(booking__show_id__in=chunk).values('booking__show_id')
+                         .annotate(count=Count('id')).values_list('booking__show_id', 'count'))
+            for row in live:
+                for key in bucket_keys(chunk[row['show_id']]):
+                    bucket = totals[tuple(key.values())]
+                    bucket['bookings'] += row['count']
+                    bucket['seats'] += seats.get(row['show_id'], 0)
+                    bucket['revenue'] += row['amount'] or 0
+
+            archived = ArchivedBooking.objects.filter(show_id__in=chunk).values_list('show_id', 'seats', 'total_amount')
+            for show_id, seat_ids, amount in archived.iterator(chunk_size=2000):
+                for key in bucket_keys(chunk[show_id]):
+                    bucket = totals[tuple(key.values())]
+                    bucket['bookings'] += 1
+                    bucket['seats'] += len(seat_ids.split())
+                    bucket['revenue'] += amount
+            if progress:
+                progress(last_id)
+
+        BookingRollup.objects.bulk_create([
+            BookingRollup(**dict(zip(fields, key)), **counters) for key, counters in totals.items()
+        ], batch_size=1000)
+    return len(totals)
@@ -0,0 +1,260 @@
+"""
+Seat-lock stores.
+
+A hold used to be decided on the Seat rows themselves: for a hot premiere
+every hold, release and confirmation queues up on the row locks of one
+show. A SeatLockStore decides who gets a seat instead, by compare-and-set
+on (show, seat) keys with a TTL:
+
+    acquire(show_id, seat_pks, owner, ttl)  all or nothing, True when every
+                                            seat was free, expired or already
+                                            held by `owner`
+    replace(show_id, seat_pks, owner, ttl)  hold the seats for `owner` whoever
+                                            the store thinks holds them
+    release(show_id, seat_pks, owner)       the seats `owner` holds
+
+Owners are draft or cart references. Stores, picked by SEAT_LOCK_STORE:
+
+    'db'      the Seat rows, a conditional UPDATE available -> locked. The
+              rows don't record the owner: acquire() fails on seats `owner`
+              holds already, release() frees any locked seat it is given,
+              holds expire through release_expired_holds. Callers only pass
+              seats their draft or cart links
+    'memory'  per process dicts sharded by show, one mutex per shard
+    'cache'   the shared cache (Redis), one key per seat, hash tagged by show
+
+The database stays the system of record. hold() mirrors a store hold onto
+the Seat rows with a conditional UPDATE that only the winner of the race
+runs, so losers fail on the store without writing the rows, and a store
+that lost or never saw a hold (a restarted process, another worker's
+memory store) cannot double book a seat. The other way round, a store may
+remember holds released behind its back: by another worker, by the expiry
+cron, by the admin. When the store refuses a hold, hold() reads the rows and
+takes the seats over if they are all available, so a stale store entry costs
+one read instead of refusing free seats until its TTL. Confirmation and
+release go through the rows as before.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from movies.models import Seat
+
+
+class SeatsTaken(Exception):
+    pass
+
+
+class SeatLockStore(ABC):
+    # True when acquire() and release() already write the Seat rows
+    writes_seats = False
+
+    @abstractmethod
+    def acquire(self, show_id, seat_pks, owner, ttl):
+        pass
+
+    @abstractmethod
+    def replace(self, show_id, seat_pks, owner, ttl):
+        pass
+
+    @abstractmethod
+    def release(self, show_id, seat_pks, owner):
+        pass
+
+
+class DatabaseSeatLockStore(SeatLockStore):
+    """
+    The seat state column is the lock. Owners are the draft and cart rows
+    linking the seats, not the rows themselves: release() ignores `owner`
+    and the TTL, drafts and carts are expired by release_expired_holds.
+    """
+    writes_seats = True
+
+    def acquire(self, show_id, seat_pks, owner, ttl):
+        try:
+            with transaction.atomic():
+                locked = Seat.objects.filter(pk__in=seat_pks, show_id=show_id, state='available') \
+                    .update(state='locked', locked_at=timezone.now())
+                if locked != len(set(seat_pks)):
+                    raise SeatsTaken
+        except SeatsTaken:
+            return False
+        return True
+
+    def replace(self, show_id, seat_pks, owner, ttl):
+        return self.acquire(show_id, seat_pks, owner, ttl)
+
+    def release(self, show_id, seat_pks, owner):
+        return Seat.objects.filter(pk__in=seat_pks, show_id=show_id, state='locked').update(state='available', locked_at=None)
+
+
+class MemorySeatLockStore(SeatLockStore):
+    """
+    Holds in this process only, in shards picked by show id: holds on
+    different shows never wait on each other, holds on one show wait on a
+    mutex for a few dict operations instead of on row locks.
+    """
+    # Expired holds of a shard are swept after this many acquires
+    SWEEP_EVERY = 1024
+
+    def __init__(self, shards=64):
+        self.shards = [(threading.Lock(), {}, [0]) for _ in range(shards)]
+
+    def shard(self, show_id):
+        return self.shards[show_id % len(self.shards)]
+
+    def acquire(self, show_id, seat_pks, owner, ttl):
+        now = time.monotonic()
+        mutex, holds, acquires = self.shard(show_id)
+        keys = [(show_id, pk) for pk in seat_pks]
+        with mutex:
+            for key in keys:
+                held = holds.get(key)
+                if held is not None and held[0] != owner and held[1] > now:
+                    return False
+            for key in keys:
+                holds[key] = (owner, now + ttl)
+            acquires[0] += 1
+            if acquires[0] % self.SWEEP_EVERY == 0:
+                for key in [key for key, held in holds.items() if held[1] <= now]:
+                    del holds[key]
+        return True
+
+    def replace(self, show_id, seat_pks, owner, ttl):
+        mutex, holds, _ = self.shard(show_id)
+        expires = time.monotonic() + ttl
+        with mutex:
+            for pk in seat_pks:
+                holds[(show_id, pk)] = (owner, expires)
+        return True
+
+    def release(self, show_id, seat_pks, owner):
+        mutex, holds, _ = self.shard(show_id)
+        released = 0
+        with mutex:
+            for pk in seat_pks:
+                held = holds.get((show_id, pk))
+                if held is not None and held[0] == owner:
+                    del holds[(show_id, pk)]
+                    released += 1
+        return released
+
+
+class CacheSeatLockStore(SeatLockStore):
+    """
+    One cache key per held seat, set with add(): atomic set-if-absent with
+    a timeout on Redis and memcached, shared by all the workers. The {show}
+    hash tag keeps the seats of a show on one node of a Redis cluster.
+    Release reads before deleting, a hold that expires in between can lose
+    its successor's key; the seat row still stops a double booking.
+    """
+    KEY = 'seatlock:{{{}}}:{}'
+
+    def __init__(self, cache_alias='default'):
+        self.cache = caches[cache_alias]
+
+    def acquire(self, show_id, seat_pks, owner, ttl):
+        added = []
+        # Sorted, so two overlapping holds meet on their first common seat
+        for pk in sorted(seat_pks, key=str):
+            key = self.KEY.format(show_id, pk)
+            if self.cache.add(key, owner, timeout=ttl):
+                added.append(key)
+            elif self.cache.get(key) == owner:
+                self.cache.touch(key, timeout=ttl)
+            else:
+                self.cache.delete_many(added)
+                return False
+        return True
+
+    def replace(self, show_id, seat_pks, owner, ttl):
+        self.cache.set_many({self.KEY.format(show_id, pk): owner for pk in seat_pks}, timeout=ttl)
+        return True
+
+    def release(self, show_id, seat_pks, owner):
+        held = self.cache.get_many([self.KEY.format(show_id, pk) for pk in seat_pks])
+        owned = [key for key, value in held.items() if value == owner]
+        self.cache.delete_many(owned)
+        return len(owned)
+
+
+STORES = {
+    'db': DatabaseSeatLockStore,
+    'memory': lambda: MemorySeatLockStore(getattr(settings, 'SEAT_LOCK_SHARDS', 64)),
+    'cache': CacheSeatLockStore,
+}
+
+_store = None
+
+
+def get_store():
+    global _store
+    name = getattr(settings, 'SEAT_LOCK_STORE', 'db')
+    if _store is None or _store[0] != name:
+        _store = (name, STORES[name]())
+    return _store[1]
+
+
+def hold_seconds():
+    return getattr(settings, 'DRAFT_HOLD_SECONDS', 15 * 60)
+
+
+def all_available(show_id, seat_pks):
+    return Seat.objects.filter(pk__in=seat_pks, show_id=show_id, state='available').count() == len(set(seat_pks))
+
+
+def hold(show_id, seat_pks, owner, ttl=None):
+    """
+    Lock available seats of a show for `owner`, all or none. Returns False
+    when a seat is taken. Run it inside the transaction that links the seats
+    to the owner and call forget() if that transaction fails.
+    """
+    store = get_store()
+    ttl = ttl or hold_seconds()
+    if not store.acquire(show_id, seat_pks, owner, ttl):
+        if store.writes_seats or not all_available(show_id, seat_pks):
+            return False
+        # The store remembers holds the rows no longer have, the rows win
+        store.replace(show_id, seat_pks, owner, ttl)
+    if store.writes_seats:
+        return True
+    # The winner mirrors its hold on the rows, the rows have the last word
+    if not DatabaseSeatLockStore().acquire(show_id, seat_pks, owner, ttl):
+        store.release(show_id, seat_pks, owner)
+        return False
+    return True
+
+
+def claim(show_id, seat_pks, owner, ttl=None):
+    """
+    Record in the store seats locked on the rows directly (waitlist offers),
+    so that store holds lose against them without reaching the rows.
+    """
+    store = get_store()
+    if not store.writes_seats:
+        store.acquire(show_id, seat_pks, owner, ttl or hold_seconds())
+
+
+def release(show_id, seat_pks, owner):
+    """
+    Make held seats available again.
+    """
+    store = get_store()
+    if not store.writes_seats:
+        store.release(show_id, seat_pks, owner)
+    return DatabaseSeatLockStore().release(show_id, seat_pks, owner)
+
+
+def forget(show_id, seat_pks, owner):
+    """
+    Drop the store's hold once the rows changed hands (confirmed, rolled
+    back or released directly on the rows).
+    """
+    store = get_store()
+    if not store.writes_seats:
+        store.release(show_id, seat_pks, owner)
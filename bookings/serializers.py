@@ -1,21 +1,66 @@
 from rest_framework import serializers
-from .models import Booking , draftBooking , allUserBookings
+from .models import Booking , draftBooking , allUserBookings , Cart , CartItem , WaitlistEntry
+from . import cart as carts
 
 
 
+# The integer primary keys stay internal, clients keep seeing the random reference as "id".
 class BookingSerializer(serializers.ModelSerializer):
+    id = serializers.CharField(source='reference', read_only=True)
+
     class Meta:
         model = Booking
-        fields = '__all__'
+        exclude = ['reference']
 
 
 class draftBookingSerializer(serializers.ModelSerializer):
+    id = serializers.CharField(source='reference', read_only=True)
+
     class Meta:
         model = draftBooking
-        fields = '__all__'
+        exclude = ['reference']
 
 class allUserBookingSerializer(serializers.ModelSerializer):
+    id = serializers.CharField(source='reference', read_only=True)
+
     class Meta:
         model = allUserBookings
-        fields = '__all__'
+        exclude = ['reference']
+
+
+class CartItemSerializer(serializers.ModelSerializer):
+    seat_uuid = serializers.UUIDField(source='seat.uuid', read_only=True)
+    seat = serializers.CharField(source='seat.id', read_only=True)
+    price = serializers.FloatField(source='seat.price', read_only=True)
+
+    class Meta:
+        model = CartItem
+        fields = ['show', 'seat_uuid', 'seat', 'price']
+
+class CartSerializer(serializers.ModelSerializer):
+    id = serializers.CharField(source='reference', read_only=True)
+    items = CartItemSerializer(many=True, read_only=True)
+    # When release_expired_holds gives the seats back
+    expires_at = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Cart
+        fields = ['id', 'created_at', 'updated_at', 'expires_at', 'items']
+
+    def get_expires_at(self, obj):
+        return carts.expires_at(obj)
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    id = serializers.CharField(source='reference', read_only=True)
+    # Draft booking holding the offered seats, confirm it with confirm_booking
+    draft = serializers.CharField(source='draft.reference', read_only=True, default=None)
+    position = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WaitlistEntry
+        fields = ['id', 'show', 'seat_count', 'seat_type', 'status', 'created_at', 'offered_at', 'draft', 'position']
 
+    def get_position(self, obj):
+        positions = self.context.get('positions', {})
+        return positions.get(obj.pk)
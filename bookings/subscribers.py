@@ -0,0 +1,54 @@
+"""
+In-process subscribers of the booking outbox, see bookings/outbox.py.
+Handlers get a batch of events and may see an event more than once.
+"""
+from django.utils.dateparse import parse_datetime
+
+from movie_booking import mail
+from movies.models import Show
+from users.models import User
+from .models import WaitlistEntry
+from .outbox import subscriber
+from . import utlis
+from . import waitlist
+
+
+@subscriber('waitlist_offers', kinds=['waitlist.offered'])
+def email_offers(events):
+    """
+    Tell waitlisted users about the seats held for them.
+    """
+    # Offers already confirmed, left or expired need no email, also after a replay
+    pending = set(WaitlistEntry.objects.filter(
+        reference__in=[event.payload['entry'] for event in events], status='offered').values_list('reference', flat=True))
+    events = [event for event in events if event.payload['entry'] in pending]
+    # User ids are UUIDs, strings in the payload
+    users = {str(pk): user for pk, user in User.objects.in_bulk({event.payload['user'] for event in events}).items()}
+    shows = Show.objects.select_related('movie').in_bulk({event.show_id for event in events})
+    messages = []
+    for event in events:
+        user = users.get(event.payload['user'])
+        show = shows.get(event.show_id)
+        if user is None or show is None:
+            continue
+        messages.append(utlis.offer_message(
+            username=user.username,
+            email=user.email,
+            draft_id=event.payload['draft'],
+            movie_title=show.movie.title,
+            start_time=show.date_time,
+            seat_ids=event.payload['seats'],
+            expires_at=parse_datetime(event.payload['expires_at']),
+        ))
+    # Concurrently, a batch doesn't wait on one SMTP round trip per offer
+    mail.send_all(messages)
+
+
+@subscriber('waitlist', kinds=['seats.released', 'booking.cancelled'])
+def reallocate(events):
+    """
+    Catch up on allocations the inline waitlist.seats_freed() call missed.
+    Offering seats is idempotent, shows without waiting users cost one query.
+    """
+    for show_id in sorted({event.show_id for event in events}):
+        waitlist.allocate(show_id)
@@ -1,3 +1,323 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from movies.models import Movie, Language, Show, Seat
+from users.models import User
+from .models import Booking, ArchivedBooking, BookingRollup, draftBooking, CartItem, OutboxEvent, OutboxCursor, WaitlistEntry
+from . import cart as carts
+from . import outbox
+from . import rollups
+from . import seatlocks
+from . import tickets
+from . import waitlist
+
+
+def make_show(seats=4, **kwargs):
+    language = Language.objects.create(name='English')
+    movie = Movie.objects.create(imdb_id=f'tt{Movie.objects.count()}', title='Test', duration=120,
+                                 release_datetime='2024', language=language)
+    show = Show.objects.create(movie=movie, language=language, base_price=100,
+                               date_time=kwargs.get('date_time', timezone.now() + timedelta(days=1)))
+    for col in range(1, seats + 1):
+        Seat.objects.create(id=f'A{col}', row='A', col=col, show=show)
+    return show
+
+
+def seat_pks(show):
+    return list(show.seats.order_by('col').values_list('pk', flat=True))
+
+
+def states(pks):
+    seats = dict(Seat.objects.filter(pk__in=pks).values_list('pk', 'state'))
+    return [seats[pk] for pk in pks]
+
+
+class StoreTests:
+    """
+    acquire/release/expiry contract, run against each store.
+    """
+    def store(self):
+        raise NotImplementedError
+
+    def later(self):
+        # Patches the clock of the store past every TTL
+        raise NotImplementedError
+
+    def setUp(self):
+        self.show = make_show()
+        self.pks = seat_pks(self.show)
+
+    def test_acquire_is_all_or_nothing(self):
+        store = self.store()
+        self.assertTrue(store.acquire(self.show.id, self.pks[:2], 'a', 60))
+        self.assertFalse(store.acquire(self.show.id, self.pks[1:3], 'b', 60))
+        # b got none of its seats
+        self.assertTrue(store.acquire(self.show.id, self.pks[2:3], 'c', 60))
+
+    def test_owner_can_acquire_again(self):
+        store = self.store()
+        self.assertTrue(store.acquire(self.show.id, self.pks[:2], 'a', 60))
+        self.assertTrue(store.acquire(self.show.id, self.pks[:2], 'a', 60))
+
+    def test_release_frees_the_seats(self):
+        store = self.store()
+        store.acquire(self.show.id, self.pks[:2], 'a', 60)
+        store.release(self.show.id, self.pks[:2], 'a')
+        self.assertTrue(store.acquire(self.show.id, self.pks[:2], 'b', 60))
+
+    def test_release_by_another_owner_keeps_the_hold(self):
+        store = self.store()
+        store.acquire(self.show.id, self.pks[:1], 'a', 60)
+        self.assertEqual(store.release(self.show.id, self.pks[:1], 'b'), 0)
+        self.assertFalse(store.acquire(self.show.id, self.pks[:1], 'b', 60))
+
+    def test_hold_expires(self):
+        store = self.store()
+        store.acquire(self.show.id, self.pks[:1], 'a', 60)
+        with self.later():
+            self.assertTrue(store.acquire(self.show.id, self.pks[:1], 'b', 60))
+
+
+class MemoryStoreTests(StoreTests, TestCase):
+    def store(self):
+        return seatlocks.MemorySeatLockStore(shards=4)
+
+    def later(self):
+        return mock.patch('time.monotonic', return_value=time.monotonic() + 3600)
+
+
+class CacheStoreTests(StoreTests, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_settings = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'seatlocks-tests'}})
+        self.cache_settings.enable()
+        self.addCleanup(self.cache_settings.disable)
+
+    def store(self):
+        return seatlocks.CacheSeatLockStore()
+
+    def later(self):
+        return mock.patch('time.time', return_value=time.time() + 3600)
+
+
+class DatabaseStoreTests(StoreTests, TestCase):
+    def store(self):
+        return seatlocks.DatabaseSeatLockStore()
+
+    def test_owner_can_acquire_again(self):
+        # Nor whose the lock is, a second acquire fails like anyone else's
+        store = self.store()
+        self.assertTrue(store.acquire(self.show.id, self.pks[:2], 'a', 60))
+        self.assertFalse(store.acquire(self.show.id, self.pks[:2], 'a', 60))
+
+    def test_release_by_another_owner_keeps_the_hold(self):
+        # The rows don't know owners, see the module docstring
+        store = self.store()
+        store.acquire(self.show.id, self.pks[:1], 'a', 60)
+        self.assertEqual(store.release(self.show.id, self.pks[:1], 'b'), 1)
+
+    def test_hold_expires(self):
+        # Row holds expire with their draft, through release_expired_holds
+        user = User.objects.create(username='a', email='a@example.com')
+        store = self.store()
+        store.acquire(self.show.id, self.pks[:1], 'a', 60)
+        draft = draftBooking.objects.create(show=self.show, user=user)
+        draft.seats.set(self.pks[:1])
+        draftBooking.objects.filter(pk=draft.pk).update(created_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(waitlist.expire_holds(), 1)
+        self.assertTrue(store.acquire(self.show.id, self.pks[:1], 'b', 60))
+
+
+@override_settings(SEAT_LOCK_STORE='memory')
+class HoldTests(TestCase):
+    def setUp(self):
+        seatlocks._store = None
+        self.addCleanup(setattr, seatlocks, '_store', None)
+        self.show = make_show()
+        self.pks = seat_pks(self.show)
+
+    def test_hold_mirrors_on_the_rows(self):
+        self.assertTrue(seatlocks.hold(self.show.id, self.pks[:2], 'a'))
+        self.assertEqual(states(self.pks[:2]), ['locked', 'locked'])
+        seatlocks.release(self.show.id, self.pks[:2], 'a')
+        self.assertEqual(states(self.pks[:2]), ['available', 'available'])
+
+    def test_loser_on_the_rows_gives_up_its_store_hold(self):
+        # Locked on the rows behind the store's back (another worker)
+        Seat.objects.filter(pk=self.pks[1]).update(state='locked')
+        self.assertFalse(seatlocks.hold(self.show.id, self.pks[:2], 'a'))
+        self.assertEqual(states(self.pks[:2]), ['available', 'locked'])
+        # Nothing left in the store for `a`
+        self.assertTrue(seatlocks.get_store().acquire(self.show.id, self.pks[:1], 'b', 60))
+
+    def test_rows_override_a_stale_store_hold(self):
+        # Released on the rows behind the store's back (expiry cron)
+        seatlocks.get_store().acquire(self.show.id, self.pks[:1], 'a', 60)
+        self.assertTrue(seatlocks.hold(self.show.id, self.pks[:1], 'b'))
+        self.assertFalse(seatlocks.hold(self.show.id, self.pks[:1], 'c'))
+
+    def test_failed_cart_hold_forgets_the_store_holds(self):
+        user = User.objects.create(username='a', email='a@example.com')
+        other = make_show()
+        seats = self.pks[:1] + seat_pks(other)[:1]
+        # Fails after both shows were held in the store and on the rows
+        with mock.patch('bookings.cart.record_seats', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                carts.hold_seats(user, seats)
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(states(seats), ['available', 'available'])
+        store = seatlocks.get_store()
+        self.assertTrue(store.acquire(self.show.id, seats[:1], 'b', 60))
+        self.assertTrue(store.acquire(other.id, seats[1:], 'b', 60))
+
+
+class OutboxTests(TransactionTestCase):
+    """
+    Events are recorded and delivered in transactions of their own, like in
+    production: on PostgreSQL readers only see committed transactions.
+    """
+    def setUp(self):
+        # Only the subscribers of the test
+        subscribers = mock.patch.dict(outbox._subscribers, clear=True)
+        subscribers.start()
+        self.addCleanup(subscribers.stop)
+        self.delivered = []
+        outbox.subscriber('all')(self.delivered.extend)
+        self.later = timezone.now() + timedelta(minutes=1)
+
+    def record(self, count, kind='seats.held'):
+        return [outbox.record(kind, 1, seats=[f'A{index}']).pk for index in range(count)]
+
+    def test_dispatch_delivers_in_order_once(self):
+        ids = self.record(3)
+        self.assertEqual(outbox.dispatch('all', batch_size=2, now=self.later), 2)
+        self.assertEqual(outbox.dispatch('all', batch_size=2, now=self.later), 1)
+        self.assertEqual(outbox.dispatch('all', now=self.later), 0)
+        self.assertEqual([event.pk for event in self.delivered], ids)
+
+    def test_dispatch_waits_for_events_to_settle(self):
+        self.record(1)
+        self.assertEqual(outbox.dispatch('all'), 0)
+        self.assertEqual(outbox.dispatch('all', now=self.later), 1)
+
+    def test_dispatch_filters_kinds(self):
+        self.record(1)
+        cancelled = self.record(1, kind='booking.cancelled')
+        outbox.subscriber('cancellations', kinds=['booking.cancelled'])(self.delivered.extend)
+        outbox.dispatch('cancellations', now=self.later)
+        self.assertEqual([event.pk for event in self.delivered], cancelled)
+
+    def test_failing_handler_gets_the_batch_again(self):
+        ids = self.record(2)
+        handler = mock.Mock(side_effect=[RuntimeError, None])
+        outbox.subscriber('flaky')(handler)
+        with self.assertRaises(RuntimeError):
+            outbox.dispatch('flaky', now=self.later)
+        self.assertEqual(OutboxCursor.objects.get(subscriber='flaky').position, 0)
+        self.assertEqual(outbox.dispatch('flaky', now=self.later), 2)
+        self.assertEqual([event.pk for event in handler.call_args.args[0]], ids)
+
+    def test_replay_delivers_again(self):
+        ids = self.record(3)
+        outbox.dispatch('all', now=self.later)
+        outbox.replay('all', ids[0])
+        self.assertEqual(outbox.dispatch('all', now=self.later), 2)
+        self.assertEqual([event.pk for event in self.delivered], ids + ids[1:])
+
+    def test_replay_unknown_subscriber(self):
+        with self.assertRaises(KeyError):
+            outbox.replay('nobody')
+
+    @override_settings(OUTBOX_RETENTION_DAYS=7)
+    def test_prune_keeps_recent_and_undelivered_events(self):
+        outbox.subscriber('slow')(mock.Mock())
+        old = self.record(3)
+        recent = self.record(1)
+        OutboxEvent.objects.filter(pk__in=old).update(created_at=timezone.now() - timedelta(days=8))
+        outbox.dispatch('all', now=self.later)
+        # slow has seen the first one only
+        outbox.dispatch('slow', batch_size=1, now=self.later)
+        self.assertEqual(outbox.prune(), 1)
+        self.assertEqual(list(OutboxEvent.objects.order_by('pk').values_list('pk', flat=True)), old[1:] + recent)
+
+
+class TicketTests(TestCase):
+    def setUp(self):
+        self.show = make_show(date_time=timezone.now() + timedelta(minutes=30))
+        self.user = User.objects.create(username='a', email='a@example.com')
+        self.booking = Booking.objects.create(show=self.show, user=self.user, total_amount=100)
+        self.booking.seats.set(seat_pks(self.show)[:1])
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='door', email='door@example.com', is_staff=True))
+
+    def test_ticket_admits_once(self):
+        token = tickets.ticket_url(self.booking, self.show)
+        self.assertEqual(self.client.post('/tickets/scan/', {'token': token}, format='json').status_code, 200)
+        self.assertEqual(self.client.post('/tickets/scan/', {'token': token}, format='json').status_code, 409)
+
+    def test_non_string_token_is_invalid(self):
+        for token in (123, ['x'], {'token': 'x'}, None):
+            response = self.client.post('/tickets/scan/', {'token': token}, format='json')
+            self.assertEqual(response.status_code, 400, token)
+
+    def test_archive_keeps_the_admission(self):
+        tickets.admit(self.booking.pk)
+        Show.objects.filter(pk=self.show.pk).update(date_time=timezone.now() - timedelta(days=2))
+        call_command('archive_past_shows', stdout=mock.Mock())
+        archived = ArchivedBooking.objects.get(pk=self.booking.pk)
+        self.assertIsNotNone(archived.admitted_at)
+
+
+class WaitlistTests(TestCase):
+    def setUp(self):
+        self.show = make_show()
+        self.user = User.objects.create(username='a', email='a@example.com')
+
+    def test_freed_seats_go_to_the_waiting_entry(self):
+        entry = WaitlistEntry.objects.create(show=self.show, user=self.user, seat_count=2)
+        self.assertEqual(waitlist.allocate(self.show.id), [entry])
+        self.assertEqual(sorted(states(seat_pks(self.show))), ['available', 'available', 'locked', 'locked'])
+
+    def test_offer_is_emailed_by_the_outbox(self):
+        WaitlistEntry.objects.create(show=self.show, user=self.user, seat_count=1)
+        waitlist.allocate(self.show.id)
+        self.assertEqual(outbox.dispatch('waitlist_offers', now=timezone.now() + timedelta(minutes=1)), 1)
+        self.assertEqual([message.to for message in mail.outbox], [['a@example.com']])
+
+    def test_empty_waitlist_locks_nothing(self):
+        with mock.patch.object(Seat.objects, 'select_for_update') as lock:
+            self.assertEqual(waitlist.allocate(self.show.id), [])
+        self.assertFalse(lock.called)
+
+    def test_started_show_offers_nothing(self):
+        WaitlistEntry.objects.create(show=self.show, user=self.user, seat_count=1)
+        Show.objects.filter(pk=self.show.pk).update(date_time=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(waitlist.allocate(self.show.id), [])
+        self.assertEqual(states(seat_pks(self.show)), ['available'] * 4)
+
+
+class RollupTests(TestCase):
+    def counters(self):
+        return sorted(BookingRollup.objects.values_list('period', 'bookings', 'seats', 'revenue'))
+
+    def test_backfill_gives_the_incremental_figures(self):
+        show = make_show()
+        user = User.objects.create(username='a', email='a@example.com')
+        for pks in (seat_pks(show)[:2], seat_pks(show)[2:3]):
+            booking = Booking.objects.create(show=show, user=user, total_amount=100 * len(pks))
+            booking.seats.set(pks)
+            rollups.booking_confirmed(booking, show, len(pks))
+        rollups.booking_cancelled(booking, show, 1)
+        booking.delete()
+        incremental = self.counters()
+        self.assertEqual(rollups.backfill(chunk_size=1), 2)
+        self.assertEqual(self.counters(), incremental)
+        self.assertEqual(incremental, [('day', 1, 2, 200.0), ('hour', 1, 2, 200.0)])
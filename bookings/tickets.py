@@ -0,0 +1,116 @@
+"""
+Signed ticket tokens and door admission.
+
+The QR code on a ticket carries "<booking id>.<show id>.<show start>" signed
+with an HMAC (django.core.signing, keyed by SECRET_KEY). Scanners get the
+booking, show and admission window from the token itself, so invalid,
+forged and wrong-door tickets are rejected without touching the database.
+Admission is a single conditional UPDATE (admitted_at IS NULL), which also
+makes a ticket admit only once however many scanners see it.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Case, When, Value
+from django.utils import timezone
+
+from .models import Booking
+
+
+TICKET_URL = "https://www.filmsphere.me/tickets/{}"
+
+_signer = signing.Signer(salt='bookings.tickets', algorithm='sha256')
+
+
+class TicketError(Exception):
+    pass
+
+
+def ticket_token(booking, show):
+    return _signer.sign(f"{booking.pk}.{show.pk}.{int(show.date_time.timestamp())}")
+
+
+def ticket_url(booking, show):
+    return TICKET_URL.format(ticket_token(booking, show))
+
+
+def read_ticket(value, show_id=None, now=None):
+    """
+    Verify a token (or the ticket URL) offline.
+    Returns (booking id, show id, show start) or raises TicketError.
+    """
+    if not isinstance(value, str):
+        raise TicketError("Invalid ticket")
+    token = value.strip().rsplit('/', 1)[-1]
+    try:
+        booking_id, ticket_show_id, start = (int(part) for part in _signer.unsign(token).split('.'))
+    except (signing.BadSignature, ValueError):
+        raise TicketError("Invalid ticket")
+    if show_id is not None and str(show_id) != str(ticket_show_id):
+        raise TicketError("Ticket is for another show")
+
+    start = datetime.fromtimestamp(start, tz=dt_timezone.utc)
+    now = now or timezone.now()
+    opens, closes = getattr(settings, 'TICKET_ADMISSION_WINDOW', (timedelta(hours=2), timedelta(hours=3)))
+    if now < start - opens:
+        raise TicketError("Doors are not open for this show yet")
+    if now > start + closes:
+        raise TicketError("Ticket has expired")
+    return booking_id, ticket_show_id, start
+
+
+def admit(booking_id, at=None):
+    """
+    Mark a booking as admitted. Returns None when it was admitted by this
+    call, the earlier admission time for a repeated scan.
+    """
+    at = at or timezone.now()
+    if Booking.objects.filter(pk=booking_id, admitted_at__isnull=True).update(admitted_at=at):
+        return None
+    # Only failed scans pay for a second query
+    admitted_at = Booking.objects.filter(pk=booking_id).values_list('admitted_at', flat=True).first()
+    if admitted_at is None:
+        raise TicketError("Booking not found")
+    return admitted_at
+
+
+def admit_batch(scans, show_id=None):
+    """
+    Admit queued scans, [{"token": ..., "scanned_at": datetime or None}, ...],
+    in two queries. Returns one result per scan, in order.
+    """
+    now = timezone.now()
+    results = [None] * len(scans)
+    first_scan = {}
+    for index, scan in enumerate(scans):
+        scanned_at = scan.get('scanned_at') or now
+        try:
+            booking_id, _, _ = read_ticket(scan.get('token', ''), show_id, now=scanned_at)
+        except TicketError as e:
+            results[index] = {"status": "rejected", "message": str(e)}
+            continue
+        if booking_id in first_scan:
+            results[index] = {"status": "duplicate"}
+            continue
+        first_scan[booking_id] = (index, scanned_at)
+
+    with transaction.atomic():
+        rows = list(Booking.objects.select_for_update().filter(pk__in=first_scan).values_list('pk', 'reference', 'admitted_at'))
+        references = {booking_id: reference for booking_id, reference, _ in rows}
+        admitted = {booking_id: admitted_at for booking_id, _, admitted_at in rows}
+        pending = {booking_id: at for booking_id, (_, at) in first_scan.items()
+                   if booking_id in admitted and admitted[booking_id] is None}
+        if pending:
+            Booking.objects.filter(pk__in=pending, admitted_at__isnull=True).update(admitted_at=Case(
+                *(When(pk=booking_id, then=Value(at)) for booking_id, at in pending.items())))
+
+    for booking_id, (index, _) in first_scan.items():
+        if booking_id not in admitted:
+            results[index] = {"status": "rejected", "message": "Booking not found"}
+        elif booking_id in pending:
+            results[index] = {"status": "admitted", "booking": references[booking_id]}
+        else:
+            results[index] = {"status": "duplicate", "booking": references[booking_id], "admitted_at": admitted[booking_id]}
+    return results
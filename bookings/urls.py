@@ -1,9 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api import  BookingViewSet
+from .api import  BookingViewSet, CartViewSet, TicketViewSet, AnalyticsViewSet, ExportViewSet, WaitlistViewSet, EventViewSet
 
 router = DefaultRouter()
 router.register(r'bookings', BookingViewSet)
+router.register(r'cart', CartViewSet, basename='cart')
+router.register(r'tickets', TicketViewSet, basename='tickets')
+router.register(r'analytics', AnalyticsViewSet, basename='analytics')
+router.register(r'exports', ExportViewSet, basename='exports')
+router.register(r'waitlist', WaitlistViewSet, basename='waitlist')
+router.register(r'events', EventViewSet, basename='events')
 
 urlpatterns = [
     path('', include(router.urls)),
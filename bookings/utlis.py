@@ -1,22 +1,21 @@
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
-import os
-import qrcode
 from io import BytesIO
-from email.mime.image import MIMEImage
 
 
+def tickets_message(username, email, booking_id, movie_title, movie_language, start_time, total_price, seat_ids, ticket_url):
+    # qrcode (and PIL behind it) and the email modules are imported on first use,
+    # only workers that actually send tickets pay for them
+    import qrcode
+    from email.mime.image import MIMEImage
+    from django.core.mail import EmailMultiAlternatives
 
-
-
-
-def send_tickets(username, email, booking_id, movie_title, movie_language, start_time, total_price, seat_ids):
     subject = '🎬 Filmsphere Movie Tickets'
     seats = ', '.join(seat_ids)
     date = start_time.strftime('%d-%m-%Y')
     start_time = start_time.strftime('%I:%M %p')
 
-    qr = qrcode.make(f"https://www.filmsphere.me/tickets/{booking_id}")
+    # The QR carries the signed ticket checked by the door scanners
+    qr = qrcode.make(ticket_url)
     buffer = BytesIO()
     qr.save(buffer, format="PNG")
     buffer.seek(0)  
@@ -65,5 +64,30 @@ def send_tickets(username, email, booking_id, movie_title, movie_language, start
     mime_image.add_header('Content-ID', '<qr_code>')
     mime_image.add_header('Content-Disposition', 'inline', filename="qr_code.png")
     msg.attach(mime_image)
+    return msg
+
 
-    msg.send()
+def send_tickets(**kwargs):
+    tickets_message(**kwargs).send()
+
+
+def offer_message(username, email, draft_id, movie_title, start_time, seat_ids, expires_at):
+    from django.core.mail import EmailMultiAlternatives
+
+    subject = '🎟️ Seats are waiting for you on Filmsphere'
+    seats = ', '.join(seat_ids)
+    show_time = start_time.strftime('%d-%m-%Y %I:%M %p')
+    expires = expires_at.strftime('%I:%M %p')
+    html_content = f"""
+    <div style="max-width: 500px; margin: auto; font-family: Arial, sans-serif; background: #f9f9f9; padding: 20px; border-radius: 8px; border: 1px solid #ddd;">
+        <div style="background: white; padding: 20px; border-radius: 8px;">
+            <p style="font-size: 16px; color: #555;">Hello {username},</p>
+            <p style="font-size: 16px; color: #555;">Seats freed up for <strong>{movie_title}</strong> on {show_time} and we are holding them for you:</p>
+            <p style="font-size: 24px; font-weight: bold; color: #e74c3c; text-align: center; padding: 10px; background: #f2f2f2; border-radius: 8px;">{seats}</p>
+            <p style="font-size: 16px; color: #555;">Confirm booking <strong>{draft_id}</strong> before {expires} (UTC), after that the seats go to the next person in line.</p>
+        </div>
+    </div>
+    """
+    msg = EmailMultiAlternatives(subject, '', settings.EMAIL_HOST_USER, [email])
+    msg.attach_alternative(html_content, "text/html")
+    return msg
@@ -0,0 +1,237 @@
+"""
+Per-show waitlist.
+
+Users join the waitlist of a show for a number of seats, optionally of one
+seat type. Whenever seats of the show are freed (cancellation, released
+draft or cart, expired hold) allocate() walks the waiting entries in
+arrival order and gives each one it can serve a draft booking with its
+seats locked: an offer, confirmed through the normal confirm_booking.
+Entries asking for more seats than are free are skipped, not blocking the
+ones behind them. Offers expire after WAITLIST_OFFER_SECONDS and their
+seats go to the next in line, plain drafts and carts after
+DRAFT_HOLD_SECONDS (release_expired_holds).
+
+Offers are written to the outbox and emailed by its waitlist_offers
+subscriber, nobody has to poll the seat map to catch a freed seat.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from movies import layouts, pricing
+from movies.models import Show, Seat
+from movies.signals import bump_seat_map_version
+from .models import draftBooking, Cart, WaitlistEntry
+from . import cart as carts
+from . import outbox
+from . import seatlocks
+
+
+logger = logging.getLogger('movie')
+
+# Waiting entries looked at per allocation
+SCAN_LIMIT = 500
+MAX_SEATS = 10
+
+
+class WaitlistError(Exception):
+    pass
+
+
+def offer_seconds():
+    return getattr(settings, 'WAITLIST_OFFER_SECONDS', 10 * 60)
+
+
+def join(user, show, seat_count, seat_type=''):
+    if show.date_time < timezone.now():
+        raise WaitlistError("Show has already started")
+    if not 1 <= seat_count <= MAX_SEATS:
+        raise WaitlistError(f"seat_count must be between 1 and {MAX_SEATS}")
+    if seat_type and seat_type not in dict(Seat.SEAT_TYPE_CHOICES):
+        raise WaitlistError("Unknown seat type")
+    if WaitlistEntry.objects.filter(show=show, user=user, status__in=['waiting', 'offered']).exists():
+        raise WaitlistError("You are already on the waitlist of this show")
+    entry = WaitlistEntry.objects.create(show=show, user=user, seat_count=seat_count, seat_type=seat_type)
+    # Seats may be free right now
+    seats_freed(show.id)
+    entry.refresh_from_db()
+    return entry
+
+
+def position(entry):
+    """
+    1 for the next entry to be served.
+    """
+    return WaitlistEntry.objects.filter(show_id=entry.show_id, status='waiting', pk__lte=entry.pk).count()
+
+
+def pick_seats(compiled, free, count, seat_type):
+    """
+    Seat ids for an offer: adjacent seats when the layout allows, otherwise
+    the first free ones in layout order. `free` maps seat id -> seat type.
+    """
+    if compiled is not None:
+        adjacent = layouts.find_adjacent(compiled, free, count, seat_type or None)
+        if adjacent:
+            return adjacent
+    candidates = [seat_id for seat_id, kind in free.items() if not seat_type or kind == seat_type]
+    if compiled is not None:
+        candidates = layouts.in_layout_order(compiled, candidates, seat_id=lambda seat_id: seat_id)
+    return candidates[:count]
+
+
+def allocate(show_id):
+    """
+    Offer the show's available seats to its waiting entries, first come
+    first served, until the show starts. Returns the entries that got an offer.
+    """
+    now = timezone.now()
+    # Most frees have nobody waiting, they don't lock the show's seats for nothing
+    show = Show.objects.select_related('screen').filter(pk=show_id, date_time__gte=now).first()
+    if show is None or not WaitlistEntry.objects.filter(show_id=show_id, status='waiting').exists():
+        return []
+
+    offers = []
+    with transaction.atomic():
+        # Same lock order (seat pk) as the cart and the other allocations of the show
+        rows = list(Seat.objects.select_for_update().filter(show_id=show_id, state='available')
+                    .order_by('pk').values_list('pk', 'id', 'type'))
+        if not rows:
+            return []
+        pks = {seat_id: pk for pk, seat_id, _ in rows}
+        free = {seat_id: kind for _, seat_id, kind in rows}
+        free_by_type = Counter(free.values())
+
+        entries = list(WaitlistEntry.objects.select_for_update().filter(show_id=show_id, status='waiting')
+                       .order_by('pk')[:SCAN_LIMIT])
+        if not entries:
+            return []
+        # A user holds one draft at a time
+        busy = set(draftBooking.objects.filter(user_id__in={entry.user_id for entry in entries}).values_list('user_id', flat=True))
+        compiled = layouts.for_screen(show.screen) if show.screen_id else None
+
+        for entry in entries:
+            if not free:
+                break
+            available = free_by_type[entry.seat_type] if entry.seat_type else len(free)
+            if available < entry.seat_count or entry.user_id in busy:
+                continue
+            seat_ids = pick_seats(compiled, free, entry.seat_count, entry.seat_type)
+            draft = draftBooking.objects.create(show_id=show_id, user_id=entry.user_id)
+            seat_pks = [pks[seat_id] for seat_id in seat_ids]
+            draft.seats.set(seat_pks)
+            Seat.objects.filter(pk__in=seat_pks).update(state='locked', locked_at=now)
+            # The rows are locked already, tell the lock store once they are committed
+            transaction.on_commit(lambda seat_pks=seat_pks, owner=draft.reference: seatlocks.claim(show_id, seat_pks, owner, offer_seconds()))
+            for seat_id in seat_ids:
+                free_by_type[free.pop(seat_id)] -= 1
+            entry.status = 'offered'
+            entry.offered_at = now
+            entry.draft = draft
+            entry.save(update_fields=['status', 'offered_at', 'draft'])
+            busy.add(entry.user_id)
+            offers.append((entry, seat_ids))
+
+        expires_at = now + timedelta(seconds=offer_seconds())
+        for entry, seat_ids in offers:
+            outbox.record('waitlist.offered', show_id, entry=entry.reference, draft=entry.draft.reference,
+                          user=entry.user_id, seats=seat_ids, expires_at=expires_at)
+
+    if offers:
+        bump_seat_map_version(show_id)
+        pricing.refresh_price_tables([show_id])
+    return [entry for entry, _ in offers]
+
+
+def seats_freed(show_id):
+    """
+    Hook for every code path that makes seats of a show available again.
+    Never fails the caller, the seats are free either way.
+    """
+    try:
+        return allocate(show_id)
+    except Exception:
+        logger.exception(f"Waitlist allocation failed for show {show_id}")
+        return []
+
+
+def draft_confirmed(draft):
+    # Before the draft is deleted, the link is cleared on delete
+    WaitlistEntry.objects.filter(draft=draft).update(status='fulfilled')
+
+
+def leave(user, reference):
+    """
+    Leave a waitlist, releasing the held seats of a pending offer.
+    """
+    with transaction.atomic():
+        entry = WaitlistEntry.objects.select_for_update().filter(reference=reference, user=user).first()
+        if entry is None or entry.status not in ('waiting', 'offered'):
+            raise WaitlistError("Not on this waitlist")
+        draft = entry.draft
+        entry.status = 'cancelled'
+        entry.save(update_fields=['status'])
+        if draft is not None:
+            release_draft(draft, 'left')
+    if draft is not None and not seats_freed(entry.show_id):
+        bump_seat_map_version(entry.show_id)
+        pricing.refresh_price_tables([entry.show_id])
+    return entry
+
+
+def release_draft(draft, reason):
+    """
+    Release the seats of a draft and delete it, in the caller's transaction.
+    Returns False when the draft is already gone (confirmed or released).
+    """
+    # Locked like confirm_booking locks it, a draft is confirmed or released, never both
+    draft = draftBooking.objects.select_for_update().filter(pk=draft.pk).first()
+    if draft is None:
+        return False
+    WaitlistEntry.objects.filter(draft=draft, status='offered').update(status='expired' if reason == 'expired' else 'cancelled')
+    seats = list(draft.seats.values_list('pk', 'id'))
+    seatlocks.release(draft.show_id, [pk for pk, _ in seats], draft.reference)
+    seat_ids = [seat_id for _, seat_id in seats]
+    draft.delete()
+    outbox.record('seats.released', draft.show_id, draft=draft.reference, user=draft.user_id, seats=seat_ids, reason=reason)
+    return True
+
+
+def expire_holds(now=None):
+    """
+    Release drafts and carts held too long (offers after WAITLIST_OFFER_SECONDS,
+    other drafts and carts after DRAFT_HOLD_SECONDS) and offer their seats to
+    the waitlists. Returns the number of drafts and carts released.
+    """
+    now = now or timezone.now()
+    offer_cutoff = now - timedelta(seconds=offer_seconds())
+    draft_cutoff = now - timedelta(seconds=getattr(settings, 'DRAFT_HOLD_SECONDS', 15 * 60))
+    expired = draftBooking.objects.filter(
+        Q(waitlist_entry__isnull=False, created_at__lt=offer_cutoff) |
+        Q(waitlist_entry__isnull=True, created_at__lt=draft_cutoff))
+
+    show_ids = set()
+    released = 0
+    for draft in expired.iterator(chunk_size=500):
+        with transaction.atomic():
+            if not release_draft(draft, 'expired'):
+                continue
+        show_ids.add(draft.show_id)
+        released += 1
+
+    for cart in Cart.objects.filter(updated_at__lt=draft_cutoff, items__isnull=False).distinct().iterator(chunk_size=500):
+        freed = carts.expire_cart(cart, now)
+        show_ids |= freed
+        released += bool(freed)
+
+    for show_id in show_ids:
+        if not seats_freed(show_id):
+            # Nothing reallocated, the seat map and prices still changed
+            bump_seat_map_version(show_id)
+            pricing.refresh_price_tables([show_id])
+    return released
@@ -0,0 +1,23 @@
+# gunicorn -c gunicorn.conf.py movie_booking.wsgi
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Load and warm the application once in the master, workers fork from the warm image
+preload_app = True
+
+
+def when_ready(server):
+    from movie_booking.warmup import warm
+
+    timings = warm()
+    server.log.info(f"Warmed up: {timings}")
+
+
+def post_fork(server, worker):
+    # Connections are opened per worker, never inherited
+    from django.db import connections
+
+    connections.close_all()
@@ -0,0 +1,103 @@
+"""
+Shared helpers for the benchmark management commands.
+
+Every benchmark writes its results as JSON under BENCH_RESULTS_DIR (one file
+per run, named after the benchmark and the git commit) so runs can be
+compared across commits.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.db import connection
+
+
+def percentile(sorted_samples, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_samples:
+        return None
+    rank = max(0, min(len(sorted_samples) - 1, int(round(pct / 100 * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[rank]
+
+
+def summarize(samples):
+    """
+    Latency summary in milliseconds for a list of durations in seconds.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    to_ms = lambda value: round(value * 1000, 3)
+    return {
+        "count": len(ordered),
+        "mean_ms": to_ms(sum(ordered) / len(ordered)),
+        "min_ms": to_ms(ordered[0]),
+        "p50_ms": to_ms(percentile(ordered, 50)),
+        "p95_ms": to_ms(percentile(ordered, 95)),
+        "p99_ms": to_ms(percentile(ordered, 99)),
+        "max_ms": to_ms(ordered[-1]),
+    }
+
+
+def time_call(func, repeat):
+    """
+    Call func `repeat` times and return the individual durations in seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_results(name, results, output=None):
+    """
+    Store a benchmark run as JSON and return the file path.
+    """
+    revision = git_revision()
+    payload = {
+        "benchmark": name,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git": revision,
+        "environment": environment(),
+        "results": results,
+    }
+    if output is None:
+        directory = getattr(settings, 'BENCH_RESULTS_DIR', settings.BASE_DIR / 'bench_results')
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        output = os.path.join(directory, f"{name}-{(revision['commit'] or 'unknown')[:10]}-{stamp}.json")
+    with open(output, 'w') as handle:
+        json.dump(payload, handle, indent=2, default=str)
+    return output
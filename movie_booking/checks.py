@@ -0,0 +1,32 @@
+"""
+Deployment checks, run by `manage.py check --deploy`.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+# Cache backends private to each process
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias='default'):
+    """
+    True when every worker process sees the same cache entries.
+    """
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [Error(
+        "CACHES['default'] is private to each worker process.",
+        hint="Set REDIS_URL. Seat map and catalog versions are bumped in the cache of the worker "
+             "that changed them, the other workers keep serving their stale payloads, and requests "
+             "with an Idempotency-Key are refused.",
+        id='movie_booking.E001',
+    )]
@@ -0,0 +1,53 @@
+"""
+Database connection lifecycle metrics.
+
+Counts new connections per alias (with persistent connections or a pool
+this should stay flat under load) and, when psycopg's pool is enabled,
+exports its statistics: size, idle connections, waiting clients and the
+time spent waiting for a connection.
+"""
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import registry
+
+
+CONNECTIONS_OPENED = registry.counter(
+    'db_connections_opened_total', 'Database connections opened by this process.', ('alias',))
+POOL_CONNECTIONS = registry.gauge(
+    'db_pool_connections', 'Connections held by the pool, by state.', ('alias', 'state'))
+POOL_WAITING = registry.gauge(
+    'db_pool_requests_waiting', 'Clients currently waiting for a pooled connection.', ('alias',))
+POOL_REQUESTS = registry.counter(
+    'db_pool_requests_total', 'Connections requested from the pool.', ('alias',))
+POOL_WAIT_TIME = registry.counter(
+    'db_pool_wait_seconds_total', 'Time spent waiting for a pooled connection.', ('alias',))
+POOL_TIMEOUTS = registry.counter(
+    'db_pool_timeouts_total', 'Pool requests that timed out or failed.', ('alias',))
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    CONNECTIONS_OPENED.inc(connection.alias)
+
+
+def pools():
+    for alias in connections:
+        if connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            pool = getattr(connections[alias], 'pool', None)
+            if pool is not None:
+                yield alias, pool
+
+
+@registry.collector
+def collect_pool_stats():
+    for alias, pool in pools():
+        # pop_stats() resets the cumulative counters, add them to ours
+        stats = pool.pop_stats()
+        POOL_CONNECTIONS.set(alias, 'open', value=stats.get('pool_size', 0))
+        POOL_CONNECTIONS.set(alias, 'idle', value=stats.get('pool_available', 0))
+        POOL_WAITING.set(alias, value=stats.get('requests_waiting', 0))
+        POOL_REQUESTS.inc(alias, amount=stats.get('requests_num', 0))
+        POOL_WAIT_TIME.inc(alias, amount=stats.get('requests_wait_ms', 0) / 1000)
+        POOL_TIMEOUTS.inc(alias, amount=stats.get('requests_errors', 0))
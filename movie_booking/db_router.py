@@ -0,0 +1,108 @@
+"""
+Read replica routing.
+
+Every query goes to the primary ("default") unless the code runs inside
+reading_from_replica(), which read-only endpoints enter for the duration
+of the view. Writes, and reads inside a transaction, always use the primary.
+
+Read-your-writes: after a user's own booking mutation the user is pinned to
+the primary for REPLICA_PIN_SECONDS, so the seat map and booking history
+they load next reflect their change even when the replicas lag behind.
+The pin lives in the cache so that every worker sees it.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+# Replica alias used by the current request, None reads from the primary
+_replica = ContextVar('replica', default=None)
+
+PIN_KEY = 'db:primary-pin:user:{}'
+
+
+def replicas():
+    return getattr(settings, 'REPLICA_DATABASES', ())
+
+
+def pin_to_primary(user):
+    if user is not None and user.is_authenticated and replicas():
+        cache.set(PIN_KEY.format(user.pk), 1, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+
+
+def is_pinned(user):
+    return user is not None and user.is_authenticated and cache.get(PIN_KEY.format(user.pk)) is not None
+
+
+@contextmanager
+def reading_from_replica(user=None):
+    """
+    Route the reads of the enclosed block to one replica, chosen once so
+    that all the reads of a request see the same snapshot.
+    """
+    alias = None
+    if replicas() and not is_pinned(user):
+        alias = random.choice(replicas())
+    token = _replica.set(alias)
+    try:
+        yield alias
+    finally:
+        _replica.reset(token)
+
+
+@contextmanager
+def reading_from_primary():
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def replica_read(view_method):
+    """
+    Viewset action decorator: the action only reads, serve it from a replica.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        with reading_from_replica(request.user):
+            return view_method(self, request, *args, **kwargs)
+    return wrapper
+
+
+def pins_primary(view_method):
+    """
+    Viewset action decorator for booking mutations: once the action
+    succeeds the user reads from the primary for a while.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code < 400:
+            pin_to_primary(request.user)
+        return response
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        # Reads inside a transaction must see that transaction's writes
+        if alias is None or connections['default'].in_atomic_block:
+            return 'default'
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
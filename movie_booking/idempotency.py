@@ -0,0 +1,82 @@
+"""
+Idempotency-Key support for mutating endpoints.
+
+The first request carrying a key runs normally and its response is stored
+in the cache (status plus the JSON body as bytes) for IDEMPOTENCY_KEY_TTL
+seconds. A retry with the same key gets the stored response back without
+running the view, so no seat, balance or booking row is touched twice.
+Keys are scoped to the user and the action. The cache must be shared by
+the workers, a retry landing on another worker would run again: keys are
+refused with a 503 on a per-process cache outside DEBUG.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from .checks import cache_is_shared
+from .prerender import dumps
+
+
+HEADER = 'Idempotency-Key'
+KEY = 'idem:{}:{}:{}'
+# How long a key stays reserved while its first request is running
+IN_FLIGHT_TIMEOUT = 60
+
+
+def fingerprint(request):
+    # Same body whatever the key order of the client's JSON
+    body = dumps(request.data, sort_keys=True) if request.data else b''
+    return hashlib.blake2b(request.method.encode() + request.path.encode() + body, digest_size=12).hexdigest()
+
+
+def idempotent(view_method):
+    """
+    Viewset action decorator honouring the Idempotency-Key request header.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"success": False, "message": f"{HEADER} is too long."}, status=status.HTTP_400_BAD_REQUEST)
+        if not settings.DEBUG and not cache_is_shared():
+            return Response({"success": False, "message": f"{HEADER} is not supported without a shared cache."},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        cache_key = KEY.format(request.user.pk, view_method.__name__, hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+        request_print = fingerprint(request)
+        if not cache.add(cache_key, ('pending', request_print), IN_FLIGHT_TIMEOUT):
+            stored = cache.get(cache_key)
+            if stored is None:
+                # Expired between add() and get(), treat as in flight
+                stored = ('pending', request_print)
+            if stored[1] != request_print:
+                return Response({"success": False, "message": f"{HEADER} was already used with a different request."},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if stored[0] == 'pending':
+                return Response({"success": False, "message": "A request with this key is still in progress."},
+                                status=status.HTTP_409_CONFLICT)
+            _, _, status_code, body = stored
+            response = HttpResponse(body, status=status_code, content_type='application/json')
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+        if response.status_code >= 500 or not hasattr(response, 'data'):
+            # Nothing reliable to replay, let the retry run again
+            cache.delete(cache_key)
+        else:
+            cache.set(cache_key, ('done', request_print, response.status_code, dumps(response.data)),
+                      getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 3600))
+        return response
+    return wrapper
@@ -0,0 +1,61 @@
+"""
+Async email sending.
+
+With the SMTP backend and aiosmtplib installed messages go out over async
+SMTP connections, otherwise the configured backend runs on worker threads.
+send_all() sends a batch concurrently, for callers like the outbox
+subscribers that would otherwise wait on one SMTP round trip per message.
+"""
+import asyncio
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+async def asend_message(message):
+    try:
+        # Imported on first use, like the other optional modules
+        import aiosmtplib
+    except ImportError:
+        aiosmtplib = None
+    if aiosmtplib is None or settings.EMAIL_BACKEND != SMTP_BACKEND:
+        return await sync_to_async(message.send, thread_sensitive=False)()
+
+    recipients = message.recipients()
+    if not recipients:
+        return 0
+    await aiosmtplib.send(
+        message.message(),
+        sender=message.from_email,
+        recipients=recipients,
+        hostname=settings.EMAIL_HOST,
+        port=settings.EMAIL_PORT,
+        username=settings.EMAIL_HOST_USER or None,
+        password=settings.EMAIL_HOST_PASSWORD or None,
+        start_tls=settings.EMAIL_USE_TLS,
+        use_tls=settings.EMAIL_USE_SSL,
+        timeout=settings.EMAIL_TIMEOUT,
+    )
+    return 1
+
+
+async def asend_all(messages):
+    # The first failure is raised, after every message was tried
+    results = await asyncio.gather(*(asend_message(message) for message in messages), return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return sum(results)
+
+
+def send_all(messages):
+    """
+    Send a batch of EmailMessages concurrently from sync code. Returns the
+    number sent, raises the first failure.
+    """
+    if not messages:
+        return 0
+    return async_to_sync(asend_all)(messages)
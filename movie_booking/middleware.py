@@ -0,0 +1,153 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry, DEFAULT_COUNT_BUCKETS, DEFAULT_SIZE_BUCKETS
+from . import db_pool  # noqa: F401 connection metrics
+
+
+metrics_logger = logging.getLogger('metrics')
+
+REQUESTS = registry.counter(
+    'http_requests_total', 'HTTP requests by view, action and status.', ('view', 'action', 'status'))
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Wall time spent handling the request.', ('view', 'action'))
+DB_QUERIES = registry.histogram(
+    'db_queries_per_request', 'Database queries executed per request.', ('view', 'action'), DEFAULT_COUNT_BUCKETS)
+DB_TIME = registry.histogram(
+    'db_query_duration_seconds', 'Total database time per request.', ('view', 'action'))
+SERIALIZATION_TIME = registry.histogram(
+    'response_render_duration_seconds', 'Time spent rendering the response body.', ('view', 'action'))
+RESPONSE_SIZE = registry.histogram(
+    'http_response_size_bytes', 'Response body size.', ('view', 'action'), DEFAULT_SIZE_BUCKETS)
+N_PLUS_ONE = registry.counter(
+    'db_repeated_query_total', 'Requests where one SQL shape repeated past the threshold.', ('view', 'action'))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+
+def sql_shape(sql):
+    """
+    Reduce a statement to its shape so that queries differing only
+    in their parameters count as the same query.
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    return _PLACEHOLDER_LIST.sub('(...)', sql)
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting queries, their time and their shapes.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[sql_shape(sql)] += 1
+
+
+class QueryMetricsMiddleware:
+    """
+    Records per view and action: query count, database time, render time,
+    response size and latency. Logs repeated SQL shapes (likely N+1 patterns)
+    once they reach QUERY_METRICS_N_PLUS_ONE_THRESHOLD executions in one request.
+    Works in both sync (WSGI) and async (ASGI) chains.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'QUERY_METRICS_N_PLUS_ONE_THRESHOLD', 10)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = self.start(request)
+        start = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        self.finish(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        recorder = self.start(request)
+        start = time.perf_counter()
+        # Async views run their ORM calls on the request's thread-sensitive
+        # worker thread, the wrappers have to be installed on that thread's connections.
+        stack = await sync_to_async(self.recording)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.finish(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    def start(self, request):
+        request._metrics_view = ('unresolved', '')
+        request._metrics_render_time = 0.0
+        return QueryRecorder()
+
+    def recording(self, recorder):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        return stack
+
+    def finish(self, request, response, recorder, elapsed):
+        view, action = request._metrics_view
+        REQUESTS.inc(view, action, response.status_code)
+        REQUEST_LATENCY.observe(view, action, value=elapsed)
+        DB_QUERIES.observe(view, action, value=recorder.count)
+        DB_TIME.observe(view, action, value=recorder.duration)
+        SERIALIZATION_TIME.observe(view, action, value=request._metrics_render_time)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(view, action, value=len(response.content))
+
+        repeated = [(shape, count) for shape, count in recorder.shapes.items() if count >= self.threshold]
+        if repeated:
+            N_PLUS_ONE.inc(view, action)
+            for shape, count in repeated:
+                metrics_logger.warning(f"Possible N+1 in {view}.{action}: {count} x {shape}")
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # DRF viewsets expose the class and the method -> action mapping on the view function.
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is not None:
+            actions = getattr(view_func, 'actions', None) or {}
+            action = actions.get(request.method.lower(), request.method.lower())
+            request._metrics_view = (view_class.__name__, action)
+        else:
+            request._metrics_view = (view_func.__name__, request.method.lower())
+        return None
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns, time the renderer separately.
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._metrics_render_time += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,42 @@
+"""
+Admin paginator for the big tables (seats, bookings, history).
+
+Django's changelist runs COUNT(*) over the filtered queryset on every page,
+which on PostgreSQL scans the whole table or index. Above ESTIMATE_THRESHOLD
+rows the planner's estimate is close enough for paging: the estimate comes
+from EXPLAIN, which costs one planning round trip whatever the table size.
+Small results and other backends keep the exact count.
+"""
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimated_count(queryset):
+    """
+    Planner row estimate for the queryset, None when the backend has none.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list) if hasattr(self.object_list, 'query') else None
+        if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+            return estimate
+        return super().count
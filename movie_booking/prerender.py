@@ -0,0 +1,103 @@
+"""
+Pre-rendered JSON responses for hot read endpoints.
+
+A payload is serialized to bytes once, compressed once per supported
+encoding and the variants are stored together in the cache under a
+versioned key. Requests for an unchanged resource are answered straight
+from the cache: no serializer, no JSON encoder, no compressor.
+
+orjson and brotli are optional, without them the stdlib json encoder is
+used and only gzip variants are stored.
+"""
+import gzip
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework.utils.encoders import JSONEncoder
+
+from .db_router import reading_from_primary
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+# Bodies smaller than this are not worth compressing (same cut-off as GZipMiddleware)
+MIN_COMPRESS_SIZE = 200
+
+
+def dumps(payload, sort_keys=False):
+    """
+    Compact UTF-8 JSON, the same output as DRF's JSONRenderer.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=JSONEncoder().default, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+    return json.dumps(payload, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys).encode('utf-8')
+
+
+def render(payload):
+    """
+    Serialize a payload and compress it in every available encoding.
+    """
+    body = dumps(payload)
+    variants = {'identity': body}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        variants['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+        if brotli is not None:
+            variants['br'] = brotli.compress(body, quality=5)
+    return {
+        # Weak validator, the variants are different bytes of the same representation
+        'etag': f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+        'variants': variants,
+    }
+
+
+def get_or_render(key, build):
+    """
+    Cached rendering of `build()`. The key must change whenever the payload
+    would, entries are never invalidated in place.
+    """
+    rendered = cache.get(key)
+    if rendered is None:
+        # Built from the primary, bytes from a lagging replica would be stored under the new version
+        with reading_from_primary():
+            rendered = render(build())
+        cache.set(key, rendered, getattr(settings, 'PRERENDERED_RESPONSE_TIMEOUT', 3600))
+    return rendered
+
+
+def accepted_encodings(request):
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def prerendered_response(request, rendered, status=200):
+    """
+    Response for a rendered payload in the best encoding the client accepts.
+    """
+    if rendered['etag'] in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    else:
+        accepted = accepted_encodings(request)
+        encoding = next((name for name in ('br', 'gzip') if name in rendered['variants'] and name in accepted), 'identity')
+        response = HttpResponse(rendered['variants'][encoding], status=status, content_type='application/json')
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+    response['ETag'] = rendered['etag']
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,137 @@
+"""
+Shared sliding-window rate limiter and the DRF throttles built on it.
+
+DRF's SimpleRateThrottle keeps the list of request timestamps of every key
+and rewrites the whole list on each request. This limiter keeps two
+integers per key instead: the request counts of the current and of the
+previous fixed window. The previous window is weighted by how much of it
+still overlaps the last `period` seconds:
+
+    estimate = previous * (1 - elapsed / period) + current
+
+A check is one get_many(), an allowed request adds one incr(). Both are
+atomic on a shared cache (Redis, memcached), so all the workers count
+against the same limit. Rejected requests are not counted. Requests racing
+for the last slot of a window can overshoot the limit by a few.
+
+Limits are configured per scope in settings.RATE_LIMITS, e.g. '20/min'.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+KEY = 'rl:{}:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    '20/min' -> (20, 60)
+    """
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+class SlidingWindowLimiter:
+    def __init__(self, limit, period, cache_alias=None):
+        self.limit = limit
+        self.period = period
+        self.cache = caches[cache_alias or getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+    def hit(self, key, now=None):
+        """
+        Count a request for `key` if it is within the limit.
+        Returns (allowed, seconds to wait when it is not).
+        """
+        now = time.time() if now is None else now
+        window, elapsed = divmod(now, self.period)
+        current_key = KEY.format(key, int(window))
+        previous_key = KEY.format(key, int(window) - 1)
+        counts = self.cache.get_many([previous_key, current_key])
+        previous = counts.get(previous_key, 0)
+        current = counts.get(current_key, 0)
+
+        excess = previous * (1 - elapsed / self.period) + current + 1 - self.limit
+        if excess > 0:
+            # Time until enough of the previous window has slid out, at most the rest of this one
+            remaining = self.period - elapsed
+            wait = min(excess * self.period / previous, remaining) if previous else remaining
+            return False, wait
+
+        try:
+            self.cache.incr(current_key)
+        except ValueError:
+            # First request of the window, add() loses to a concurrent first request
+            if not self.cache.add(current_key, 1, timeout=2 * self.period + 1):
+                self.cache.incr(current_key)
+        return True, 0
+
+
+_limiters = {}
+
+
+def limiter_for(scope):
+    """
+    Limiter of a RATE_LIMITS scope, None when the scope is unlimited.
+    """
+    rate = getattr(settings, 'RATE_LIMITS', {}).get(scope)
+    if rate is None:
+        return None
+    limiter = _limiters.get((scope, rate))
+    if limiter is None:
+        limiter = _limiters[(scope, rate)] = SlidingWindowLimiter(*parse_rate(rate))
+    return limiter
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Base throttle: counts requests of the user (or of the client IP when
+    anonymous) against the RATE_LIMITS entry of `scope`.
+    """
+    scope = None
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        scope = self.get_scope(request, view)
+        limiter = limiter_for(scope) if scope else None
+        if limiter is None:
+            return True
+        allowed, self.retry_after = limiter.hit(f"{scope}:{self.get_ident_key(request)}")
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class AnonThrottle(SlidingWindowThrottle):
+    scope = 'anon'
+
+    def get_scope(self, request, view):
+        return None if request.user and request.user.is_authenticated else self.scope
+
+
+class UserThrottle(SlidingWindowThrottle):
+    scope = 'user'
+
+    def get_scope(self, request, view):
+        return self.scope if request.user and request.user.is_authenticated else None
+
+
+class ScopedThrottle(SlidingWindowThrottle):
+    """
+    Per action policy: @action(..., throttle_scope='booking'). The viewset
+    declares throttle_scope = None, actions without a scope are not limited by it.
+    """
+    def get_scope(self, request, view):
+        return getattr(view, 'throttle_scope', None)
@@ -60,6 +60,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'movie_booking.middleware.QueryMetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'movie_booking.urls'
@@ -97,6 +98,39 @@ DATABASES = {
             },
     }
 
+# Connection lifecycle. DB_POOL=1 uses psycopg's built-in pool (needs psycopg[pool]), the pool
+# checks connections before handing them out. Otherwise connections persist for DB_CONN_MAX_AGE
+# seconds and are health checked before reuse. Under ASGI prefer the pool, persistent
+# connections are per thread and the async ORM hops between threads.
+if os.environ.get('DB_POOL') == '1':
+    from psycopg_pool import ConnectionPool
+
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            "max_size": int(os.environ.get('DB_POOL_MAX_SIZE', 20)),
+            "timeout": float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            "max_idle": float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+            "check": ConnectionPool.check_connection,
+        },
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Read replicas, comma separated hosts in DB_REPLICA_HOSTS (same credentials as the primary).
+# Read-only endpoints are served from them, see movie_booking/db_router.py
+REPLICA_DATABASES = []
+for index, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host.strip(), "TEST": {"MIRROR": "default"}}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['movie_booking.db_router.ReplicaRouter']
+# Seconds a user reads from the primary after their own booking change (longer than the replication lag)
+REPLICA_PIN_SECONDS = 5
+
 
 
 
@@ -159,4 +193,52 @@ AUTH_USER_MODEL = 'users.User'
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'  # or your preferred storage
 SESSION_COOKIE_SECURE = False  # Set to True only if using HTTPS
 SESSION_COOKIE_HTTPONLY = True
-SESSION_COOKIE_AGE = 3600  # 1 hour in seconds, adjust as needed
\ No newline at end of file
+SESSION_COOKIE_AGE = 3600  # 1 hour in seconds, adjust as needed
+
+#Request metrics (exported on /metrics/)
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+# Log a possible N+1 once one SQL shape runs this many times in a single request
+QUERY_METRICS_N_PLUS_ONE_THRESHOLD = 10
+
+# Shared cache: version counters, pre-rendered payloads, idempotency keys and rate limits.
+# Set REDIS_URL in production, the default local memory cache is private to each worker process.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ['REDIS_URL'],
+        },
+    }
+
+# Sliding-window rate limits per scope (movie_booking/ratelimit.py), per user or per IP when anonymous
+RATE_LIMITS = {
+    'anon': '120/min',
+    'user': '600/min',
+    # Holds, confirmations, cancellations, cart changes and checkouts
+    'booking': '30/min',
+    'auth': '10/min',
+    'otp': '10/hour',
+    # Per scanner account at the door
+    'scan': '3000/min',
+}
+
+# Seconds a draft booking holds its seats before release_expired_holds frees them,
+# and the shorter hold of a waitlist offer before its seats go to the next in line
+DRAFT_HOLD_SECONDS = 15 * 60
+WAITLIST_OFFER_SECONDS = 10 * 60
+
+# Seconds a process keeps the pricing rules version (movies/pricing.py) before reading it again
+PRICING_RULES_TTL = 5
+
+# Seat-lock store deciding holds (bookings/seatlocks.py): 'db' (the seat rows), 'memory' (per process,
+# sharded by show) or 'cache' (shared, needs REDIS_URL). The seat rows stay the system of record.
+SEAT_LOCK_STORE = os.environ.get('SEAT_LOCK_STORE', 'db')
+SEAT_LOCK_SHARDS = 64
+
+# Booking outbox (bookings/outbox.py): readers skip events younger than the settle time so that
+# transactions still committing can't be skipped, events are kept this many days for replays
+OUTBOX_SETTLE_SECONDS = 2
+OUTBOX_RETENTION_DAYS = 7
+
+# Seconds a booking response is kept for replay to retries carrying the same Idempotency-Key
+IDEMPOTENCY_KEY_TTL = 24 * 3600
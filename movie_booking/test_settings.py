@@ -0,0 +1,23 @@
+"""
+Settings for the test suite: python manage.py test --settings=movie_booking.test_settings
+
+Two local SQLite databases stand in for the PostgreSQL primary and a read
+replica mirroring it, so the replica routing is exercised without a server.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_default.sqlite3",
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_replica.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    },
+}
+REPLICA_DATABASES = ["replica"]
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
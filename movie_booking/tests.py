@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from movies.models import Movie, Language, Show, Seat
+from users.models import User
+from .db_router import reading_from_replica, is_pinned
+
+
+@skipUnless('replica' in settings.DATABASES, "needs a replica, run with --settings=movie_booking.test_settings")
+class ReplicaRouterTests(TransactionTestCase):
+    """
+    Not a TestCase: its transaction around each test would keep every read
+    on the primary, reads inside a transaction must see its writes.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        language = Language.objects.create(name='English')
+        movie = Movie.objects.create(imdb_id='tt1', title='Test', duration=120, release_datetime='2024', language=language)
+        self.show = Show.objects.create(movie=movie, language=language, base_price=100,
+                                        date_time=timezone.now() + timedelta(days=1))
+        for col in range(1, 5):
+            Seat.objects.create(id=f'A{col}', row='A', col=col, show=self.show)
+        self.user = User.objects.create(username='a', email='a@example.com', balance=1000)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def queries(self, method, *args, **kwargs):
+        """
+        Response of a request and the number of queries it ran on each database.
+        """
+        with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(*args, **kwargs)
+        return response, len(primary), len(replica)
+
+    def test_reads_go_to_the_replica(self):
+        with reading_from_replica(self.user) as alias:
+            self.assertEqual(alias, 'replica')
+            self.assertEqual(Show.objects.all().db, 'replica')
+        self.assertEqual(Show.objects.all().db, 'default')
+
+    def test_read_only_endpoints_use_the_replica(self):
+        response, _, replica = self.queries('get', '/bookings/get_user_bookings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(replica, 0)
+
+    def test_reads_in_a_transaction_stay_on_the_primary(self):
+        with reading_from_replica(self.user), transaction.atomic():
+            self.assertEqual(Show.objects.all().db, 'default')
+
+    def test_holds_and_confirms_use_the_primary(self):
+        seats = [str(pk) for pk in self.show.seats.values_list('pk', flat=True)[:2]]
+        response, primary, replica = self.queries('post', '/bookings/create_booking/',
+                                                  {'show_id': self.show.id, 'seat_uuids': seats}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        draft = response.json()['message']['id']
+        response, primary, replica = self.queries('post', f'/bookings/{draft}/confirm_booking/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(replica, 0)
+
+    def test_booking_change_pins_the_user_to_the_primary(self):
+        seats = [str(self.show.seats.values_list('pk', flat=True).first())]
+        self.client.post('/bookings/create_booking/', {'show_id': self.show.id, 'seat_uuids': seats}, format='json')
+        self.assertTrue(is_pinned(self.user))
+        response, primary, replica = self.queries('get', '/bookings/get_user_bookings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(replica, 0)
+        # Only this user
+        other = User.objects.create(username='b', email='b@example.com')
+        with reading_from_replica(other) as alias:
+            self.assertEqual(alias, 'replica')
+
+    def test_failed_change_does_not_pin(self):
+        response = self.client.post('/bookings/create_booking/', {'show_id': self.show.id, 'seat_uuids': []}, format='json')
+        self.assertGreaterEqual(response.status_code, 400)
+        self.assertFalse(is_pinned(self.user))
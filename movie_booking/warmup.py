@@ -0,0 +1,76 @@
+"""
+Warm a process before it serves requests.
+
+Run once in the gunicorn master with preload_app (see gunicorn.conf.py):
+everything loaded here is shared copy-on-write by the forked workers, so
+a new worker answers its first request at full speed. Rarely used
+dependencies (qrcode, pyotp, the email modules) stay lazy and are not
+loaded here.
+
+Database and cache connections opened while warming are closed again, a
+forked worker must never share a socket with its parent.
+"""
+import importlib
+import logging
+import time
+
+from django.core.cache import caches
+from django.db import connection, connections
+from django.urls import get_resolver
+from rest_framework import serializers
+
+
+logger = logging.getLogger('movie')
+
+SERIALIZER_MODULES = ('movies.serializers', 'bookings.serializers', 'users.serializers')
+
+
+def load_urlconf():
+    # Imports every view module and compiles the URL patterns
+    get_resolver()._populate()
+
+
+def build_serializers():
+    """
+    Build the field map of every serializer once, which also resolves the
+    model metadata and the field mappings they use.
+    """
+    for name in SERIALIZER_MODULES:
+        for value in vars(importlib.import_module(name)).values():
+            if isinstance(value, type) and issubclass(value, serializers.BaseSerializer) and value.__module__ == name:
+                value().fields
+
+
+def fill_caches():
+    from movies import layouts, pricing, search
+    from movies.api import render_catalog
+    from movies.models import Screen
+
+    render_catalog()
+    pricing.active_rules(pricing.rules_version())
+    for number, version, layout in Screen.objects.values_list('number', 'layout_version', 'layout'):
+        try:
+            layouts.get_layout(number, version, layout)
+        except layouts.LayoutError:
+            logger.warning(f"Screen {number} has an invalid layout")
+    if connection.vendor != 'postgresql':
+        # The in-process search index, PostgreSQL searches with its own indexes
+        search.get_index()
+
+
+def warm(steps=(load_urlconf, build_serializers, fill_caches)):
+    """
+    Run the warmup steps, returns the seconds spent per step. A failing
+    step is logged and skipped, warming must never stop the server from starting.
+    """
+    timings = {}
+    for step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception(f"Warmup step {step.__name__} failed")
+        timings[step.__name__] = round(time.perf_counter() - started, 4)
+    connections.close_all()
+    caches.close_all()
+    return timings
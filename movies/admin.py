@@ -1,12 +1,124 @@
 from django.contrib import admin
-from .models import Movie , Language , Genre , Show , Screen , Seat
+from django.db import transaction
+from django.db.models import Q
+from movie_booking.paginator import EstimatedCountPaginator
+from .models import Movie , Language , Genre , Show , Screen , Seat , ArchivedSeatMap , PricingRule , ShowPriceTable
+from .signals import bump_seat_map_version
+from . import pricing
+from bookings.models import draftBooking, Cart, CartItem
+from bookings import cart as carts
+from bookings import waitlist
+
+
+def seats_changed(show_ids):
+    # Bulk updates skip the post_save receivers
+    for show_id in show_ids:
+        bump_seat_map_version(show_id)
+    pricing.refresh_price_tables(show_ids)
+
+
+class MovieAdmin(admin.ModelAdmin):
+    list_display = ('imdb_id', 'title', 'language', 'duration', 'release_datetime')
+    list_select_related = ('language',)
+    # Served by the title trigram index on PostgreSQL
+    search_fields = ('title', '=imdb_id')
+
+
+class ShowAdmin(admin.ModelAdmin):
+    list_display = ('id', 'movie', 'date_time', 'language', 'screen_id', 'base_price')
+    list_select_related = ('movie', 'language')
+    raw_id_fields = ('movie',)
+    search_fields = ('movie__title',)
+    ordering = ('-date_time',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class SeatAdmin(admin.ModelAdmin):
+    """
+    Seats are the biggest table: no COUNT(*) on every page, no per-row show
+    query, a raw id widget instead of a select listing every show, and bulk
+    actions as single UPDATEs.
+    """
+    list_display = ('id', 'show_id', 'show', 'type', 'state', 'locked_at', 'price')
+    list_select_related = ('show',)
+    # Indexed columns only: state and locked_at (movies_seat_state_lock_idx); narrow to a show with ?show__id__exact=
+    list_filter = ('state',)
+    raw_id_fields = ('show',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['release_locks', 'block_seats', 'unblock_seats']
+
+    @admin.action(description="Release locks of the selected seats")
+    def release_locks(self, request, queryset):
+        """
+        Release the drafts holding the selected seats, with all their seats,
+        the selected seats of carts, and locks nothing holds any more. Through
+        the same paths as expiry: the seat-lock store, the outbox and the
+        waitlists see the seats freed.
+        """
+        seat_ids = list(queryset.filter(state='locked').values_list('pk', flat=True))
+        show_ids = set()
+        drafts = 0
+        for draft in draftBooking.objects.filter(seats__in=seat_ids).distinct():
+            with transaction.atomic():
+                if waitlist.release_draft(draft, 'admin'):
+                    show_ids.add(draft.show_id)
+                    drafts += 1
+        cart_ids = set(CartItem.objects.filter(seat_id__in=seat_ids).values_list('cart_id', flat=True))
+        for cart_id in cart_ids:
+            with transaction.atomic():
+                cart = Cart.objects.select_for_update().filter(pk=cart_id).first()
+                if cart is not None:
+                    show_ids |= carts.release_items(cart, CartItem.objects.filter(cart=cart, seat_id__in=seat_ids), 'admin')
+        stray = Seat.objects.filter(pk__in=seat_ids, state='locked', draftbooking__isnull=True, cart_item__isnull=True)
+        show_ids |= set(stray.values_list('show_id', flat=True).distinct())
+        stray = Seat.objects.filter(pk__in=list(stray.values_list('pk', flat=True))).update(state='available', locked_at=None)
+        carts.seats_released(show_ids)
+        self.message_user(request, f"Released {drafts} drafts, the seats of {len(cart_ids)} carts and {stray} stray locks.")
+
+    @admin.action(description="Block the selected seats (house seats)")
+    def block_seats(self, request, queryset):
+        seats = queryset.filter(state='available')
+        show_ids = set(seats.values_list('show_id', flat=True).distinct())
+        blocked = seats.update(state='booked', locked_at=None)
+        seats_changed(show_ids)
+        self.message_user(request, f"Blocked {blocked} seats.")
+
+    @admin.action(description="Unblock the selected blocked seats")
+    def unblock_seats(self, request, queryset):
+        # Blocked seats are booked without a booking, disabled seats stay booked
+        seats = queryset.filter(state='booked', booking__isnull=True).filter(~Q(type='disabled'))
+        show_ids = set(seats.values_list('show_id', flat=True).distinct())
+        unblocked = Seat.objects.filter(pk__in=list(seats.values_list('pk', flat=True))).update(state='available')
+        # Freed like a cancellation, the waitlists are offered the seats
+        carts.seats_released(show_ids)
+        self.message_user(request, f"Unblocked {unblocked} seats.")
+
+
+class ArchivedSeatMapAdmin(admin.ModelAdmin):
+    list_display = ('show', 'archived_at')
+    list_select_related = ('show',)
+    raw_id_fields = ('show',)
+
+    def get_queryset(self, request):
+        # The seat lists are large JSON documents, keep them out of the changelist query
+        return super().get_queryset(request).defer('seats')
+
+
+class ShowPriceTableAdmin(admin.ModelAdmin):
+    list_display = ('show', 'occupancy', 'rules_version', 'computed_at')
+    list_select_related = ('show',)
+    raw_id_fields = ('show',)
+
 
 # Register your models here.
-admin.site.register(Movie)
+admin.site.register(Movie, MovieAdmin)
 admin.site.register(Language)
 admin.site.register(Genre)
-admin.site.register(Show)
+admin.site.register(Show, ShowAdmin)
 admin.site.register(Screen)
-admin.site.register(Seat)
-
-
+admin.site.register(Seat, SeatAdmin)
+admin.site.register(ArchivedSeatMap, ArchivedSeatMapAdmin)
+admin.site.register(PricingRule)
+admin.site.register(ShowPriceTable, ShowPriceTableAdmin)
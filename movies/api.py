@@ -1,14 +1,24 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from django.utils import timezone
+from django.db import transaction
 from datetime import timedelta
 from .models import Movie, Language, Genre, Show, Screen, Seat
 from .serializers import MovieSerializer, ShowSerializer, ScreenSerializer, AddShowSerializer , SeatSerializer
-from django_ratelimit.decorators import ratelimit
-from django_ratelimit.exceptions import Ratelimited
 from rest_framework.permissions import IsAuthenticated , IsAdminUser
+from rest_framework.parsers import MultiPartParser
+from .importer import CatalogImporter, detect_format
+from .search import search_movies
+from .showtimes import showtime_calendar, parse_calendar_window
+from . import queries, fast_serializers, pricing, layouts
+from .signals import catalog_version, seat_map_version, bump_seat_map_version
+from movie_booking.prerender import get_or_render, render, prerendered_response
+from movie_booking.checks import cache_is_shared
+from movie_booking.db_router import replica_read
+from movie_booking.ratelimit import AnonThrottle, UserThrottle
+from datetime import date
+import io
 import logging
 
 
@@ -20,25 +30,60 @@ CRUD operations on a model(admin) and ViewSet(Customer) is used when you want to
 """
 movie_logger = logging.getLogger('movie')
 
+
+def render_catalog():
+    """
+    The catalog list, pre-rendered and pre-compressed until the catalog changes.
+    Also called by movie_booking.warmup before the workers fork.
+    """
+    def build():
+        serializer = MovieSerializer(queries.catalog(), many=True)
+        return {"success": True, "message": serializer.data}
+
+    # Like the seat map, never from a per-process cache: a bump only reaches the worker that made it
+    if not cache_is_shared():
+        return render(build())
+    return get_or_render(f"movies:catalog:{catalog_version()}:list", build)
+
+
 class MovieViewSet(viewsets.ViewSet):
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+    throttle_classes = [AnonThrottle, UserThrottle]
 
     @action(detail=False, methods=['get'])
+    @replica_read
     def list_movies(self, request):
         try:
-            movies = Movie.objects.all()
-            serializer = MovieSerializer(movies, many=True)
-            return Response({"success": True, "message": serializer.data}, status=status.HTTP_200_OK)
+            return prerendered_response(request, render_catalog())
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked search over title and description.
+        Query params: q, language, genre, date (YYYY-MM-DD), limit, offset.
+        """
+        try:
+            params = request.query_params
+            try:
+                day = date.fromisoformat(params['date']) if params.get('date') else None
+                limit = min(max(int(params.get('limit', 20)), 1), 100)
+                offset = max(int(params.get('offset', 0)), 0)
+            except ValueError:
+                return Response({"success": False, "message": "Invalid date, limit or offset."}, status=status.HTTP_400_BAD_REQUEST)
+
+            data = search_movies(params.get('q', ''), params.get('language'), params.get('genre'), day, limit, offset)
+            return Response({"success": True, "message": "Search results", "data": data}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @action(detail=False, methods=['get'])
+    @replica_read
     def get_movie_shows(self, request , imdb_id = None ):
         try:
             movie = Movie.objects.get(imdb_id= imdb_id)
-            shows = Show.objects.filter(movie=movie)
-            serializer = ShowSerializer(shows, many=True)
-            return Response({"success": True, "message": "Shows fetched successfully", "data": serializer.data}, status=status.HTTP_200_OK)
+            data = fast_serializers.movie_shows(imdb_id)
+            return Response({"success": True, "message": "Shows fetched successfully", "data": data}, status=status.HTTP_200_OK)
         except Movie.DoesNotExist:
             return Response({"success": False, "message": "Movie not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
@@ -56,6 +101,54 @@ class MovieViewSet(viewsets.ViewSet):
         except Exception as e:
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['get'])
+    def get_showtime_calendar(self, request, imdb_id=None):
+        """
+        Upcoming shows of a movie grouped by day, one day per page by default.
+        Query params: from, to, day (cursor, YYYY-MM-DD), days, language, screen, include_past.
+        """
+        try:
+            params = request.query_params
+            try:
+                start, end = parse_calendar_window(params)
+                days = min(max(int(params.get('days', 1)), 1), 14)
+                screen = int(params['screen']) if params.get('screen') else None
+            except ValueError:
+                return Response({"success": False, "message": "Invalid date or number in query parameters."}, status=status.HTTP_400_BAD_REQUEST)
+
+            data = showtime_calendar(imdb_id, start, end, params.get('language'), screen, days)
+            # Only an empty page needs to tell an unknown movie apart from a movie without shows
+            if not data['days'] and not Movie.objects.filter(imdb_id=imdb_id).exists():
+                raise Movie.DoesNotExist
+            return Response({"success": True, "message": "Showtimes fetched successfully", "data": data}, status=status.HTTP_200_OK)
+        except Movie.DoesNotExist:
+            return Response({"success": False, "message": "Movie not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser], parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Upsert movies from an uploaded JSONL or CSV file ("file"), keyed by imdb_id.
+        Returns the import summary with per-row errors.
+        """
+        try:
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({"success": False, "message": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+            fmt = request.data.get('format') or detect_format(upload.name)
+            if fmt not in ('jsonl', 'csv'):
+                return Response({"success": False, "message": "Format must be jsonl or csv."}, status=status.HTTP_400_BAD_REQUEST)
+
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+            summary = CatalogImporter().run(stream, fmt)
+            movie_logger.info(f"Catalog import: {summary['created']} created, {summary['updated']} updated, {summary['failed']} failed")
+            return Response({"success": True, "message": "Import finished", "data": summary}, status=status.HTTP_200_OK)
+        except UnicodeDecodeError:
+            return Response({"success": False, "message": "File must be UTF-8 encoded."}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     @action(detail=False, methods=['delete'])
     def delete_movie(self, request, imdb_id=None):
         permission_classes = [IsAdminUser]
@@ -70,15 +163,68 @@ class MovieViewSet(viewsets.ViewSet):
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class ShowViewSet(viewsets.ViewSet):
-    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+    throttle_classes = [AnonThrottle, UserThrottle]
 
     @action(detail=False, methods=['get'])
+    @replica_read
     def get_show_seats(self, request, show_id=None):
         try:
-            show = Show.objects.all().get(id=show_id)
-            seats = Seat.objects.filter(show=show)
-            serializer = SeatSerializer(seats, many=True)
-            return Response({"success": True, "message": serializer.data}, status=status.HTTP_200_OK)
+            def build():
+                screen_number, version = Show.objects.values_list('screen_id', 'screen__layout_version').get(id=show_id)
+                compiled = layouts.get_layout(screen_number, version) if screen_number is not None else None
+                return {"success": True, "message": fast_serializers.seats_of_show(show_id, compiled)}
+
+            # Served pre-rendered and pre-compressed until a seat of the show changes. Not from a
+            # per-process cache, the version would only move in the worker that changed a seat.
+            if cache_is_shared():
+                rendered = get_or_render(f"movies:show:{show_id}:seats:{seat_map_version(show_id)}", build)
+            else:
+                rendered = render(build())
+            return prerendered_response(request, rendered)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'])
+    @replica_read
+    def get_show_prices(self, request, show_id=None):
+        """
+        Current price per seat type. A seat costs prices[seat.type] * seat.price.
+        """
+        try:
+            show = Show.objects.select_related('price_table').get(id=show_id)
+            table = pricing.price_table(show)
+            data = {"show": show.id, "occupancy": table.occupancy, "prices": table.prices}
+            return Response({"success": True, "message": "Prices fetched successfully", "data": data}, status=status.HTTP_200_OK)
+        except Show.DoesNotExist:
+            return Response({"success": False, "message": "Show not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'])
+    @replica_read
+    def get_adjacent_seats(self, request, show_id=None):
+        """
+        Best block of adjacent available seats, closest to the middle of the house.
+        Query params: count (default 2), type (seat type, optional).
+        """
+        try:
+            count = request.query_params.get('count', '2')
+            seat_type = request.query_params.get('type') or None
+            if not count.isdigit() or not 1 <= int(count) <= 10:
+                return Response({"success": False, "message": "count must be between 1 and 10."}, status=status.HTTP_400_BAD_REQUEST)
+
+            screen_number, version = Show.objects.values_list('screen_id', 'screen__layout_version').get(id=show_id)
+            if screen_number is None:
+                return Response({"success": False, "message": "Show has no screen."}, status=status.HTTP_400_BAD_REQUEST)
+            compiled = layouts.get_layout(screen_number, version)
+            free = dict(Seat.objects.filter(show_id=show_id, state='available').values_list('id', 'uuid'))
+            seat_ids = layouts.find_adjacent(compiled, free, int(count), seat_type)
+            if seat_ids is None:
+                return Response({"success": False, "message": "No adjacent seats available."}, status=status.HTTP_404_NOT_FOUND)
+            data = [{"id": seat_id, "uuid": str(free[seat_id])} for seat_id in seat_ids]
+            return Response({"success": True, "message": "Seats found", "data": data}, status=status.HTTP_200_OK)
+        except Show.DoesNotExist:
+            return Response({"success": False, "message": "Show not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -101,12 +247,23 @@ class ShowViewSet(viewsets.ViewSet):
                 if overlapping_shows.exists():
                     return Response({"success": False, "message": "This show overlaps with another show."}, status=status.HTTP_400_BAD_REQUEST)
 
-                show = Show.objects.create(
-                    date_time=data['date_time'],
-                    movie=movie,
-                    screen=screen,
-                    base_price=data['base_price']
-                )
+                try:
+                    compiled = layouts.for_screen(screen)
+                except layouts.LayoutError as e:
+                    return Response({"success": False, "message": f"Invalid screen layout: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+                with transaction.atomic():
+                    show = Show.objects.create(
+                        date_time=data['date_time'],
+                        movie=movie,
+                        language=movie.language,
+                        screen=screen,
+                        base_price=data['base_price']
+                    )
+                    # One seat per seat of the screen's layout
+                    Seat.objects.bulk_create(layouts.seats_for_show(show, compiled))
+                bump_seat_map_version(show.id)
+                pricing.refresh_price_tables([show.id])
                 return Response({"success": True, "message": ShowSerializer(show).data}, status=status.HTTP_201_CREATED)
             return Response({"success": False, "message": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
@@ -0,0 +1,65 @@
+"""
+Async variants of the read-heavy catalog endpoints for the ASGI stack.
+
+DRF viewsets are synchronous, under ASGI every request to them hops to a
+worker thread. These views use the async ORM instead and produce the
+same payloads (same serializers, same JSON renderer) as their
+counterparts in movies/api.py. Querysets come from movies.queries and
+prefetch everything, so serialization never touches the database.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from movie_booking.db_router import reading_from_replica
+
+from . import queries, layouts
+from .models import Movie, Show
+from .serializers import MovieSerializer, ShowSerializer, SeatSerializer
+
+
+def json_response(payload, status_code=status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(payload), status=status_code, content_type='application/json')
+
+
+@require_GET
+async def list_movies(request):
+    try:
+        with reading_from_replica(await request.auser()):
+            movies = [movie async for movie in queries.catalog()]
+        return json_response({"success": True, "message": MovieSerializer(movies, many=True).data})
+    except Exception as e:
+        return json_response({"success": False, "message": str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+async def get_movie_shows(request, imdb_id):
+    try:
+        with reading_from_replica(await request.auser()):
+            shows = [show async for show in queries.movie_shows(imdb_id)]
+            missing = not shows and not await Movie.objects.filter(imdb_id=imdb_id).aexists()
+        if missing:
+            return json_response({"success": False, "message": "Movie not found"}, status.HTTP_404_NOT_FOUND)
+        data = ShowSerializer(shows, many=True).data
+        return json_response({"success": True, "message": "Shows fetched successfully", "data": data})
+    except Exception as e:
+        return json_response({"success": False, "message": str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+async def get_show_seats(request, show_id):
+    try:
+        with reading_from_replica(await request.auser()):
+            screen = await Show.objects.filter(id=show_id).values_list('screen_id', 'screen__layout_version').afirst()
+            seats = [seat async for seat in queries.show_seats(show_id)]
+        if screen is None:
+            return json_response({"success": False, "message": "Show matching query does not exist."}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        data = SeatSerializer(seats, many=True).data
+        if screen[0] is not None:
+            # A cold layout cache reads the screen, off the event loop
+            data = layouts.in_layout_order(await sync_to_async(layouts.get_layout)(*screen), data)
+        return json_response({"success": True, "message": data})
+    except Exception as e:
+        return json_response({"success": False, "message": str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
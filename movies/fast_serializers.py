@@ -0,0 +1,92 @@
+"""
+Read-only serializers for seat maps and show lists.
+
+They produce the same output as SeatSerializer and ShowSerializer but read
+plain rows with values_list() and build the dicts directly. That skips
+model instantiation and DRF's per-field dispatch, which dominate the cost
+of a response carrying hundreds of seats. Only use them for reads, they
+don't validate anything.
+"""
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from .models import Movie, Show, Seat
+from . import layouts
+
+
+SEAT_FIELDS = ('uuid', 'id', 'type', 'row', 'col', 'state', 'price')
+MOVIE_FIELDS = ('imdb_id', 'title', 'description', 'duration', 'poster', 'backdrop', 'release_datetime', 'imdb_page')
+
+# Same formatting (timezone, ISO 8601, "Z" suffix) as the ModelSerializer field
+_datetime = serializers.DateTimeField()
+
+
+def seat_dict(uuid, id, type, row, col, state, price):
+    return {
+        'uuid': str(uuid),
+        'id': id,
+        'type': type,
+        'row': row,
+        'col': col,
+        'state': state,
+        'price': float(price),
+    }
+
+
+def seats_of_show(show_id, compiled=None):
+    """
+    Seat map of one show, same shape as SeatSerializer(many=True).data.
+    In layout order when given the screen's compiled layout.
+    """
+    seats = [seat_dict(*row) for row in Seat.objects.filter(show_id=show_id).values_list(*SEAT_FIELDS)]
+    return layouts.in_layout_order(compiled, seats) if compiled else seats
+
+
+def seats_by_show(show_ids):
+    seats = defaultdict(list)
+    for row in Seat.objects.filter(show_id__in=show_ids).values_list('show_id', *SEAT_FIELDS):
+        seats[row[0]].append(seat_dict(*row[1:]))
+    return seats
+
+
+def movies_by_id(movie_ids):
+    """
+    Movies keyed by primary key, same shape as MovieSerializer.
+    """
+    genres = defaultdict(list)
+    for movie_id, name in Movie.genre.through.objects.filter(movie_id__in=movie_ids).values_list('movie_id', 'genre__name'):
+        genres[movie_id].append({'name': name})
+
+    movies = {}
+    for row in Movie.objects.filter(id__in=movie_ids).values_list('id', *MOVIE_FIELDS, 'language__name'):
+        movie = dict(zip(MOVIE_FIELDS, row[1:-1]))
+        movie['language'] = {'name': row[-1]}
+        movie['genre'] = genres[row[0]]
+        movies[row[0]] = movie
+    return movies
+
+
+def serialize_shows(shows):
+    """
+    Shows with their movie, screen and seats, same shape as ShowSerializer(many=True).data.
+    Accepts a Show queryset, runs four queries whatever its size.
+    """
+    rows = list(shows.values_list('id', 'date_time', 'movie_id', 'base_price', 'screen__number', 'screen__layout_version'))
+    movies = movies_by_id({row[2] for row in rows})
+    seats = seats_by_show([row[0] for row in rows])
+    return [
+        {
+            'id': show_id,
+            'date_time': _datetime.to_representation(date_time),
+            'movie': movies[movie_id],
+            'screen': {'number': screen_number, 'layout': layouts.get_layout(screen_number, version)['layout']} if screen_number is not None else None,
+            'base_price': float(base_price),
+            'seats': seats[show_id],
+        }
+        for show_id, date_time, movie_id, base_price, screen_number, version in rows
+    ]
+
+
+def movie_shows(imdb_id):
+    return serialize_shows(Show.objects.filter(movie__imdb_id=imdb_id))
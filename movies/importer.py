@@ -0,0 +1,207 @@
+"""
+Streaming bulk import of the movie catalog from JSONL or CSV.
+
+Rows are read one at a time and written in batches: languages and genres
+are resolved through in-memory lookup tables, movies are upserted by
+imdb_id and the genre through rows are replaced with one bulk insert per
+batch. A bad row is reported with its line number and skipped, it never
+aborts the import.
+"""
+import csv
+import json
+import os
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Movie, Language, Genre
+from .signals import bump_catalog_version
+
+
+MOVIE_FIELDS = ['title', 'description', 'duration', 'poster', 'backdrop', 'release_datetime', 'imdb_page']
+CSV_LIST_SEPARATOR = '|'
+NAME_MAX_LENGTH = Language._meta.get_field('name').max_length
+
+
+class RowError(Exception):
+    pass
+
+
+def detect_format(name, default='jsonl'):
+    extension = os.path.splitext(name or '')[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    return default
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (line_number, row) pairs from a text stream without loading it into memory.
+    A row that can't be decoded is yielded as a RowError.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, RowError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowError("Expected a JSON object")
+            continue
+        yield line_number, row
+
+
+def _name(value):
+    # Accept both plain names and the {"name": ...} shape MovieSerializer produces.
+    if isinstance(value, dict):
+        value = value.get('name')
+    return (value or '').strip()
+
+
+def _names(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(CSV_LIST_SEPARATOR)
+    return [name for name in (_name(item) for item in value) if name]
+
+
+class NameLookup:
+    """
+    Case-insensitive name -> id table for Language or Genre, loaded once.
+    Unknown names are created in bulk when a batch is flushed.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = {}
+        for pk, name in model.objects.order_by('pk').values_list('pk', 'name'):
+            self.ids.setdefault(name.casefold(), pk)
+
+    def missing(self, names):
+        return {name.casefold(): name for name in names if name.casefold() not in self.ids}
+
+    def create_missing(self, names):
+        missing = self.missing(names)
+        if not missing:
+            return
+        self.model.objects.bulk_create([self.model(name=name) for name in missing.values()])
+        for pk, name in self.model.objects.filter(name__in=missing.values()).values_list('pk', 'name'):
+            self.ids.setdefault(name.casefold(), pk)
+
+    def __getitem__(self, name):
+        return self.ids[name.casefold()]
+
+
+class CatalogImporter:
+
+    def __init__(self, batch_size=500, max_errors=1000, progress=None):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.progress = progress
+        self.languages = NameLookup(Language)
+        self.genres = NameLookup(Genre)
+        self.fields = {name: Movie._meta.get_field(name) for name in MOVIE_FIELDS + ['imdb_id']}
+        self.summary = {"processed": 0, "created": 0, "updated": 0, "failed": 0, "errors": []}
+
+    def run(self, stream, fmt):
+        batch = {}
+        for line_number, row in read_rows(stream, fmt):
+            self.summary['processed'] += 1
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                movie = self.clean_row(row)
+            except RowError as e:
+                self.add_error(line_number, row, str(e))
+                continue
+            # A later row for the same imdb_id wins, like a second upsert would.
+            batch[movie['imdb_id']] = (line_number, movie)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = {}
+        if batch:
+            self.flush(batch)
+        # Bulk writes don't send model signals, invalidate catalog caches once at the end.
+        bump_catalog_version()
+        return self.summary
+
+    def clean_row(self, row):
+        data = {}
+        try:
+            for name, field in self.fields.items():
+                value = row.get(name)
+                if isinstance(value, str):
+                    value = value.strip()
+                data[name] = field.clean(value, None)
+        except ValidationError as e:
+            raise RowError(f"{name}: {' '.join(e.messages)}")
+        data['language'] = _name(row.get('language'))
+        if not data['language']:
+            raise RowError("language: This field is required.")
+        data['genre'] = _names(row.get('genre', row.get('genres')))
+        for name in [data['language']] + data['genre']:
+            if len(name) > NAME_MAX_LENGTH:
+                raise RowError(f"Name longer than {NAME_MAX_LENGTH} characters: {name[:20]}...")
+        return data
+
+    def add_error(self, line_number, row, message):
+        self.summary['failed'] += 1
+        if len(self.summary['errors']) < self.max_errors:
+            imdb_id = row.get('imdb_id') if isinstance(row, dict) else None
+            self.summary['errors'].append({"line": line_number, "imdb_id": imdb_id, "error": message})
+
+    def flush(self, batch):
+        rows = [movie for _, movie in batch.values()]
+        # Lookup rows are committed on their own so a failed batch can't leave stale ids in the tables.
+        self.languages.create_missing(row['language'] for row in rows)
+        self.genres.create_missing(name for row in rows for name in row['genre'])
+        try:
+            with transaction.atomic():
+                self.write_batch(rows)
+        except Exception:
+            # Fall back to one row at a time so one bad row doesn't fail the whole batch.
+            for line_number, movie in batch.values():
+                try:
+                    with transaction.atomic():
+                        self.write_batch([movie])
+                except Exception as e:
+                    self.add_error(line_number, movie, str(e))
+        if self.progress:
+            self.progress(self.summary)
+
+    def write_batch(self, rows):
+        imdb_ids = [row['imdb_id'] for row in rows]
+        existing = set(Movie.objects.filter(imdb_id__in=imdb_ids).values_list('imdb_id', flat=True))
+        movies = [
+            Movie(language_id=self.languages[row['language']], **{name: row[name] for name in self.fields})
+            for row in rows
+        ]
+        Movie.objects.bulk_create(
+            movies,
+            update_conflicts=True,
+            unique_fields=['imdb_id'],
+            update_fields=MOVIE_FIELDS + ['language'],
+        )
+
+        movie_ids = dict(Movie.objects.filter(imdb_id__in=imdb_ids).values_list('imdb_id', 'id'))
+        Through = Movie.genre.through
+        Through.objects.filter(movie_id__in=movie_ids.values()).delete()
+        Through.objects.bulk_create([
+            Through(movie_id=movie_ids[row['imdb_id']], genre_id=genre_id)
+            for row in rows
+            for genre_id in {self.genres[name] for name in row['genre']}
+        ])
+
+        self.summary['updated'] += len(existing)
+        self.summary['created'] += len(rows) - len(existing)
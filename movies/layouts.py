@@ -0,0 +1,184 @@
+"""
+Compiled screen layouts.
+
+A layout is stored as {"rows": ["S_VV", ...]}: one string per row, S standard,
+V vip, P premium, D disabled and _ for an aisle. Rows are lettered from A,
+seats are numbered from 1 along the row, skipping aisles.
+
+The layout JSON is validated and compiled once per layout version into a
+compact structure: grid size, aisle columns, the seats in layout order, a
+seat id -> position index and the blocks of adjacent seats between aisles.
+Screen.layout_version is a digest of the layout, so a compiled layout never
+goes stale: it is kept in the shared cache and in a per-process dict, and a
+changed layout simply gets a new key. Seat generation, seat map ordering and
+the adjacent seat search all read the compiled form.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from .models import Screen, Seat
+
+
+SEAT_TYPES = {'S': 'standard', 'V': 'vip', 'P': 'premium', 'D': 'disabled'}
+AISLE = '_'
+# Seat.price is a multiplier of the show's price for the seat type
+PRICE_FACTORS = {'vip': 1.5, 'premium': 2}
+MAX_ROWS = 26
+MAX_COLS = 99
+
+CACHE_KEY = 'movies:screen:{}:layout:{}'
+
+# (screen number, layout version) -> compiled layout
+_compiled = {}
+
+
+class LayoutError(ValueError):
+    pass
+
+
+def layout_version(layout):
+    canonical = json.dumps(layout, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(canonical.encode(), digest_size=8).hexdigest()
+
+
+def validate(layout):
+    rows = layout.get('rows') if isinstance(layout, dict) else None
+    if not isinstance(rows, list) or not rows:
+        raise LayoutError('Layout must be {"rows": [...]} with at least one row.')
+    if len(rows) > MAX_ROWS:
+        raise LayoutError(f"A layout has at most {MAX_ROWS} rows.")
+    for index, line in enumerate(rows):
+        if not isinstance(line, str) or not line:
+            raise LayoutError(f"Row {index + 1} must be a non-empty string.")
+        if len(line) > MAX_COLS:
+            raise LayoutError(f"Row {index + 1} is longer than {MAX_COLS} columns.")
+        unknown = set(line) - set(SEAT_TYPES) - {AISLE}
+        if unknown:
+            raise LayoutError(f"Row {index + 1} has unknown seat codes: {''.join(sorted(unknown))}.")
+    if all(set(line) == {AISLE} for line in rows):
+        raise LayoutError("Layout has no seats.")
+
+
+def compile_layout(layout, version=None):
+    """
+    Validate a layout and compile it. Raises LayoutError.
+    """
+    validate(layout)
+    rows = layout['rows']
+    seats = []
+    blocks = []
+    for row_index, line in enumerate(rows):
+        row = chr(ord('A') + row_index)
+        col = 0
+        block = []
+        for x, code in enumerate(line):
+            if code == AISLE:
+                if block:
+                    blocks.append(block)
+                block = []
+                continue
+            col += 1
+            block.append(len(seats))
+            # (seat id, row, col, type, grid column)
+            seats.append((f"{row}{col}", row, col, SEAT_TYPES[code], x))
+        if block:
+            blocks.append(block)
+
+    cols = max(len(line) for line in rows)
+    return {
+        'version': version or layout_version(layout),
+        'layout': layout,
+        'rows': len(rows),
+        'cols': cols,
+        'aisles': [x for x in range(cols) if all(x >= len(line) or line[x] == AISLE for line in rows)],
+        'seats': seats,
+        'index': {seat[0]: position for position, seat in enumerate(seats)},
+        'blocks': blocks,
+    }
+
+
+def get_layout(number, version, layout=None):
+    """
+    Compiled layout of a screen at a layout version. Pass the layout JSON
+    when it is already loaded, otherwise it is only read on a cache miss.
+    """
+    if not version:
+        # Screens created in bulk skip the pre_save receiver and have no version yet
+        if layout is None:
+            layout = Screen.objects.values_list('layout', flat=True).get(number=number)
+        version = layout_version(layout)
+    compiled = _compiled.get((number, version))
+    if compiled is not None:
+        return compiled
+    key = CACHE_KEY.format(number, version)
+    compiled = cache.get(key)
+    if compiled is None:
+        if layout is None:
+            layout = Screen.objects.values_list('layout', flat=True).get(number=number)
+        compiled = compile_layout(layout, version)
+        cache.set(key, compiled, timeout=None)
+    _compiled[(number, version)] = compiled
+    return compiled
+
+
+def for_screen(screen):
+    return get_layout(screen.number, screen.layout_version, screen.layout)
+
+
+def seats_for_show(show, compiled):
+    """
+    Unsaved Seat rows of a show, one per seat of the compiled layout.
+    """
+    return [
+        Seat(
+            id=seat_id,
+            type=seat_type,
+            row=row,
+            col=col,
+            show=show,
+            # Disabled seats are booked by default, bulk_create skips Seat.save()
+            state='booked' if seat_type == 'disabled' else 'available',
+            price=PRICE_FACTORS.get(seat_type, 1),
+        )
+        for seat_id, row, col, seat_type, _ in compiled['seats']
+    ]
+
+
+def in_layout_order(compiled, seats, seat_id=lambda seat: seat['id']):
+    """
+    Sort seats (dicts by default) in layout order, seats the layout doesn't know go last.
+    """
+    index = compiled['index']
+    return sorted(seats, key=lambda seat: index.get(seat_id(seat), len(index)))
+
+
+def find_adjacent(compiled, free_ids, count, seat_type=None):
+    """
+    Best run of `count` adjacent free seats (same row, no aisle in between),
+    closest to the middle of the house. Returns their seat ids or None.
+    """
+    seats = compiled['seats']
+    middle_row = (compiled['rows'] - 1) / 2
+    middle_col = (compiled['cols'] - 1) / 2
+    best = None
+    best_score = None
+    for block in compiled['blocks']:
+        run = 0
+        for offset, position in enumerate(block):
+            seat_id, row, _, kind, _ = seats[position]
+            if seat_id in free_ids and (seat_type is None or kind == seat_type):
+                run += 1
+            else:
+                run = 0
+            if run < count:
+                continue
+            window = block[offset - count + 1:offset + 1]
+            centre = (seats[window[0]][4] + seats[window[-1]][4]) / 2
+            score = abs(centre - middle_col) + abs(ord(row) - ord('A') - middle_row)
+            if best_score is None or score < best_score:
+                best, best_score = window, score
+    if best is None:
+        return None
+    return [seats[position][0] for position in best]
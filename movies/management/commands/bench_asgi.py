@@ -0,0 +1,100 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+
+from bookings.management.commands.seed_benchmark import BENCH_PREFIX
+from movie_booking.bench import summarize, write_results
+from movies.models import Show
+
+
+# Endpoint name -> (sync DRF path, async view path), formatted with a movie and a show
+ENDPOINTS = {
+    'list_movies': ('/movie/list_movies/', '/async/movie/list_movies/'),
+    'movie_shows': ('/movie/{imdb_id}/shows/', '/async/movie/{imdb_id}/shows/'),
+    'show_seats': ('/show/{show_id}/seats/', '/async/show/{show_id}/seats/'),
+}
+
+
+class Command(BaseCommand):
+    help = "Compare throughput of the catalog endpoints under WSGI (sync views, threads) and ASGI (async views, one event loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight at once.")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint and stack.")
+        parser.add_argument('--hot-shows', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output')
+
+    def handle(self, *args, **options):
+        settings.DEBUG = False
+        # Measure the endpoints, not the rate limits
+        settings.RATE_LIMITS = {}
+        rng = random.Random(options['seed'])
+        shows = list(Show.objects.filter(movie__imdb_id__startswith=BENCH_PREFIX).values_list('id', 'movie__imdb_id'))
+        if not shows:
+            raise CommandError("No benchmark shows found, run seed_benchmark first.")
+        targets = [rng.choice(shows) for _ in range(options['requests'])]
+        connection.close()
+
+        results = {"wsgi": {}, "asgi": {}}
+        for name, (sync_path, async_path) in ENDPOINTS.items():
+            paths = [sync_path.format(show_id=show_id, imdb_id=imdb_id) for show_id, imdb_id in targets]
+            results["wsgi"][name] = self.run_wsgi(paths, options['concurrency'])
+            paths = [async_path.format(show_id=show_id, imdb_id=imdb_id) for show_id, imdb_id in targets]
+            results["asgi"][name] = asyncio.run(self.run_asgi(paths, options['concurrency']))
+
+        results['parameters'] = {key: options[key] for key in ('concurrency', 'requests', 'hot_shows', 'seed')}
+        path = write_results('asgi', results, options['output'])
+        for stack in ('wsgi', 'asgi'):
+            for name, summary in results[stack].items():
+                self.stdout.write(
+                    f"{stack} {name:12} {summary['throughput_rps']:>8} req/s "
+                    f"p50={summary['latency']['p50_ms']}ms p95={summary['latency']['p95_ms']}ms errors={summary['errors']}")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    def run_wsgi(self, paths, concurrency):
+        """
+        One test client per request, sync views served from a thread pool.
+        """
+        def fetch(path):
+            started = time.perf_counter()
+            try:
+                status_code = Client().get(path).status_code
+            finally:
+                connection.close()
+            return time.perf_counter() - started, status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(fetch, paths))
+        return self.summary(samples, time.perf_counter() - started)
+
+    async def run_asgi(self, paths, concurrency):
+        """
+        All requests on one event loop, at most `concurrency` in flight.
+        """
+        client = AsyncClient()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def fetch(path):
+            async with limit:
+                started = time.perf_counter()
+                response = await client.get(path)
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        samples = await asyncio.gather(*(fetch(path) for path in paths))
+        return self.summary(samples, time.perf_counter() - started)
+
+    def summary(self, samples, elapsed):
+        return {
+            "throughput_rps": round(len(samples) / elapsed, 1),
+            "errors": sum(1 for _, status_code in samples if status_code >= 400),
+            "latency": summarize([latency for latency, _ in samples]),
+        }
@@ -0,0 +1,91 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.management.commands.seed_benchmark import build_layout, seats_for_layout
+from movie_booking.bench import summarize, time_call, write_results
+from movies import fast_serializers
+from movies.models import Movie, Show, Seat
+from movies.serializers import SeatSerializer, ShowSerializer
+
+
+# Seat count -> (rows, columns including the two aisles)
+SHOW_SIZES = {300: (15, 22), 1000: (25, 42)}
+
+
+class Rollback(Exception):
+    pass
+
+
+def normalized(data):
+    # Same dict keys and values, whatever their order. Lists, genres and seats
+    # included, must come out in the same order
+    return json.loads(json.dumps(data, sort_keys=True, default=str))
+
+
+class Command(BaseCommand):
+    help = "Compare DRF and values_list serializers on seat maps and show lists of 300 and 1000 seat shows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--output')
+
+    def handle(self, *args, **options):
+        settings.DEBUG = False
+        movie = Movie.objects.order_by('id').first()
+        if movie is None:
+            raise CommandError("No movies found, run seed_benchmark first.")
+
+        results = {}
+        try:
+            # The measured shows are created in a transaction that is rolled back
+            with transaction.atomic():
+                for size, (rows, cols) in SHOW_SIZES.items():
+                    results[f"{size}_seats"] = self.measure(movie, rows, cols, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        results['parameters'] = {'repeat': options['repeat']}
+        path = write_results('serializers', results, options['output'])
+        for name, cases in results.items():
+            if name == 'parameters':
+                continue
+            for case, summary in cases.items():
+                if case == 'seat_count':
+                    continue
+                self.stdout.write(
+                    f"{name:10} {case:11} drf p50={summary['drf']['p50_ms']}ms fast p50={summary['fast']['p50_ms']}ms "
+                    f"speedup x{summary['speedup_p50']} same output: {summary['same_output']}")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    def measure(self, movie, rows, cols, repeat):
+        show = Show.objects.create(date_time=timezone.now(), movie=movie, language_id=movie.language_id, base_price=10)
+        Seat.objects.bulk_create(seats_for_layout(show, build_layout(rows, cols)))
+        shows = Show.objects.filter(id=show.id)
+
+        cases = {
+            'seat_map': (
+                lambda: SeatSerializer(Seat.objects.filter(show_id=show.id), many=True).data,
+                lambda: fast_serializers.seats_of_show(show.id),
+            ),
+            'show_list': (
+                lambda: ShowSerializer(
+                    shows.select_related('movie__language', 'screen').prefetch_related('movie__genre', 'seats'), many=True).data,
+                lambda: fast_serializers.serialize_shows(shows),
+            ),
+        }
+        measured = {'seat_count': Seat.objects.filter(show=show).count()}
+        for case, (drf, fast) in cases.items():
+            drf_summary = summarize(time_call(drf, repeat))
+            fast_summary = summarize(time_call(fast, repeat))
+            measured[case] = {
+                'drf': drf_summary,
+                'fast': fast_summary,
+                'speedup_p50': round(drf_summary['p50_ms'] / fast_summary['p50_ms'], 2),
+                'same_output': normalized(drf()) == normalized(fast()),
+            }
+        return measured
@@ -0,0 +1,102 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.management.commands.seed_benchmark import BENCH_PREFIX
+from movie_booking.bench import write_results
+from movies.models import Show
+
+
+# Runs in a fresh interpreter: load the WSGI app, optionally warm it, then time the first requests
+WORKER_SCRIPT = r"""
+import json, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+loaded = time.perf_counter()
+
+from django.conf import settings
+settings.ALLOWED_HOSTS = ['*']
+settings.RATE_LIMITS = {}
+warmup = 0.0
+if sys.argv[1] == 'warm':
+    from movie_booking.warmup import warm
+    warm_started = time.perf_counter()
+    warm()
+    warmup = time.perf_counter() - warm_started
+
+from django.test import Client
+client = Client()
+first_requests = {}
+for name, path in json.loads(sys.argv[2]).items():
+    request_started = time.perf_counter()
+    status = client.get(path).status_code
+    first_requests[name] = {"ms": round((time.perf_counter() - request_started) * 1000, 3), "status": status}
+
+print(json.dumps({
+    "load_s": loaded - started,
+    "warmup_s": warmup,
+    "first_requests": first_requests,
+    "lazy_modules_loaded": [name for name in ('qrcode', 'PIL', 'pyotp', 'django_ratelimit', 'aiosmtplib') if name in sys.modules],
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure worker startup: app load time and first request latency, cold and after the pre-fork warmup."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per mode.")
+        parser.add_argument('--output')
+
+    def handle(self, *args, **options):
+        show = Show.objects.filter(movie__imdb_id__startswith=BENCH_PREFIX).values_list('id', 'movie__imdb_id').first()
+        if show is None:
+            raise CommandError("No benchmark shows found, run seed_benchmark first.")
+        paths = {
+            'list_movies': '/movie/list_movies/',
+            'movie_shows': f'/movie/{show[1]}/shows/',
+            'show_seats': f'/show/{show[0]}/seats/',
+        }
+
+        results = {mode: self.measure(mode, paths, options['runs']) for mode in ('cold', 'warm')}
+        results['parameters'] = {'runs': options['runs']}
+        path = write_results('startup', results, options['output'])
+        for mode in ('cold', 'warm'):
+            summary = results[mode]
+            requests = ' '.join(f"{name}={ms}ms" for name, ms in summary['first_request_ms'].items())
+            self.stdout.write(
+                f"{mode:4} load={summary['load_s']}s warmup={summary['warmup_s']}s first requests: {requests} "
+                f"lazy modules loaded: {summary['lazy_modules_loaded'] or 'none'}")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    def measure(self, mode, paths, runs):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            'PYTHONPATH': os.pathsep.join(path for path in sys.path if path),
+        }
+        samples = []
+        for _ in range(runs):
+            completed = subprocess.run(
+                [sys.executable, '-c', WORKER_SCRIPT, mode, json.dumps(paths)],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+            if completed.returncode != 0:
+                raise CommandError(f"Worker failed: {completed.stderr[-2000:]}")
+            samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+        median = lambda values: round(statistics.median(values), 4)
+        return {
+            "load_s": median([sample['load_s'] for sample in samples]),
+            "warmup_s": median([sample['warmup_s'] for sample in samples]),
+            "first_request_ms": {
+                name: median([sample['first_requests'][name]['ms'] for sample in samples]) for name in paths
+            },
+            "statuses": {name: samples[-1]['first_requests'][name]['status'] for name in paths},
+            "lazy_modules_loaded": sorted({name for sample in samples for name in sample['lazy_modules_loaded']}),
+        }
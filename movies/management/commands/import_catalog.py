@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from movies.importer import CatalogImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = "Bulk import movies from a JSONL or CSV file (upsert by imdb_id). Use - to read stdin."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help="Defaults to the file extension, jsonl for stdin.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-errors', type=int, default=1000, help="Row errors to keep in the report.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+
+        def progress(summary):
+            self.stdout.write(
+                f"processed={summary['processed']} created={summary['created']} "
+                f"updated={summary['updated']} failed={summary['failed']}")
+
+        importer = CatalogImporter(options['batch_size'], options['max_errors'], progress)
+        if options['path'] == '-':
+            summary = importer.run(sys.stdin, fmt)
+        else:
+            try:
+                stream = open(options['path'], newline='', encoding='utf-8')
+            except OSError as e:
+                raise CommandError(str(e))
+            with stream:
+                summary = importer.run(stream, fmt)
+
+        for error in summary['errors']:
+            self.stderr.write(f"line {error['line']} ({error['imdb_id']}): {error['error']}")
+        style = self.style.SUCCESS if not summary['failed'] else self.style.WARNING
+        self.stdout.write(style(
+            f"Done: {summary['created']} created, {summary['updated']} updated, {summary['failed']} failed."))
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+# The indexed expressions must match the ones movies.search queries with.
+CREATE_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """CREATE INDEX IF NOT EXISTS movies_movie_fulltext_idx ON movies_movie
+       USING gin (to_tsvector('simple', coalesce("movies_movie"."title", '') || ' ' || coalesce("movies_movie"."description", '')))""",
+    """CREATE INDEX IF NOT EXISTS movies_movie_title_trgm_idx ON movies_movie
+       USING gin ("title" gin_trgm_ops)""",
+]
+DROP_SQL = [
+    "DROP INDEX IF EXISTS movies_movie_title_trgm_idx",
+    "DROP INDEX IF EXISTS movies_movie_fulltext_idx",
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        # Other backends search through the in-process index in movies.search.
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_show_screen_seat_locked_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgresql(CREATE_SQL), run_on_postgresql(DROP_SQL)),
+    ]
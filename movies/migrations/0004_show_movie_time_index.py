@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_movie_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='show',
+            index=models.Index(fields=['movie', 'date_time'], name='movies_show_movie_time_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+import uuid
+
+from django.db import migrations, models
+
+
+def seat_key_tables(apps):
+    Seat = apps.get_model('movies', 'Seat')
+    Booking = apps.get_model('bookings', 'Booking')
+    draftBooking = apps.get_model('bookings', 'draftBooking')
+    return [
+        (Seat._meta.db_table, 'uuid'),
+        (Booking._meta.get_field('seats').remote_field.through._meta.db_table, 'seat_id'),
+        (draftBooking._meta.get_field('seats').remote_field.through._meta.db_table, 'seat_id'),
+    ]
+
+
+def strip_dashes(apps, schema_editor):
+    """
+    Seat keys were stored as dashed strings. PostgreSQL casts them to its
+    native uuid type in ALTER COLUMN, other backends store UUIDField as 32
+    hex characters so the stored keys are rewritten to match.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for table, column in seat_key_tables(apps):
+        schema_editor.execute(f"UPDATE {quote(table)} SET {quote(column)} = REPLACE({quote(column)}, '-', '')")
+
+
+def add_dashes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for table, column in seat_key_tables(apps):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"SELECT DISTINCT {quote(column)} FROM {quote(table)}")
+            values = [row[0] for row in cursor.fetchall()]
+            cursor.executemany(
+                f"UPDATE {quote(table)} SET {quote(column)} = %s WHERE {quote(column)} = %s",
+                [(str(uuid.UUID(value)), value) for value in values if value and '-' not in value],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_show_movie_time_index'),
+        ('bookings', '0003_draftbooking_seats_alluserbookings_seats'),
+    ]
+
+    operations = [
+        migrations.RunPython(strip_dashes, add_dashes),
+        migrations.AlterField(
+            model_name='seat',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_seat_native_uuid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSeatMap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('seats', models.JSONField(default=list)),
+                ('show', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archived_seats', to='movies.show')),
+            ],
+        ),
+    ]
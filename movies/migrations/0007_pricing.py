@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('active', models.BooleanField(default=True)),
+                ('seat_type', models.CharField(blank=True, choices=[('standard', 'Standard'), ('vip', 'VIP'), ('premium', 'Premium'), ('disabled', 'Disabled')], default='', max_length=10)),
+                ('weekdays', models.CharField(blank=True, default='', max_length=7)),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('min_occupancy', models.FloatField(blank=True, null=True)),
+                ('max_occupancy', models.FloatField(blank=True, null=True)),
+                ('multiplier', models.FloatField(default=1)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ShowPriceTable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prices', models.JSONField(default=dict)),
+                ('occupancy', models.FloatField(default=0)),
+                ('rules_version', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('show', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='price_table', to='movies.show')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_pricing'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='seat',
+            index=models.Index(fields=['state', 'locked_at'], name='movies_seat_state_lock_idx'),
+        ),
+    ]
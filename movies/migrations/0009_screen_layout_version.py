@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:15
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def set_layout_versions(apps, schema_editor):
+    # Same digest as movies.layouts.layout_version
+    Screen = apps.get_model('movies', 'Screen')
+    for screen in Screen.objects.all():
+        canonical = json.dumps(screen.layout, sort_keys=True, separators=(',', ':'))
+        screen.layout_version = hashlib.blake2b(canonical.encode(), digest_size=8).hexdigest()
+        screen.save(update_fields=['layout_version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0008_seat_state_lock_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screen',
+            name='layout_version',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16),
+        ),
+        migrations.RunPython(set_layout_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:48
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def create_version(apps, schema_editor):
+    # Past every version the cache handed out, the price tables recompile on first use
+    compiled = apps.get_model('movies', 'ShowPriceTable').objects.aggregate(version=Max('rules_version'))['version']
+    apps.get_model('movies', 'PricingRulesVersion').objects.create(version=(compiled or 0) + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0009_screen_layout_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRulesVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.IntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 import uuid
 
@@ -36,15 +37,32 @@ class Show(models.Model):
     date_time = models.DateTimeField()
     movie = models.ForeignKey('Movie' , on_delete=models.CASCADE)
     language = models.ForeignKey('Language' , on_delete=models.CASCADE)
+    screen = models.ForeignKey('Screen' , on_delete=models.CASCADE , null=True , blank=True)
     base_price = models.FloatField()
 
+    class Meta:
+        indexes = [
+            # Showtime calendar: shows of one movie ordered by time
+            models.Index(fields=['movie', 'date_time'], name='movies_show_movie_time_idx'),
+        ]
+
     def __str__(self):
         return str(self.date_time)
 
 
 class Screen(models.Model):
     number = models.IntegerField(primary_key=True)
+    # See movies/layouts.py for the format
     layout = models.JSONField()
+    # Digest of the layout, set on save, keys the compiled layout cache
+    layout_version = models.CharField(max_length=16, blank=True, default='', editable=False)
+
+    def clean(self):
+        from .layouts import validate, LayoutError
+        try:
+            validate(self.layout)
+        except LayoutError as e:
+            raise ValidationError({'layout': str(e)})
 
     def __str__(self):
         return str(self.number)
@@ -63,14 +81,22 @@ class Seat(models.Model):
         ('premium', 'Premium'),
         ('disabled', 'Disabled'),
     ]
-    uuid = models.CharField(primary_key=True, default=uuid.uuid4, editable=False)
+    uuid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     id = models.CharField(max_length=5)
     type = models.CharField(max_length=10, choices=SEAT_TYPE_CHOICES, default='standard')
     row = models.CharField(max_length=1)
     col = models.IntegerField()
-    show = models.ForeignKey("Show", on_delete=models.CASCADE)
+    show = models.ForeignKey("Show", on_delete=models.CASCADE, related_name='seats')
     state = models.CharField(max_length=10, choices=STATE_CHOICES, default='available')
+    locked_at = models.DateTimeField(null=True, blank=True)
     price = models.FloatField(default=1)
+
+    class Meta:
+        indexes = [
+            # Stale lock lookups and the admin state filter
+            models.Index(fields=['state', 'locked_at'], name='movies_seat_state_lock_idx'),
+        ]
+
     #It is business rule in the movie hall that if a seat is disabled, it is booked by default.
     def save(self, *args, **kwargs):
         if self.type == 'disabled':
@@ -80,3 +106,72 @@ class Seat(models.Model):
     def __str__(self):
         return f"{self.id} - {self.state}"
 
+
+class ArchivedSeatMap(models.Model):
+    """
+    Seats of a past show, moved out of the seat table by archive_past_shows.
+    One row per show instead of one per seat, seats are stored as
+    [id, type, state, price] lists in layout order.
+    """
+    show = models.OneToOneField("Show", on_delete=models.CASCADE, related_name='archived_seats')
+    archived_at = models.DateTimeField(auto_now_add=True)
+    seats = models.JSONField(default=list)
+
+    def seat_list(self):
+        return [
+            {'id': id, 'type': type, 'state': state, 'price': price}
+            for id, type, state, price in self.seats
+        ]
+
+    def __str__(self):
+        return f"Archived seats of show {self.show_id}"
+
+
+class PricingRule(models.Model):
+    """
+    Price multiplier applied to the seats of matching shows. Empty conditions
+    match everything, the multipliers of all matching rules are combined.
+    Compiled into ShowPriceTable rows by movies.pricing.
+    """
+    name = models.CharField(max_length=100)
+    active = models.BooleanField(default=True)
+    seat_type = models.CharField(max_length=10, choices=Seat.SEAT_TYPE_CHOICES, blank=True, default='')
+    # Weekday digits of the show start, 0 = Monday, e.g. "56" for weekends
+    weekdays = models.CharField(max_length=7, blank=True, default='')
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
+    # Occupancy of the show as a fraction of its seats, booked or held
+    min_occupancy = models.FloatField(null=True, blank=True)
+    max_occupancy = models.FloatField(null=True, blank=True)
+    multiplier = models.FloatField(default=1)
+
+    def __str__(self):
+        return f"{self.name} (x{self.multiplier})"
+
+
+class PricingRulesVersion(models.Model):
+    """
+    One row counting the changes of the pricing rules, bumped in the
+    transaction of the change. A row rather than a cache key: every worker
+    sees it, whatever the cache backend.
+    """
+    version = models.IntegerField(default=1)
+
+    def __str__(self):
+        return f"Pricing rules v{self.version}"
+
+
+class ShowPriceTable(models.Model):
+    """
+    Price per seat type of one show for its current occupancy. A seat costs
+    prices[seat.type] * seat.price.
+    """
+    show = models.OneToOneField("Show", on_delete=models.CASCADE, related_name='price_table')
+    prices = models.JSONField(default=dict)
+    # Occupancy the prices were compiled for, refreshed when it crosses a rule boundary
+    occupancy = models.FloatField(default=0)
+    rules_version = models.IntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Prices of show {self.show_id}"
@@ -0,0 +1,160 @@
+"""
+Dynamic pricing.
+
+PricingRule rows (by seat type, weekday, time of day and occupancy) are
+compiled into one ShowPriceTable per show: the price of every seat type for
+the show's current occupancy. Tables are compiled when a show is created and
+recompiled when its occupancy crosses the bounds of a rule (confirm, cancel,
+checkout, holds), so pricing a seat is a dict lookup on a row fetched with
+select_related. The rules version is a database row (PricingRulesVersion),
+each process reads it at most every PRICING_RULES_TTL seconds and keeps the
+active rules until it moves.
+
+A price table without any matching rule gives the historic price,
+seat.price * show.base_price.
+"""
+import time
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import PricingRule, PricingRulesVersion, Seat, Show, ShowPriceTable
+
+
+_rules = {'version': None, 'rules': []}
+_version = {'version': None, 'checked_at': 0.0}
+
+
+def rules_version():
+    # Read from the database at most once per TTL, price lookups don't query it
+    now = time.monotonic()
+    if _version['version'] is None or now - _version['checked_at'] >= getattr(settings, 'PRICING_RULES_TTL', 5):
+        _version['version'] = PricingRulesVersion.objects.values_list('version', flat=True).first() or 1
+        _version['checked_at'] = now
+    return _version['version']
+
+
+def bump_rules_version():
+    if not PricingRulesVersion.objects.update(version=F('version') + 1):
+        PricingRulesVersion.objects.create(version=2)
+    # This process sees its own change at once, the others within the TTL
+    _version['version'] = None
+
+
+def active_rules(version):
+    # Rules change rarely, each process keeps them until the version moves
+    if _rules['version'] != version:
+        _rules['rules'] = list(PricingRule.objects.filter(active=True))
+        _rules['version'] = version
+    return _rules['rules']
+
+
+def rule_matches(rule, seat_type, start, occupancy):
+    if rule.seat_type and rule.seat_type != seat_type:
+        return False
+    if rule.weekdays and str(start.weekday()) not in rule.weekdays:
+        return False
+    if rule.start_time is not None and rule.end_time is not None:
+        if rule.start_time <= rule.end_time:
+            if not rule.start_time <= start.time() < rule.end_time:
+                return False
+        # Window across midnight, e.g. 22:00 - 02:00
+        elif rule.end_time <= start.time() < rule.start_time:
+            return False
+    if rule.min_occupancy is not None and occupancy < rule.min_occupancy:
+        return False
+    if rule.max_occupancy is not None and occupancy >= rule.max_occupancy:
+        return False
+    return True
+
+
+def occupancy_band(occupancy, rules):
+    """
+    The rules whose occupancy bounds hold, prices only move when this does.
+    """
+    return {
+        rule.pk for rule in rules
+        if (rule.min_occupancy is None or occupancy >= rule.min_occupancy)
+        and (rule.max_occupancy is None or occupancy < rule.max_occupancy)
+    }
+
+
+def compute_prices(show, occupancy, rules):
+    start = timezone.localtime(show.date_time)
+    prices = {}
+    for seat_type, _ in Seat.SEAT_TYPE_CHOICES:
+        multiplier = 1
+        for rule in rules:
+            if rule_matches(rule, seat_type, start, occupancy):
+                multiplier *= rule.multiplier
+        prices[seat_type] = show.base_price * multiplier
+    return prices
+
+
+def show_occupancy(show_id):
+    counts = Seat.objects.filter(show_id=show_id).aggregate(
+        total=Count('pk'), taken=Count('pk', filter=Q(state__in=['booked', 'locked'])))
+    return counts['taken'] / counts['total'] if counts['total'] else 0.0
+
+
+def compile_price_table(show, occupancy=None):
+    """
+    (Re)compute the price table of a show for its current occupancy.
+    """
+    version = rules_version()
+    if occupancy is None:
+        occupancy = show_occupancy(show.pk)
+    table, _ = ShowPriceTable.objects.update_or_create(show=show, defaults={
+        'prices': compute_prices(show, occupancy, active_rules(version)),
+        'occupancy': occupancy,
+        'rules_version': version,
+    })
+    show.price_table = table
+    return table
+
+
+def refresh_price_tables(show_ids):
+    """
+    Recompile after an occupancy change of these shows, the tables whose
+    occupancy crossed a rule bound or whose rules changed.
+    """
+    version = rules_version()
+    bounded = [rule for rule in active_rules(version) if rule.min_occupancy is not None or rule.max_occupancy is not None]
+    for show in Show.objects.filter(pk__in=show_ids).select_related('price_table'):
+        try:
+            table = show.price_table
+        except ShowPriceTable.DoesNotExist:
+            table = None
+        if table is None or table.rules_version < version:
+            compile_price_table(show)
+        elif bounded:
+            # Without occupancy rules the prices don't depend on it, not even a count
+            occupancy = show_occupancy(show.pk)
+            if occupancy_band(occupancy, bounded) != occupancy_band(table.occupancy, bounded):
+                compile_price_table(show, occupancy)
+
+
+def price_table(show):
+    """
+    The show's price table, compiled on first use (shows created in bulk)
+    and after the rules changed. Fetch shows with
+    select_related('price_table'), a lookup then needs no query.
+    """
+    try:
+        table = show.price_table
+    except ShowPriceTable.DoesNotExist:
+        table = None
+    # A newer table was compiled by a process that saw the change first
+    if table is None or table.rules_version < rules_version():
+        table = compile_price_table(show)
+    return table
+
+
+def seat_price(table, seat):
+    return table.prices[seat.type] * seat.price
+
+
+def total_price(show, seats):
+    table = price_table(show)
+    return sum(seat_price(table, seat) for seat in seats)
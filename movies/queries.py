@@ -0,0 +1,21 @@
+"""
+Querysets of the read-heavy catalog endpoints, shared by the sync DRF
+views and their async variants so both load exactly the same rows.
+Everything the serializers touch is joined or prefetched up front.
+"""
+from .models import Movie, Show, Seat
+
+
+def catalog():
+    return Movie.objects.select_related('language').prefetch_related('genre')
+
+
+def movie_shows(imdb_id):
+    return (Show.objects
+            .filter(movie__imdb_id=imdb_id)
+            .select_related('movie__language', 'screen')
+            .prefetch_related('movie__genre', 'seats'))
+
+
+def show_seats(show_id):
+    return Seat.objects.filter(show_id=show_id)
@@ -0,0 +1,218 @@
+"""
+Ranked movie search over title and description with facets.
+
+On PostgreSQL the match runs on a full-text GIN index plus a trigram index
+on the title (see migration 0003). Other backends (SQLite test runs) use an
+in-process inverted index built from the catalog and rebuilt whenever the
+catalog version changes.
+"""
+import bisect
+import math
+import re
+import threading
+from collections import defaultdict, Counter
+from datetime import datetime, time, timedelta
+
+from django.db import connection
+from django.db.models import BooleanField, Count, FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Movie, Show
+from .signals import catalog_version
+
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+TITLE_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+FACET_CHUNK = 500
+
+
+def tokenize(text):
+    return TOKEN.findall((text or '').casefold())
+
+
+def _date_facets(movie_ids):
+    """
+    Upcoming showtime dates for the matching movies.
+    """
+    counts = Counter()
+    movie_ids = list(movie_ids)
+    now = timezone.now()
+    for start in range(0, len(movie_ids), FACET_CHUNK):
+        rows = (Show.objects
+                .filter(movie_id__in=movie_ids[start:start + FACET_CHUNK], date_time__gte=now)
+                .annotate(day=TruncDate('date_time'))
+                .values('day')
+                .annotate(count=Count('movie_id', distinct=True)))
+        for row in rows:
+            counts[row['day'].isoformat()] += row['count']
+    return dict(sorted(counts.items()))
+
+
+def _movies_showing_on(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = start + timedelta(days=1)
+    return Show.objects.filter(date_time__gte=start, date_time__lt=end).values_list('movie_id', flat=True)
+
+
+class InvertedIndex:
+    """
+    Token -> {movie_id: weight} postings for the whole catalog.
+    The last query token also matches as a prefix so partial words work while typing.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.postings = defaultdict(dict)
+        self.docs = {}
+        for movie_id, imdb_id, title, description, poster, language in (
+                Movie.objects.values_list('id', 'imdb_id', 'title', 'description', 'poster', 'language__name').iterator(chunk_size=2000)):
+            self.docs[movie_id] = {"imdb_id": imdb_id, "title": title, "poster": poster, "language": language, "genre": []}
+            for token in tokenize(title):
+                self.postings[token][movie_id] = self.postings[token].get(movie_id, 0) + TITLE_WEIGHT
+            for token in tokenize(description):
+                self.postings[token][movie_id] = self.postings[token].get(movie_id, 0) + DESCRIPTION_WEIGHT
+        for movie_id, genre in Movie.genre.through.objects.values_list('movie_id', 'genre__name').iterator(chunk_size=5000):
+            if movie_id in self.docs:
+                self.docs[movie_id]['genre'].append(genre)
+        self.vocabulary = sorted(self.postings)
+        self.by_title = sorted(self.docs, key=lambda movie_id: self.docs[movie_id]['title'].casefold())
+
+    def _prefix_postings(self, prefix):
+        merged = {}
+        index = bisect.bisect_left(self.vocabulary, prefix)
+        while index < len(self.vocabulary) and self.vocabulary[index].startswith(prefix):
+            for movie_id, weight in self.postings[self.vocabulary[index]].items():
+                merged[movie_id] = max(merged.get(movie_id, 0), weight)
+            index += 1
+        return merged
+
+    def search(self, query):
+        """
+        Return [(movie_id, score)] sorted by score, every query token must match.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return [(movie_id, 0.0) for movie_id in self.by_title]
+        total = len(self.docs) or 1
+        scores = None
+        for position, token in enumerate(tokens):
+            postings = self.postings.get(token, {})
+            if position == len(tokens) - 1 and len(token) > 1:
+                postings = {**self._prefix_postings(token), **postings}
+            if not postings:
+                return []
+            idf = math.log(1 + total / len(postings))
+            if scores is None:
+                scores = {movie_id: weight * idf for movie_id, weight in postings.items()}
+            else:
+                scores = {movie_id: score + postings[movie_id] * idf for movie_id, score in scores.items() if movie_id in postings}
+        return sorted(scores.items(), key=lambda item: (-item[1], self.docs[item[0]]['title']))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    version = catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = InvertedIndex(version)
+            index = _index
+    return index
+
+
+def _fallback_search(query, language, genre, day, limit, offset):
+    index = get_index()
+    matches = index.search(query)
+    if language:
+        matches = [m for m in matches if (index.docs[m[0]]['language'] or '').casefold() == language.casefold()]
+    if genre:
+        matches = [m for m in matches if genre.casefold() in (g.casefold() for g in index.docs[m[0]]['genre'])]
+    if day:
+        showing = set(_movies_showing_on(day))
+        matches = [m for m in matches if m[0] in showing]
+
+    languages = Counter(index.docs[movie_id]['language'] for movie_id, _ in matches)
+    genres = Counter(g for movie_id, _ in matches for g in index.docs[movie_id]['genre'])
+    results = [
+        dict(index.docs[movie_id], score=round(score, 4))
+        for movie_id, score in matches[offset:offset + limit]
+    ]
+    return {
+        "total": len(matches),
+        "results": results,
+        "facets": {
+            "language": dict(languages.most_common()),
+            "genre": dict(genres.most_common()),
+            "date": _date_facets(movie_id for movie_id, _ in matches),
+        },
+    }
+
+
+def _postgres_search(query, language, genre, day, limit, offset):
+    table = connection.ops.quote_name(Movie._meta.db_table)
+    movies = Movie.objects.all()
+    if query.strip():
+        # These expressions must stay identical to the ones indexed in migration 0003.
+        document = f"to_tsvector('simple', coalesce({table}.\"title\", '') || ' ' || coalesce({table}.\"description\", ''))"
+        movies = movies.filter(RawSQL(
+            f"({document} @@ websearch_to_tsquery('simple', %s) OR {table}.\"title\" %% %s)",
+            (query, query), output_field=BooleanField(),
+        )).annotate(score=RawSQL(
+            f"ts_rank(setweight(to_tsvector('simple', coalesce({table}.\"title\", '')), 'A') || "
+            f"setweight(to_tsvector('simple', coalesce({table}.\"description\", '')), 'B'), "
+            f"websearch_to_tsquery('simple', %s)) + similarity({table}.\"title\", %s)",
+            (query, query), output_field=FloatField(),
+        )).order_by('-score', 'title')
+    else:
+        movies = movies.annotate(score=RawSQL('0', (), output_field=FloatField())).order_by('title')
+    if language:
+        movies = movies.filter(language__name__iexact=language)
+    if genre:
+        movies = movies.filter(genre__name__iexact=genre)
+    if day:
+        movies = movies.filter(id__in=_movies_showing_on(day))
+
+    matched_ids = movies.values('id')
+    page = list(movies.select_related('language').prefetch_related('genre')[offset:offset + limit])
+    results = [{
+        "imdb_id": movie.imdb_id,
+        "title": movie.title,
+        "poster": movie.poster,
+        "language": movie.language.name,
+        "genre": [g.name for g in movie.genre.all()],
+        "score": round(movie.score, 4),
+    } for movie in page]
+    languages = (Movie.objects.filter(id__in=matched_ids)
+                 .values_list('language__name').annotate(count=Count('id')).order_by('-count'))
+    genres = (Movie.genre.through.objects.filter(movie_id__in=matched_ids)
+              .values_list('genre__name').annotate(count=Count('movie_id')).order_by('-count'))
+    dates = (Show.objects.filter(movie_id__in=matched_ids, date_time__gte=timezone.now())
+             .annotate(day=TruncDate('date_time')).values_list('day')
+             .annotate(count=Count('movie_id', distinct=True)).order_by('day'))
+    return {
+        "total": movies.count(),
+        "results": results,
+        "facets": {
+            "language": dict(languages),
+            "genre": dict(genres),
+            "date": {value.isoformat(): count for value, count in dates},
+        },
+    }
+
+
+def search_movies(query='', language=None, genre=None, day=None, limit=20, offset=0):
+    """
+    Ranked search with optional language / genre / showtime date (a date) filters.
+    Returns {"total", "results", "facets"}.
+    """
+    if connection.vendor == 'postgresql':
+        return _postgres_search(query, language, genre, day, limit, offset)
+    return _fallback_search(query, language, genre, day, limit, offset)
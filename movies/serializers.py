@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Movie, Language, Genre, Show, Screen, Seat
+from . import layouts
 
 
 class LanguageSerializer(serializers.ModelSerializer):
@@ -21,6 +22,12 @@ class MovieSerializer(serializers.ModelSerializer):
         fields = ['imdb_id', 'title', 'description', 'duration', 'poster', 'backdrop', 'release_datetime', 'imdb_page', 'language', 'genre']
 
 class ScreenSerializer(serializers.ModelSerializer):
+    # From the compiled layout cache, see movies/layouts.py
+    layout = serializers.SerializerMethodField()
+
+    def get_layout(self, obj):
+        return layouts.for_screen(obj)['layout']
+
     class Meta:
         model = Screen
         fields = ['number', 'layout']
@@ -28,7 +35,7 @@ class ScreenSerializer(serializers.ModelSerializer):
 class SeatSerializer(serializers.ModelSerializer):
     class Meta:
         model = Seat
-        fields = ['id', 'type', 'row', 'col', 'state', 'price']
+        fields = ['uuid', 'id', 'type', 'row', 'col', 'state', 'price']
 
 class ShowSerializer(serializers.ModelSerializer):
     movie = MovieSerializer()
@@ -39,6 +46,14 @@ class ShowSerializer(serializers.ModelSerializer):
         model = Show
         fields = ['id','date_time', 'movie', 'screen', 'base_price', 'seats']
 
+class ShowCalendarSerializer(serializers.ModelSerializer):
+    language = serializers.CharField(source='language.name')
+    screen = serializers.IntegerField(source='screen_id')
+
+    class Meta:
+        model = Show
+        fields = ['id', 'date_time', 'language', 'screen', 'base_price']
+
 class AddShowSerializer(serializers.Serializer):
     imdb_id = serializers.CharField()
     screen_number = serializers.IntegerField()
@@ -0,0 +1,76 @@
+"""
+Showtime calendar: a movie's shows grouped by day, paged one (or a few)
+days at a time.
+
+A page is read with a single ordered query over the (movie, date_time)
+index. Rows are streamed until the requested number of days is complete;
+the first show of the following day is only used as the next cursor, so
+no count or second lookup is needed.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import Show
+from .serializers import ShowCalendarSerializer
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def showtime_calendar(imdb_id, start, end=None, language=None, screen=None, days=1):
+    """
+    Return {"days": [{"date", "shows"}...], "next_day"} for shows of the movie
+    from `start` (aware datetime) up to `end` (exclusive), covering at most `days` days.
+    """
+    shows = (Show.objects
+             .filter(movie__imdb_id=imdb_id, date_time__gte=start)
+             .select_related('language')
+             .order_by('date_time'))
+    if end is not None:
+        shows = shows.filter(date_time__lt=end)
+    if language:
+        shows = shows.filter(language__name__iexact=language)
+    if screen is not None:
+        shows = shows.filter(screen_id=screen)
+
+    groups = []
+    next_day = None
+    for show in shows.iterator(chunk_size=200):
+        day = timezone.localtime(show.date_time).date()
+        if not groups or groups[-1]['date'] != day:
+            if len(groups) == days:
+                next_day = day
+                break
+            groups.append({"date": day, "shows": []})
+        groups[-1]['shows'].append(show)
+
+    return {
+        "days": [
+            {"date": group['date'].isoformat(), "shows": ShowCalendarSerializer(group['shows'], many=True).data}
+            for group in groups
+        ],
+        "next_day": next_day.isoformat() if next_day else None,
+    }
+
+
+def parse_calendar_window(params, now=None):
+    """
+    Read from / to / day from query params. `day` is the paging cursor and
+    wins over `from`. Past shows are excluded unless include_past=true.
+    Raises ValueError on malformed dates.
+    """
+    now = now or timezone.now()
+    if params.get('day'):
+        start = start_of_day(datetime.strptime(params['day'], '%Y-%m-%d').date())
+    elif params.get('from'):
+        start = start_of_day(datetime.strptime(params['from'], '%Y-%m-%d').date())
+    else:
+        start = now
+    if params.get('include_past', '').lower() != 'true':
+        start = max(start, now)
+    end = None
+    if params.get('to'):
+        end = start_of_day(datetime.strptime(params['to'], '%Y-%m-%d').date()) + timedelta(days=1)
+    return start, end
@@ -0,0 +1,101 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Movie, Language, Genre, Show, Screen, Seat, PricingRule
+from .layouts import layout_version
+from .pricing import bump_rules_version, compile_price_table
+
+
+CATALOG_VERSION_KEY = 'movies:catalog:version'
+SEAT_MAP_VERSION_KEY = 'movies:show:{}:seats:version'
+
+
+def epoch():
+    # Seed of a missing version key. A lost (evicted) counter restarts above
+    # every version it handed out, unless it was bumped a million times a second.
+    return time.time_ns() // 1000
+
+
+def current_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, epoch(), timeout=None)
+        version = cache.get(key)
+    return version if version is not None else epoch()
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, epoch(), timeout=None)
+
+
+def catalog_version():
+    """
+    Version of the movie catalog, shared by every worker through the cache.
+    Anything derived from the catalog (search index, cached payloads) is
+    rebuilt when this changes.
+    """
+    return current_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    bump_version(CATALOG_VERSION_KEY)
+
+
+def seat_map_version(show_id):
+    """
+    Version of one show's seat map, bumped whenever one of its seats changes.
+    """
+    return current_version(SEAT_MAP_VERSION_KEY.format(show_id))
+
+
+def bump_seat_map_version(show_id):
+    bump_version(SEAT_MAP_VERSION_KEY.format(show_id))
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(m2m_changed, sender=Movie.genre.through)
+def catalog_changed(sender, **kwargs):
+    # After the commit, a reader rebuilding in between would cache the old rows under the new version
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Seat)
+def seat_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_seat_map_version(instance.show_id))
+
+
+@receiver(post_save, sender=Show)
+@receiver(post_delete, sender=Show)
+def show_changed(sender, instance, **kwargs):
+    # Seats are deleted with their show in bulk, without their own signals
+    transaction.on_commit(lambda: bump_seat_map_version(instance.id))
+
+
+@receiver(pre_save, sender=Screen)
+def screen_layout_changed(sender, instance, **kwargs):
+    # A new version points the shows of this screen at a freshly compiled layout
+    instance.layout_version = layout_version(instance.layout)
+
+
+@receiver(post_save, sender=PricingRule)
+@receiver(post_delete, sender=PricingRule)
+def pricing_rules_changed(sender, **kwargs):
+    bump_rules_version()
+
+
+@receiver(post_save, sender=Show)
+def compile_show_prices(sender, instance, **kwargs):
+    # Base price or start time may have changed
+    compile_price_table(instance)
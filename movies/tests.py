@@ -1,3 +1,81 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.admin.sites import site
 from django.test import TestCase
+from django.utils import timezone
+
+from .models import Movie, Language, Show, Seat, PricingRule, ShowPriceTable
+from . import pricing
+from .admin import SeatAdmin
+
+
+def make_show(seats=10):
+    language = Language.objects.create(name='English')
+    movie = Movie.objects.create(imdb_id='tt1', title='Test', duration=120, release_datetime='2024', language=language)
+    show = Show.objects.create(movie=movie, language=language, base_price=100, date_time=timezone.now() + timedelta(days=1))
+    for col in range(1, seats + 1):
+        Seat.objects.create(id=f'A{col}', row='A', col=col, show=show)
+    return show
+
+
+def take_seats(show, count):
+    pks = list(show.seats.filter(state='available').values_list('pk', flat=True)[:count])
+    Seat.objects.filter(pk__in=pks).update(state='booked')
+
+
+class PricingTests(TestCase):
+    def setUp(self):
+        # The rolled back version of an earlier test may still be kept by the process
+        pricing._version['version'] = None
+        self.show = make_show()
+
+    def prices(self):
+        show = Show.objects.select_related('price_table').get(pk=self.show.pk)
+        return pricing.price_table(show).prices
+
+    def test_rule_changes_reprice_through_the_database_version(self):
+        self.assertEqual(self.prices()['standard'], 100)
+        version = pricing.rules_version()
+        PricingRule.objects.create(name='surge', multiplier=2)
+        self.assertEqual(pricing.rules_version(), version + 1)
+        self.assertEqual(self.prices()['standard'], 200)
+
+    def test_refresh_recompiles_when_occupancy_crosses_a_bound(self):
+        PricingRule.objects.create(name='busy', min_occupancy=0.5, multiplier=1.5)
+        self.prices()
+        take_seats(self.show, 3)
+        with mock.patch.object(pricing, 'compile_price_table', wraps=pricing.compile_price_table) as compile_table:
+            pricing.refresh_price_tables([self.show.pk])
+            self.assertFalse(compile_table.called)
+            take_seats(self.show, 2)
+            pricing.refresh_price_tables([self.show.pk])
+            self.assertTrue(compile_table.called)
+        self.assertEqual(self.prices()['standard'], 150)
+        self.assertEqual(ShowPriceTable.objects.get(show=self.show).occupancy, 0.5)
+
+    def test_refresh_without_occupancy_rules_skips_the_count(self):
+        PricingRule.objects.create(name='weekend', weekdays='56', multiplier=1.2)
+        self.prices()
+        take_seats(self.show, 5)
+        with self.assertNumQueries(1):
+            # The show with its table, the rules version is kept by the process
+            pricing.refresh_price_tables([self.show.pk])
+
+    def test_price_lookup_needs_no_query(self):
+        show = Show.objects.select_related('price_table').get(pk=self.show.pk)
+        pricing.price_table(show)
+        seats = list(show.seats.all())
+        with self.assertNumQueries(0):
+            pricing.total_price(show, seats)
+
 
-# Create your tests here.
+class SeatAdminTests(TestCase):
+    def test_unblocked_seats_reach_the_waitlist(self):
+        show = make_show()
+        take_seats(show, 2)
+        seat_admin = SeatAdmin(Seat, site)
+        with mock.patch('bookings.waitlist.seats_freed') as seats_freed, mock.patch.object(seat_admin, 'message_user'):
+            seat_admin.unblock_seats(mock.Mock(), Seat.objects.filter(show=show))
+        seats_freed.assert_called_once_with(show.pk)
+        self.assertEqual(show.seats.filter(state='available').count(), 10)
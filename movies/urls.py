@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .api import MovieViewSet, ShowViewSet
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'movie', MovieViewSet, basename="movie")
@@ -11,7 +12,21 @@ urlpatterns = [
     
     # Custom action for getting shows of a movie
     path('movie/<str:imdb_id>/shows/', MovieViewSet.as_view({'get': 'get_movie_shows'}), name='get-movie-shows'),
+
+    # Custom action for the day by day showtime calendar of a movie
+    path('movie/<str:imdb_id>/calendar/', MovieViewSet.as_view({'get': 'get_showtime_calendar'}), name='get-showtime-calendar'),
     
     # Custom action for getting seats of a show
     path('show/<int:show_id>/seats/', ShowViewSet.as_view({'get': 'get_show_seats'}), name='get-show-seats'),
+
+    # Custom action for the best block of adjacent free seats of a show
+    path('show/<int:show_id>/adjacent_seats/', ShowViewSet.as_view({'get': 'get_adjacent_seats'}), name='get-adjacent-seats'),
+
+    # Custom action for the current prices of a show
+    path('show/<int:show_id>/prices/', ShowViewSet.as_view({'get': 'get_show_prices'}), name='get-show-prices'),
+
+    # Async variants of the read-heavy endpoints, served without a thread hop under ASGI
+    path('async/movie/list_movies/', async_views.list_movies, name='async-list-movies'),
+    path('async/movie/<str:imdb_id>/shows/', async_views.get_movie_shows, name='async-get-movie-shows'),
+    path('async/show/<int:show_id>/seats/', async_views.get_show_seats, name='async-get-show-seats'),
 ]
\ No newline at end of file
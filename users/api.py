@@ -2,7 +2,6 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 from django.contrib.auth import authenticate, login, logout
 from django.middleware.csrf import get_token
 from .models import User
@@ -13,8 +12,8 @@ from .serializers import (
     CSRFTokenSerializer,
     UsernameCheckSerializer,
 )
-from .utils import generate_otp_secret, generate_otp, send_otp
-import pyotp
+from .utils import generate_otp_secret, generate_otp, verify_otp, send_otp
+from movie_booking.ratelimit import AnonThrottle, UserThrottle, ScopedThrottle
 import logging
 
 core_logger = logging.getLogger('users')
@@ -24,6 +23,8 @@ core_logger = logging.getLogger('users')
 # User ViewSet
 class UserViewSet(viewsets.ViewSet):
     permission_classes = [AllowAny]  # Allow any user to access these endpoints
+    throttle_classes = [AnonThrottle, UserThrottle, ScopedThrottle]
+    throttle_scope = None
 
     @action(detail=False, methods=['get'])
     def add(self, request):
@@ -56,7 +57,7 @@ class UserViewSet(viewsets.ViewSet):
         except Exception as e:
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_scope='auth')
     def login(self, request):
         try:
             serializer = SignInSerializer(data=request.data)
@@ -82,7 +83,7 @@ class UserViewSet(viewsets.ViewSet):
             return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_scope='otp')
     def request_otp(self, request):
         try:
             email = request.data.get('email')
@@ -113,7 +114,7 @@ class UserViewSet(viewsets.ViewSet):
     #     except Exception as e:
     #         return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_scope='auth')
     def register(self, request):
         try:
             serializer = RegisterSerializer(data=request.data)
@@ -132,10 +133,8 @@ class UserViewSet(viewsets.ViewSet):
             if not otp_secret or otp_email != data.get('email'):
                 return Response({"success": False, "message": "OTP verification failed"}, status=status.HTTP_400_BAD_REQUEST)
 
-            totp = pyotp.TOTP(otp_secret, interval=300)
-            
             # Verify with debugging
-            is_valid = totp.verify(data.get('otp'))
+            is_valid = verify_otp(otp_secret, data.get('otp'))
             core_logger.debug(f"OTP verification result: {is_valid}")
             
             if is_valid:
@@ -1,3 +1,33 @@
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import User
+
+
+class RequestOtpTests(TestCase):
+    def setUp(self):
+        # Rate limit counters live in the cache
+        cache.clear()
+        self.client = APIClient()
+
+    def test_otp_is_emailed(self):
+        response = self.client.post('/user/request_otp/', {'email': 'new@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+
+    def test_taken_email_is_refused(self):
+        User.objects.create(username='a', email='a@example.com')
+        response = self.client.post('/user/request_otp/', {'email': 'a@example.com'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(RATE_LIMITS={'otp': '2/hour'})
+    def test_otp_requests_are_rate_limited(self):
+        for index in range(2):
+            self.client.post('/user/request_otp/', {'email': f'{index}@example.com'}, format='json')
+        response = self.client.post('/user/request_otp/', {'email': 'more@example.com'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(len(mail.outbox), 2)
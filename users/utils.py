@@ -1,15 +1,22 @@
-import pyotp
-from django.core.mail import send_mail
 from django.conf import settings  # Correct way to import settings
 
+# pyotp and the email modules are imported on first use, most workers never send an OTP
+
 def generate_otp_secret():
+    import pyotp
     return pyotp.random_base32()
 
 def generate_otp(secret):
+    import pyotp
     totp = pyotp.TOTP(secret, interval=300)
     return totp.now()
 
-def send_otp(email, otp, ip_address):
+def verify_otp(secret, otp):
+    import pyotp
+    return pyotp.TOTP(secret, interval=300).verify(otp)
+
+def otp_message(email, otp, ip_address):
+    from django.core.mail import EmailMultiAlternatives
     subject = '🔑 OTP Verification for Movie Booking'
     
     html_message = f"""
@@ -31,11 +38,14 @@ def send_otp(email, otp, ip_address):
     </div>
     """
 
-    send_mail(
+    msg = EmailMultiAlternatives(
         subject,
         '',  # Empty plain text message since we are using an HTML email
         settings.EMAIL_HOST_USER,  # ✅ Correct way to access EMAIL_HOST_USER
-        [email],
-        fail_silently=False,
-        html_message=html_message  
+        [email]
     )
+    msg.attach_alternative(html_message, "text/html")
+    return msg
+
+def send_otp(email, otp, ip_address):
+    otp_message(email, otp, ip_address).send(fail_silently=False)